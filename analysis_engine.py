@@ -0,0 +1,295 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from document_summarizer import DocumentSummarizer
+from llm_client import DEFAULT_API_URL, LLMClient, estimate_tokens
+from prompt_templates import (
+    DEFAULT_LANGUAGE, KIND_ANALYSIS, KIND_SECTION, PromptRegistry, PromptTemplate, default_registry
+)
+from rate_limiter import RateLimiter
+from response_cache import ResponseCache
+from section_parser import SECTION_TITLES, SectionSplitter, parse_sections, parse_structured_sections
+from similarity_index import SimilarityIndex, format_cases
+from tracing import tracer
+
+# 分析模式
+MODE_STREAM = "流式输出"
+MODE_PARALLEL = "分维度并行"
+MODE_WHOLE = "整体分析"
+
+# 上传文件解析的字符上限，防止超大文件占用过多内存
+FILE_TEXT_LIMIT = 200000
+# 无法生成摘要时，上传文件内容直接纳入 prompt 的最大字符数
+FILE_CONTEXT_CHARS = 2000
+# 文件摘要默认配置：分块大小、并发数、纳入 prompt 的总 token 预算，以及每轮最多的分块请求数
+SUMMARY_CHUNK_TOKENS = 3000
+SUMMARY_CONCURRENCY = 4
+FILE_CONTEXT_TOKENS = 2000
+SUMMARY_MAX_CHUNKS = 8
+# 整体分析和分维度并行分析时单个维度的最大生成长度
+ANALYSIS_MAX_TOKENS = 4000
+SECTION_MAX_TOKENS = 1200
+# 纳入 prompt 的相似历史项目数
+SIMILAR_CASES = 3
+
+
+class AnalysisEngine:
+    """与界面无关的项目分析引擎，供 Streamlit 界面和命令行批处理共用"""
+
+    def __init__(self, client: LLMClient, cache: Optional[ResponseCache] = None, structured_output: bool = False,
+                 language: str = DEFAULT_LANGUAGE, prompts: Optional[PromptRegistry] = None,
+                 similarity: Optional[SimilarityIndex] = None, similar_cases: int = SIMILAR_CASES,
+                 summary_chunk_tokens: int = SUMMARY_CHUNK_TOKENS, summary_concurrency: int = SUMMARY_CONCURRENCY,
+                 file_context_tokens: int = FILE_CONTEXT_TOKENS, summary_max_chunks: int = SUMMARY_MAX_CHUNKS):
+        self.client = client
+        self.cache = cache or ResponseCache()
+        # 整体分析时要求模型返回 JSON，解析失败时退回按标题切分
+        self.structured_output = structured_output
+        # prompt 模板按语言和项目阶段从注册表中选取
+        self.language = language
+        self.prompts = prompts or default_registry
+        # 相似历史项目索引；设置后分析时检索 similar_cases 个相似案例附在 prompt 中
+        self.similarity = similarity
+        self.similar_cases = similar_cases
+        # 上传文件摘要的请求次数不超过 summary_max_chunks 加合并轮数，与文件长度无关
+        self.summarizer = DocumentSummarizer(
+            self.complete,
+            chunk_tokens=summary_chunk_tokens,
+            max_workers=summary_concurrency,
+            total_budget=file_context_tokens,
+            max_chunks=summary_max_chunks
+        )
+
+    @classmethod
+    def from_settings(cls, api_key: str, api_url: Optional[str] = None,
+                      cache_path: Optional[str] = None, pool_size: int = 10,
+                      rate_limiter: Optional[RateLimiter] = None, priority: Optional[int] = None,
+                      structured_output: bool = False, language: str = DEFAULT_LANGUAGE,
+                      similarity: Optional[SimilarityIndex] = None,
+                      similar_cases: int = SIMILAR_CASES, summary_chunk_tokens: int = SUMMARY_CHUNK_TOKENS,
+                      summary_concurrency: int = SUMMARY_CONCURRENCY, file_context_tokens: int = FILE_CONTEXT_TOKENS,
+                      summary_max_chunks: int = SUMMARY_MAX_CHUNKS) -> "AnalysisEngine":
+        """根据 API 配置创建引擎；rate_limiter 可在多个引擎间共享，priority 为请求的排队优先级"""
+        client = LLMClient(
+            api_key, api_url or DEFAULT_API_URL, pool_size=pool_size,
+            rate_limiter=rate_limiter, priority=priority
+        )
+        return cls(client, ResponseCache(path=cache_path), structured_output=structured_output, language=language,
+                   similarity=similarity, similar_cases=similar_cases, summary_chunk_tokens=summary_chunk_tokens,
+                   summary_concurrency=summary_concurrency, file_context_tokens=file_context_tokens,
+                   summary_max_chunks=summary_max_chunks)
+
+    def _file_text(self, project_info: Dict[str, Any]) -> Optional[str]:
+        """纳入 prompt 的文件内容：优先使用摘要，否则截断原文"""
+        if "上传文件" in project_info and "文件摘要" in project_info:
+            return project_info["文件摘要"]
+        if "上传文件" in project_info and "文件内容" in project_info:
+            return project_info["文件内容"][:FILE_CONTEXT_CHARS]
+        return None
+
+    def attach_file_summary(self, project_info: Dict[str, Any]):
+        """为上传文件生成覆盖全文的摘要；失败时抛出异常，prompt 退回截断原文"""
+        if "文件内容" not in project_info or "文件摘要" in project_info:
+            return
+        project_info["文件摘要"] = self.summarizer.summarize(project_info["文件内容"])
+
+    def attach_similar_cases(self, project_info: Dict[str, Any]):
+        """检索相似的历史项目（排除同名项目），以简要文本附加到项目信息中"""
+        if self.similarity is None or self.similar_cases <= 0 or "相似案例" in project_info:
+            return
+        hits = self.similarity.search(project_info, self.similar_cases, exclude_name=project_info.get("项目名称"))
+        if hits:
+            project_info["相似案例"] = format_cases(hits)
+
+    def template(self, kind: str, project_info: Dict[str, Any]) -> PromptTemplate:
+        """按引擎语言和项目阶段选取模板"""
+        return self.prompts.get(kind, self.language, project_info.get("项目阶段"))
+
+    def prompt_version(self, project_info: Dict[str, Any], mode: str) -> str:
+        """该项目在给定模式下使用的模板标识，记入缓存键和历史记录"""
+        return self.template(KIND_SECTION if mode == MODE_PARALLEL else KIND_ANALYSIS, project_info).id
+
+    def _build_prompt(self, project_info: Dict[str, Any], structured: bool = False,
+                      title: Optional[str] = None) -> List[Dict[str, str]]:
+        """构建分析用的对话消息；title 指定时只分析该维度，structured 为 True 时要求以 JSON 返回"""
+        template = self.template(KIND_SECTION if title else KIND_ANALYSIS, project_info)
+        with tracer.span("prompt.build", template=template.id, **({"section": title} if title else {})) as span:
+            messages = template.render(
+                project_info, self._file_text(project_info), title, structured, project_info.get("相似案例")
+            )
+            prompt = messages[-1]["content"]
+            span.attrs.update(
+                chars=len(prompt), tokens=estimate_tokens(prompt),
+                static_chars=len(template.static_prefix(title, structured))
+            )
+        return messages
+
+    def complete(self, prompt: str, max_tokens: int = 4000) -> str:
+        """以默认模板的系统提示发送一次非流式请求，返回生成的文本（供文件摘要等辅助请求使用）"""
+        system = self.prompts.get(KIND_ANALYSIS, self.language).system
+        return self.client.complete(
+            [{"role": "system", "content": system}, {"role": "user", "content": prompt}], max_tokens=max_tokens
+        )
+
+    def stream_text(self, messages: List[Dict[str, str]],
+                    timings: Optional[Dict[str, float]] = None) -> Iterator[str]:
+        """以 SSE 流式方式调用接口，逐段返回生成的文本；首字节耗时记入 timings['ttfb']"""
+        started = time.monotonic()
+        for delta in self.client.stream(messages):
+            if timings is not None and "ttfb" not in timings:
+                timings["ttfb"] = time.monotonic() - started
+            yield delta
+
+    def analyze_stream(self, project_info: Dict[str, Any],
+                       timings: Optional[Dict[str, float]] = None) -> Iterator[Dict[str, str]]:
+        """流式分析项目信息，每当有维度内容更新时返回当前各维度文本"""
+        splitter = SectionSplitter()
+        # 切分耗时分散在每个片段中，累计后记录为一个 span
+        split_time = 0.0
+        for delta in self.stream_text(self._build_prompt(project_info), timings):
+            started = time.monotonic()
+            touched = splitter.feed(delta)
+            split_time += time.monotonic() - started
+            if touched:
+                yield dict(splitter.sections)
+        started = time.monotonic()
+        sections = splitter.close()
+        tracer.record("section.split", split_time + time.monotonic() - started, sections=len(sections))
+        yield sections
+
+    def analyze(self, project_info: Dict[str, Any]) -> Dict[str, str]:
+        """整体分析项目信息，返回按维度划分的结果"""
+        analysis = self.client.complete(
+            self._build_prompt(project_info, structured=self.structured_output), max_tokens=ANALYSIS_MAX_TOKENS
+        )
+
+        with tracer.span("section.split") as span:
+            result = parse_structured_sections(analysis) if self.structured_output else None
+            span.attrs["structured"] = result is not None
+            if not result:
+                # 未要求 JSON 或模型没有按要求输出时，按标题行单遍切分
+                result = parse_sections(analysis)
+            span.attrs["sections"] = len(result)
+
+        return result
+
+    def analyze_sections_parallel(self, project_info: Dict[str, Any], max_workers: int = 3,
+                                  timings: Optional[Dict[str, float]] = None,
+                                  errors: Optional[Dict[str, str]] = None,
+                                  on_progress: Optional[Callable[[Dict[str, str]], None]] = None,
+                                  titles: Optional[List[str]] = None) -> Dict[str, str]:
+        """按维度拆分请求并发分析，单个维度失败不影响其他维度的结果
+
+        titles 指定只分析其中部分维度；各维度耗时记入 timings，失败原因记入 errors；
+        每完成一个维度以当前结果调用 on_progress。
+        """
+        titles = titles or SECTION_TITLES
+        timings = {} if timings is None else timings
+        errors = {} if errors is None else errors
+
+        def analyze_section(title: str) -> str:
+            started = time.monotonic()
+            try:
+                with tracer.span("analysis.section", section=title):
+                    return self.client.complete(
+                        self._build_prompt(project_info, title=title),
+                        max_tokens=SECTION_MAX_TOKENS
+                    )
+            finally:
+                timings[title] = time.monotonic() - started
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            # 每个任务复制一份当前上下文，使各维度的耗时归入同一个 trace
+            futures = {
+                executor.submit(contextvars.copy_context().run, analyze_section, title): title
+                for title in titles
+            }
+            for future in as_completed(futures):
+                title = futures[future]
+                try:
+                    results[title] = future.result()
+                except Exception as e:
+                    errors[title] = str(e)
+                    continue
+                if on_progress is not None:
+                    on_progress({title: results[title] for title in SECTION_TITLES if title in results})
+
+        # 保持与整体分析一致的维度顺序
+        return {title: results[title] for title in SECTION_TITLES if title in results}
+
+    def cache_key(self, project_info: Dict[str, Any], mode: str) -> str:
+        """相同表单、模型与 prompt 模板版本的分析共享同一缓存键"""
+        return self.cache.make_key(
+            project_info,
+            model=self.client.model,
+            temperature=self.client.temperature,
+            prompt_version=self.prompt_version(project_info, mode),
+            variant=mode + ("/json" if self.structured_output and mode == MODE_WHOLE else "")
+        )
+
+    def store(self, cache_key: str, analysis_result: Dict[str, str]):
+        """只缓存五个维度齐全的结果，避免把部分失败固化下来"""
+        if analysis_result and all(analysis_result.get(title) for title in SECTION_TITLES):
+            self.cache.set(cache_key, analysis_result)
+
+    def run_analysis(self, project_info: Dict[str, Any], mode: str = MODE_WHOLE,
+                     max_workers: int = 3, timings: Optional[Dict[str, float]] = None,
+                     errors: Optional[Dict[str, str]] = None,
+                     on_progress: Optional[Callable[[Dict[str, str]], None]] = None) -> Tuple[Dict[str, str], bool]:
+        """完整的非交互分析流程：查缓存、摘要文件、检索相似案例、调用模型、写缓存
+
+        返回分析结果及是否命中缓存。timings 记录首字节/各维度耗时，errors 记录文件摘要、相似案例检索及
+        各维度的失败原因；流式和分维度并行模式下，中间结果通过 on_progress 回调。
+        """
+        errors = {} if errors is None else errors
+        with tracer.span("cache.lookup") as span:
+            cache_key = self.cache_key(project_info, mode)
+            cached = self.cache.get(cache_key)
+            span.attrs["hit"] = bool(cached)
+        tracer.count("analysis_cache_total", result="hit" if cached else "miss")
+        if cached:
+            return cached, True
+
+        try:
+            if "文件内容" in project_info and "文件摘要" not in project_info:
+                with tracer.span("file.summary", chars=len(project_info["文件内容"])):
+                    self.attach_file_summary(project_info)
+        except Exception as e:
+            # 摘要失败时 prompt 会退回截断原文，不影响分析本身
+            errors["文件摘要"] = str(e)
+
+        try:
+            with tracer.span("similar.search") as span:
+                self.attach_similar_cases(project_info)
+                span.attrs["found"] = "相似案例" in project_info
+        except Exception as e:
+            # 检索失败时不引用相似案例，不影响分析本身
+            errors["相似案例"] = str(e)
+
+        if mode == MODE_PARALLEL:
+            analysis_result = self.analyze_sections_parallel(project_info, max_workers, timings, errors, on_progress)
+        elif mode == MODE_STREAM:
+            analysis_result = {}
+            for analysis_result in self.analyze_stream(project_info, timings):
+                if on_progress is not None:
+                    on_progress(analysis_result)
+        else:
+            analysis_result = self.analyze(project_info)
+
+        missing = [title for title in SECTION_TITLES if not analysis_result.get(title)]
+        if missing and mode != MODE_PARALLEL:
+            # 只为缺失的维度单独补充请求，而不是重新生成整份分析
+            with tracer.span("analysis.fill_missing", sections=len(missing)):
+                filled = self.analyze_sections_parallel(project_info, max_workers, timings, errors, titles=missing)
+            analysis_result = {
+                title: analysis_result.get(title) or filled[title]
+                for title in SECTION_TITLES if analysis_result.get(title) or title in filled
+            }
+            if on_progress is not None:
+                on_progress(analysis_result)
+
+        self.store(cache_key, analysis_result)
+        return analysis_result, False
@@ -0,0 +1,5 @@
+"""性能基准：本地模拟模型接口与合成语料，结果以 JSON 输出，便于对比不同版本
+
+    python -m benchmarks.run -o bench.json
+    python -m benchmarks.run --compare bench.json
+"""
@@ -0,0 +1,91 @@
+"""合成的 PDF/DOCX/TXT 语料：内容由 seed 决定，不依赖外部文件"""
+import io
+import random
+from typing import Any, Dict, Iterator, List, Tuple
+
+# 语料规模：页数（PDF）或段落数（DOCX/TXT）
+SIZES = {"small": 5, "medium": 50, "large": 300}
+
+_PHRASES = ["市场规模达到 120 亿元", "目标客户为中小型连锁门店", "核心产品是 SaaS 化的库存管理系统",
+            "团队成员来自头部互联网公司", "计划融资 2000 万元用于产品研发", "竞争对手主要是传统软件厂商",
+            "付费用户复购率超过 70%", "毛利率保持在 65% 左右", "风险在于行业监管政策的变化"]
+_INDUSTRIES = ["企业服务", "教育科技", "医疗健康", "消费零售", "金融科技", "智能制造"]
+_STAGES = ["概念阶段", "产品研发", "市场验证", "规模化"]
+# 标准 Type1 字体只支持 ASCII，PDF 语料使用英文文本
+_WORDS = ["market", "customer", "revenue", "growth", "product", "team", "funding", "risk", "channel", "pricing",
+          "subscription", "retention", "margin", "competitor", "pilot", "platform"]
+
+
+def make_paragraphs(count: int, seed: int = 0, sentences: int = 5) -> List[str]:
+    rng = random.Random(seed)
+    return ["，".join(rng.choice(_PHRASES) for _ in range(sentences)) + "。" for _ in range(count)]
+
+
+def make_projects(count: int, seed: int = 0) -> Iterator[Tuple[int, Dict[str, Any], Dict[str, str]]]:
+    """生成 (记录 id, 项目信息, 分析结果)，用于相似项目索引"""
+    rng = random.Random(seed)
+    for i in range(count):
+        project_info = {
+            "项目名称": f"项目{i}",
+            "项目阶段": rng.choice(_STAGES),
+            "行业领域": rng.choice(_INDUSTRIES),
+            "目标客户": rng.choice(_PHRASES),
+            "核心产品描述": "，".join(rng.choice(_PHRASES) for _ in range(3)),
+            "当前挑战": rng.choice(_PHRASES),
+        }
+        result = {title: "，".join(rng.choice(_PHRASES) for _ in range(4)) + "。"
+                  for title in ("需求分析", "商业模式", "增长策略")}
+        yield i + 1, project_info, result
+
+
+def make_txt(paragraphs: int, seed: int = 0) -> bytes:
+    return "\n\n".join(make_paragraphs(paragraphs, seed)).encode("utf-8")
+
+
+def make_docx(paragraphs: int, seed: int = 0, table_every: int = 10) -> bytes:
+    """每 table_every 段插入一个 4x3 的表格，覆盖表格提取路径"""
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading("商业计划书", 0)
+    for i, text in enumerate(make_paragraphs(paragraphs, seed)):
+        doc.add_paragraph(text)
+        if table_every and i % table_every == table_every - 1:
+            table = doc.add_table(rows=4, cols=3)
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    cell.text = f"指标{r}-{c}"
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def make_pdf(pages: int, seed: int = 0, lines_per_page: int = 40) -> bytes:
+    """手工拼装的最小 PDF（Helvetica 文本），无需额外依赖"""
+    rng = random.Random(seed)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(pages))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    font_id = 3 + 2 * pages
+    for i in range(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>".encode()
+        )
+        lines = [" ".join(rng.choice(_WORDS) for _ in range(12)) for _ in range(lines_per_page)]
+        content = "BT /F1 10 Tf 12 TL 50 760 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        stream = content.encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % (i + 1) + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
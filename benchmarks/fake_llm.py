@@ -0,0 +1,151 @@
+"""本地模拟的 chat/completions 服务：可配置首字节延迟、生成速度和错误率，结果可复现"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Sequence
+
+from section_parser import SECTION_TITLES
+
+
+def make_analysis_text(paragraphs: int = 3, seed: int = 0) -> str:
+    """生成五个维度齐全的 Markdown 分析报告，用作模拟回复"""
+    rng = random.Random(seed)
+    phrases = ["目标客户集中在一二线城市的中小企业", "建议先以单一场景验证付费意愿", "获客成本需控制在客单价的三分之一以内",
+               "核心壁垒在于数据积累和渠道关系", "预计 18 个月内实现盈亏平衡", "主要竞争对手已完成 B 轮融资",
+               "可通过行业协会和渠道伙伴快速触达客户", "订阅制收入占比应提升到 60% 以上"]
+    parts = ["以下是对该创业项目的分析：\n"]
+    for i, title in enumerate(SECTION_TITLES, 1):
+        parts.append(f"## {i}. {title}\n")
+        for _ in range(paragraphs):
+            parts.append("".join(rng.choice(phrases) + "，" for _ in range(4)).rstrip("，") + "。\n")
+        parts.append("\n")
+    return "".join(parts)
+
+
+class FakeLLMServer:
+    """在后台线程运行的模拟接口
+
+    latency 为首字节延迟（秒），tokens_per_second 为流式输出速度（按字符近似 token，0 表示不限速），
+    error_rate 为返回 503 的比例。错误按请求序号和 seed 决定，同样的参数每次运行结果一致。
+    statuses 依次指定前几个请求的状态码（200 表示正常返回），错误响应带 retry_after 作为 Retry-After；
+    stream_events 为流式响应中原样发送的 data 内容，用于模拟格式错误的事件。
+    """
+
+    def __init__(self, latency: float = 0.0, tokens_per_second: float = 0.0, error_rate: float = 0.0,
+                 response_text: Optional[str] = None, chunk_chars: int = 8, seed: int = 0,
+                 statuses: Sequence[int] = (), retry_after: Optional[str] = "0",
+                 stream_events: Optional[List[str]] = None):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.response_text = response_text if response_text is not None else make_analysis_text(seed=seed)
+        self.chunk_chars = chunk_chars
+        self.seed = seed
+        self.statuses = list(statuses)
+        self.retry_after = retry_after
+        self.stream_events = stream_events
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1/chat/completions"
+
+    def _status(self) -> int:
+        with self._lock:
+            self.requests += 1
+            number = self.requests
+        if number <= len(self.statuses):
+            status = self.statuses[number - 1]
+        elif self.error_rate > 0 and random.Random(self.seed * 1000003 + number).random() < self.error_rate:
+            status = 503
+        else:
+            status = 200
+        if status != 200:
+            with self._lock:
+                self.errors += 1
+        return status
+
+    def _chunks(self) -> List[str]:
+        text = self.response_text
+        return [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+
+    def start(self) -> "FakeLLMServer":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status = fake._status()
+                time.sleep(fake.latency)
+                if status != 200:
+                    self.send_response(status)
+                    if fake.retry_after is not None:
+                        self.send_header("Retry-After", fake.retry_after)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if body.get("stream"):
+                    self._stream()
+                else:
+                    self._complete()
+
+            def _complete(self):
+                if fake.tokens_per_second:
+                    time.sleep(len(fake.response_text) / fake.tokens_per_second)
+                payload = json.dumps({
+                    "choices": [{"message": {"role": "assistant", "content": fake.response_text}}],
+                    "usage": {"completion_tokens": len(fake.response_text)},
+                }, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                if fake.stream_events is not None:
+                    events = [(event, 0) for event in fake.stream_events]
+                else:
+                    events = [(json.dumps({"choices": [{"delta": {"content": chunk}}]}, ensure_ascii=False), len(chunk))
+                              for chunk in fake._chunks()]
+                for event, chars in events:
+                    if fake.tokens_per_second:
+                        time.sleep(chars / fake.tokens_per_second)
+                    self.wfile.write(f"data: {event}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        # 缩短轮询间隔，stop() 不必等待默认的 0.5 秒
+        threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05},
+                         name="fake-llm", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,288 @@
+"""基准测试入口
+
+每个用例先预热再重复计时，输出最小值、中位数、平均值、p95 和标准差（毫秒）。
+--compare 与之前保存的结果对比中位数，超出阈值的用例视为性能回退，进程以 1 退出。
+"""
+import argparse
+import functools
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from analysis_engine import FILE_TEXT_LIMIT, MODE_PARALLEL, MODE_STREAM, MODE_WHOLE, AnalysisEngine
+from benchmarks.corpus import SIZES, make_docx, make_paragraphs, make_pdf, make_projects, make_txt
+from benchmarks.fake_llm import FakeLLMServer, make_analysis_text
+from document_ingestion import extract_docx, extract_txt
+from financial_projection import FinancialProjector
+from llm_client import DEFAULT_MODEL
+from pdf_extractor import extract_pdf_text
+from response_cache import ResponseCache
+from section_parser import SectionSplitter
+from similarity_index import SimilarityIndex
+
+SCHEMA_VERSION = 1
+# 相似项目检索用例的索引规模
+SIMILARITY_SIZES = {"small": 1000, "medium": 10000, "large": 100000}
+# 与基线相比中位数变慢超过该比例时视为回退
+DEFAULT_THRESHOLD = 0.25
+
+
+@dataclass
+class Case:
+    name: str
+    func: Callable[[], Any]
+    params: Dict[str, Any] = field(default_factory=dict)
+    # 单次耗时较长的用例可指定更少的重复次数
+    repeat: Optional[int] = None
+    # 准备数据耗时较长时放在 setup 中，只在该用例实际运行时执行一次且不计时
+    setup: Optional[Callable[[], Any]] = None
+
+
+class StaticClient:
+    """立即返回固定文本的客户端，用于排除网络耗时、只测本地处理"""
+
+    model = DEFAULT_MODEL
+    temperature = 0.7
+    rate_limiter = None
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def complete(self, messages, **params) -> str:
+        return self.text
+
+    def stream(self, messages, **params) -> Iterator[str]:
+        for i in range(0, len(self.text), 8):
+            yield self.text[i:i + 8]
+
+
+def _project(name: str) -> Dict[str, Any]:
+    return {
+        "项目名称": name,
+        "项目阶段": "市场验证",
+        "融资情况": "天使轮",
+        "行业领域": "企业服务",
+        "目标客户": "中小型连锁门店",
+        "核心产品描述": "SaaS 化的库存管理系统",
+        "当前挑战": "获客成本高，续费率有待验证",
+    }
+
+
+def _feed(text: str, chunk: int) -> Dict[str, str]:
+    splitter = SectionSplitter()
+    for i in range(0, len(text), chunk):
+        splitter.feed(text[i:i + chunk])
+    return splitter.close()
+
+
+def local_cases(sizes: List[str]) -> Iterator[Case]:
+    """不依赖网络的用例：文件解析、维度切分、Word 生成、文档评分、财务预测、相似项目检索
+
+    语料和推演结果都用 functools.cache 包装，在用例的 setup 中才生成，-k 过滤掉的用例不会准备数据；
+    语料的字节数在 setup 时补充到 params 中。
+    """
+    for size in sizes:
+        data = functools.cache(lambda pages=SIZES[size]: make_pdf(pages))
+        params = {"pages": SIZES[size]}
+        yield Case(f"pdf.extract[{size}]", lambda data=data: extract_pdf_text(io.BytesIO(data()), max_chars=FILE_TEXT_LIMIT),
+                   params, repeat=3 if size == "large" else None,
+                   setup=lambda data=data, params=params: params.update(bytes=len(data())))
+    for size in sizes:
+        data = functools.cache(lambda paragraphs=SIZES[size]: make_docx(paragraphs))
+        params = {"paragraphs": SIZES[size]}
+        yield Case(f"ingest.docx[{size}]", lambda data=data: extract_docx(data(), FILE_TEXT_LIMIT), params,
+                   setup=lambda data=data, params=params: params.update(bytes=len(data())))
+    for size in sizes:
+        data = functools.cache(lambda paragraphs=SIZES[size] * 10: make_txt(paragraphs))
+        params = {"paragraphs": SIZES[size] * 10}
+        yield Case(f"ingest.txt[{size}]", lambda data=data: extract_txt(data(), FILE_TEXT_LIMIT), params,
+                   setup=lambda data=data, params=params: params.update(bytes=len(data())))
+
+    text = make_analysis_text(paragraphs=20)
+    for chunk in (1, 8, 64):
+        yield Case(f"sections.stream[chunk={chunk}]", lambda chunk=chunk: _feed(text, chunk),
+                   {"chars": len(text), "chunk": chunk})
+    engine = AnalysisEngine(StaticClient(text))
+    yield Case("sections.analyze_whole", lambda: engine.analyze(_project("基准项目")), {"chars": len(text)})
+
+    from document_processor import DocumentProcessor
+    processor = functools.cache(DocumentProcessor)
+    for paragraphs in (3, 30):
+        data = functools.cache(lambda paragraphs=paragraphs: processor().build_consultation_data(
+            _project("基准项目"),
+            AnalysisEngine(StaticClient(make_analysis_text(paragraphs=paragraphs))).analyze(_project("基准项目"))
+        ))
+        yield Case(f"docx.generate[paragraphs={paragraphs}]", lambda data=data: processor().render_solution_document(data()),
+                   {"paragraphs": paragraphs}, setup=data)
+
+    documents = functools.cache(lambda: {f"doc{i}.txt": "\n".join(make_paragraphs(40, seed=i)) for i in range(50)})
+    yield Case("scoring.documents[50]", lambda: processor().score_documents(documents(), "商业计划"), {"documents": 50},
+               setup=documents)
+
+    projector = FinancialProjector(seed=0)
+    for scenarios in (1000, 10000):
+        yield Case(f"projection.monte_carlo[{scenarios}]", lambda scenarios=scenarios: projector.project(scenarios),
+                   {"scenarios": scenarios, "months": projector.months})
+    projection = functools.cache(lambda: projector.project(10000))
+    yield Case("projection.report[10000]", lambda: (projection().monthly(), projection().sensitivity()),
+               {"scenarios": 10000}, setup=projection)
+
+    records = functools.cache(lambda: list(make_projects(1000)))
+    yield Case("similarity.add[1000]", lambda: SimilarityIndex().add_many(records()), {"projects": 1000}, repeat=3,
+               setup=records)
+    query = next(make_projects(1))[1]
+    for size in sizes:
+        count = SIMILARITY_SIZES[size]
+        index = SimilarityIndex()
+        yield Case(f"similarity.search[{count}]", lambda index=index: index.search(query, 5), {"projects": count},
+                   setup=lambda index=index, count=count: index.add_many(make_projects(count, seed=1)))
+
+
+def end_to_end_cases(server: FakeLLMServer, concurrency: int) -> Iterator[Case]:
+    """经由模拟接口的完整分析流程；每次使用新的结果缓存，保证不命中缓存"""
+    engine = AnalysisEngine.from_settings("benchmark", server.url, pool_size=max(10, concurrency * 5))
+    engine.client.backoff_base = 0.01
+    counter = iter(range(10 ** 9))
+
+    def run(mode: str):
+        engine.cache = ResponseCache()
+        result, _ = engine.run_analysis(_project(f"项目{next(counter)}"), mode)
+        return result
+
+    def run_batch():
+        engine.cache = ResponseCache()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(
+                lambda i: engine.run_analysis(_project(f"批量项目{next(counter)}"), MODE_WHOLE),
+                range(concurrency * 2)
+            ))
+
+    params = {"latency": server.latency, "tokens_per_second": server.tokens_per_second, "error_rate": server.error_rate}
+    for mode, label in ((MODE_WHOLE, "whole"), (MODE_STREAM, "stream"), (MODE_PARALLEL, "parallel")):
+        yield Case(f"e2e.{label}", lambda mode=mode: run(mode), params, repeat=5)
+    yield Case(f"e2e.batch[{concurrency * 2}x{concurrency}]", run_batch, params, repeat=3)
+
+
+def measure(case: Case, repeat: int, warmup: int) -> Dict[str, Any]:
+    if case.setup is not None:
+        case.setup()
+    for _ in range(warmup):
+        case.func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        case.func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "name": case.name,
+        "params": case.params,
+        "repeat": len(samples),
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "stdev_ms": round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "schema": SCHEMA_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, threshold: float) -> List[str]:
+    """对比中位数，返回回退的用例说明"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {result["name"]: result for result in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        base = baseline.get(result["name"])
+        if base is None or not base["median_ms"]:
+            continue
+        ratio = result["median_ms"] / base["median_ms"] - 1
+        line = f"{result['name']}: {base['median_ms']:.2f} -> {result['median_ms']:.2f} ms ({ratio:+.1%})"
+        print(line, file=sys.stderr)
+        if ratio > threshold:
+            regressions.append(line)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks.run", description="创业指导系统性能基准")
+    parser.add_argument("-o", "--output", help="结果 JSON 文件，默认输出到标准输出")
+    parser.add_argument("-k", "--filter", help="只运行名称包含该字符串的用例")
+    parser.add_argument("--repeat", type=int, default=10, help="每个用例的计时次数")
+    parser.add_argument("--warmup", type=int, default=1, help="计时前的预热次数")
+    parser.add_argument("--quick", action="store_true", help="跳过大规模语料，每个用例只计时 3 次")
+    parser.add_argument("--no-e2e", action="store_true", help="跳过经由模拟接口的端到端用例")
+    parser.add_argument("--latency", type=float, default=0.05, help="模拟接口首字节延迟（秒）")
+    parser.add_argument("--tps", type=float, default=5000, help="模拟接口生成速度（token/秒），0 为不限速")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="模拟接口返回 503 的比例")
+    parser.add_argument("--concurrency", type=int, default=4, help="端到端批量用例的并发数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", help="与之前保存的结果对比")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="中位数变慢超过该比例视为回退")
+    args = parser.parse_args(argv)
+
+    repeat = 3 if args.quick else args.repeat
+    sizes = ["small", "medium"] if args.quick else list(SIZES)
+    results = []
+    server = None
+    server_stats = None
+    try:
+        cases = list(local_cases(sizes))
+        if not args.no_e2e:
+            server = FakeLLMServer(args.latency, args.tps, args.error_rate, seed=args.seed).start()
+            cases.extend(end_to_end_cases(server, args.concurrency))
+        for case in cases:
+            if args.filter and args.filter not in case.name:
+                continue
+            result = measure(case, repeat if case.repeat is None else min(case.repeat, repeat), args.warmup)
+            results.append(result)
+            print(f"{result['name']:<36} median {result['median_ms']:>10.2f} ms  p95 {result['p95_ms']:>10.2f} ms",
+                  file=sys.stderr)
+        if server is not None:
+            server_stats = {"requests": server.requests, "errors": server.errors}
+    finally:
+        if server is not None:
+            server.stop()
+
+    report = json.dumps(
+        {"environment": environment(), "fake_llm": server_stats, "results": results}, ensure_ascii=False, indent=2
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print("性能回退：\n" + "\n".join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
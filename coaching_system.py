@@ -1,5 +1,229 @@
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+# 内存中最多保留的会话数，以及会话闲置多久后移出内存（秒）
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_IDLE_TIMEOUT = 30 * 60
+DEFAULT_MAX_DISK_SESSIONS = 100000
+
+T = TypeVar("T")
+
+# 洞察中可识别的话题及其关键词
+TOPIC_KEYWORDS = {
+    "客户": ("客户", "用户", "痛点", "需求"),
+    "收入": ("定价", "收入", "付费", "利润", "毛利"),
+    "获客": ("渠道", "获客", "推广", "流量", "转化"),
+    "竞争": ("竞争", "对手", "替代", "壁垒"),
+    "团队": ("团队", "人才", "招聘", "合伙人"),
+    "资金": ("融资", "资金", "现金流", "投资"),
+    "产品": ("产品", "技术", "研发", "功能"),
+}
+
+# 识别到话题后追加的追问
+FOLLOW_UP_QUESTIONS = {
+    "客户": ["哪一类客户最迫切需要这个产品？", "最近一次与目标客户深入交流时，您听到了什么意外的反馈？"],
+    "收入": ["客户愿意为此支付的价格区间是多少？依据是什么？", "单个客户的获客成本能在多长时间内收回？"],
+    "获客": ["目前效果最好的获客渠道是哪一个？转化率是多少？", "如果预算翻倍，您会优先投入哪个渠道？"],
+    "竞争": ["客户不选择您时，通常选择了什么替代方案？", "竞争对手最难模仿的是您的哪一点？"],
+    "团队": ["团队目前最缺的关键能力是什么？", "核心成员的分工和决策机制是否清晰？"],
+    "资金": ["现有资金能支撑多少个月？", "下一轮融资前需要达成哪些关键里程碑？"],
+    "产品": ["最小可行产品中哪些功能可以砍掉？", "产品的哪个指标最能说明用户真正获得了价值？"],
+}
+
+# 识别到话题后生成的行动建议
+TOPIC_ACTIONS = {
+    "客户": "两周内访谈至少 10 位目标客户，记录痛点出现的频率和现有替代方案",
+    "收入": "设计两档以上的定价方案，用预售或意向金验证付费意愿",
+    "获客": "为每个获客渠道建立转化漏斗，按获客成本排序后集中投入前两个渠道",
+    "竞争": "整理主要竞争对手的功能、价格和客户评价对比表，明确差异化定位",
+    "团队": "列出未来 6 个月的关键岗位，明确核心成员的分工与激励方案",
+    "资金": "编制 18 个月现金流预测，确定融资节点和最低资金需求",
+    "产品": "按用户价值和开发成本给功能排序，确定下一版本的最小范围",
+}
+
+
+class CoachingSession:
+    """一次指导会话
+
+    各列表字段以元组保存（空元组全局共享），问题文本都经过 sys.intern，所有会话共享同一字符串对象；
+    asked 为已提出的问题数。
+    """
+
+    __slots__ = FIELDS = ("id", "focus_area", "questions", "asked", "insights", "actions", "created_at", "last_active")
+
+    def __init__(self, id: str, focus_area: str, questions: Tuple[str, ...], asked: int = 0,
+                 insights: Tuple[str, ...] = (), actions: Tuple[str, ...] = (),
+                 created_at: Optional[float] = None, last_active: Optional[float] = None):
+        now = time.time()
+        self.id = id
+        self.focus_area = focus_area
+        self.questions = questions
+        self.asked = asked
+        self.insights = insights
+        self.actions = actions
+        self.created_at = now if created_at is None else created_at
+        self.last_active = now if last_active is None else last_active
+
+    def __repr__(self) -> str:
+        return f"CoachingSession(id={self.id!r}, focus_area={self.focus_area!r}, asked={self.asked})"
+
+    def to_record(self) -> Dict[str, Any]:
+        """落盘用的字典形式，可直接传回构造函数"""
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """展示用的字典形式"""
+        return {
+            "会话ID": self.id,
+            "主题": self.focus_area,
+            "问题列表": list(self.questions),
+            "关键洞察": list(self.insights),
+            "行动建议": list(self.actions),
+        }
+
+
+class SessionStore:
+    """按 id 存取指导会话
+
+    内存中按最近访问顺序只保留 max_sessions 个会话，闲置超过 idle_timeout 秒的会话也会移出内存。
+    配置 path 时移出的会话写入 SQLite，再次访问时自动载回；未配置时直接丢弃。
+    """
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT,
+                 path: Optional[str] = None, max_disk_sessions: int = DEFAULT_MAX_DISK_SESSIONS):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_disk_sessions = max_disk_sessions
+        self.stats = {"spilled": 0, "loaded": 0, "dropped": 0}
+        self._memory: "OrderedDict[str, CoachingSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS coaching_sessions ("
+                "id TEXT PRIMARY KEY, data TEXT NOT NULL, last_active REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_coaching_sessions_active ON coaching_sessions (last_active)"
+            )
+            self._db.commit()
+
+    def get(self, session_id: str) -> Optional[CoachingSession]:
+        """取出会话并刷新其活跃时间；不存在时返回 None"""
+        with self._lock:
+            return self._get(session_id)
+
+    def update(self, session_id: str, func: Callable[[CoachingSession], T]) -> Optional[T]:
+        """在锁内取出会话并调用 func 修改，返回 func 的结果；会话不存在时返回 None
+
+        修改期间会话不会被其他线程移出内存或写入磁盘，落盘内容总是修改完成后的状态。
+        """
+        with self._lock:
+            session = self._get(session_id)
+            return None if session is None else func(session)
+
+    def _get(self, session_id: str) -> Optional[CoachingSession]:
+        now = time.time()
+        session = self._memory.get(session_id)
+        if session is not None:
+            self._memory.move_to_end(session_id)
+        elif self._db is not None:
+            row = self._db.execute("SELECT data FROM coaching_sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is not None:
+                data = json.loads(row[0])
+                session = CoachingSession(**dict(
+                    data, questions=tuple(map(sys.intern, data["questions"])),
+                    insights=tuple(data["insights"]), actions=tuple(data["actions"])
+                ))
+                self._db.execute("DELETE FROM coaching_sessions WHERE id = ?", (session_id,))
+                self._db.commit()
+                self._memory[session_id] = session
+                self.stats["loaded"] += 1
+        if session is not None:
+            session.last_active = now
+        self._evict(now)
+        return session
+
+    def put(self, session: CoachingSession):
+        now = time.time()
+        with self._lock:
+            session.last_active = now
+            self._memory[session.id] = session
+            self._memory.move_to_end(session.id)
+            self._evict(now)
+
+    def remove(self, session_id: str):
+        with self._lock:
+            self._memory.pop(session_id, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM coaching_sessions WHERE id = ?", (session_id,))
+                self._db.commit()
+
+    def evict_idle(self) -> int:
+        """把闲置超时的会话移出内存，返回移出的数量；长驻进程可定期调用"""
+        with self._lock:
+            count = len(self._memory)
+            self._evict(time.time())
+            return count - len(self._memory)
+
+    def flush(self):
+        """把内存中的会话全部写入磁盘（配置了 path 时），用于进程退出前保存"""
+        with self._lock:
+            if self._db is not None:
+                self._spill(list(self._memory.values()))
+                self._memory.clear()
+
+    def close(self):
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def _evict(self, now: float):
+        """内存按最近访问排序，只需从最久未访问的一端检查容量和闲置时间"""
+        evicted = []
+        while self._memory:
+            session = next(iter(self._memory.values()))
+            idle = self.idle_timeout is not None and now - session.last_active > self.idle_timeout
+            if len(self._memory) <= self.max_sessions and not idle:
+                break
+            self._memory.popitem(last=False)
+            evicted.append(session)
+        if not evicted:
+            return
+        if self._db is None:
+            self.stats["dropped"] += len(evicted)
+            return
+        self._spill(evicted)
+
+    def _spill(self, sessions: List[CoachingSession]):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO coaching_sessions (id, data, last_active) VALUES (?, ?, ?)",
+            [(session.id, json.dumps(session.to_record(), ensure_ascii=False), session.last_active)
+             for session in sessions]
+        )
+        self._db.execute(
+            "DELETE FROM coaching_sessions WHERE id IN ("
+            "SELECT id FROM coaching_sessions ORDER BY last_active DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_sessions,)
+        )
+        self._db.commit()
+        self.stats["spilled"] += len(sessions)
+
+
 class StartupCoach:
-    def __init__(self):
+    def __init__(self, store: Optional[SessionStore] = None):
         self.question_bank = {
             "需求探索": [
                 "您的创业愿景是什么？",
@@ -10,42 +234,120 @@ class StartupCoach:
                 "这个解决方案是否足够差异化？",
                 "实施过程中可能遇到哪些挑战？",
                 "如何确保方案的可执行性？"
+            ],
+            "商业模式": [
+                "谁为产品付费？付费的理由是什么？",
+                "收入主要来自一次性销售还是持续订阅？",
+                "规模扩大后，单位成本会如何变化？"
+            ],
+            "增长策略": [
+                "最早的 100 个客户从哪里来？",
+                "现有客户是否愿意主动推荐？",
+                "增长的主要瓶颈在获客、转化还是留存？"
             ]
         }
-        self.coaching_sessions = []
-        
+        self.sessions = store if store is not None else SessionStore()
+        self._build_indexes()
+
+    def _build_indexes(self):
+        """预先生成问题查找表；修改 question_bank 后需重新调用"""
+        # 问题文本统一 intern，会话中只保存对同一字符串对象的引用
+        self._area_questions: Dict[str, Tuple[str, ...]] = {
+            area: tuple(map(sys.intern, questions)) for area, questions in self.question_bank.items()
+        }
+        self._follow_ups: Dict[str, Tuple[str, ...]] = {
+            topic: tuple(map(sys.intern, questions)) for topic, questions in FOLLOW_UP_QUESTIONS.items()
+        }
+        self._keyword_topic = {keyword: topic for topic, keywords in TOPIC_KEYWORDS.items() for keyword in keywords}
+        self._keyword_pattern = re.compile(
+            "|".join(sorted(map(re.escape, self._keyword_topic), key=len, reverse=True))
+        )
+
     def ask_probing_questions(self, area):
         """提出启发式问题"""
-        return self.question_bank.get(area, [])
-        
+        return list(self._area_questions.get(area, ()))
+
     def analyze_documents(self, documents):
         """分析上传的创业相关文档"""
         # 文档分析逻辑
-        pass 
-        
-    def create_coaching_session(self, focus_area):
+        pass
+
+    def create_coaching_session(self, focus_area: str) -> CoachingSession:
         """创建指导会话"""
-        session = {
-            "主题": focus_area,
-            "问题列表": self.generate_question_sequence(focus_area),
-            "关键洞察": [],
-            "行动建议": []
-        }
-        self.coaching_sessions.append(session)
+        session = CoachingSession(uuid.uuid4().hex, focus_area, tuple(self.generate_question_sequence(focus_area)))
+        self.sessions.put(session)
         return session
-        
-    def generate_question_sequence(self, focus_area):
-        """生成问题序列"""
-        base_questions = self.question_bank.get(focus_area, [])
-        return self._customize_questions(base_questions)
-        
-    def record_insights(self, session_id, insight):
-        """记录关键洞察"""
-        if session_id < len(self.coaching_sessions):
-            self.coaching_sessions[session_id]["关键洞察"].append(insight)
-            
-    def generate_action_items(self, session_id):
+
+    def get_session(self, session_id: str) -> Optional[CoachingSession]:
+        return self.sessions.get(session_id)
+
+    def generate_question_sequence(self, focus_area: str, insights: Sequence[str] = (),
+                                   asked: Iterable[str] = ()) -> List[str]:
+        """生成问题序列：主题不在问题库中时，按主题中提到的话题选取问题"""
+        base_questions = self._area_questions.get(focus_area, ())
+        if not base_questions:
+            insights = [focus_area, *insights]
+        return self._customize_questions(base_questions, insights, asked)
+
+    def _customize_questions(self, base_questions: Sequence[str], insights: Sequence[str] = (),
+                             asked: Iterable[str] = ()) -> List[str]:
+        """按已有洞察调整问题顺序：最新洞察涉及话题的追问排在最前，已提过的问题不再重复"""
+        seen = set(asked)
+        sequence = []
+        for insight in reversed(insights):
+            for topic in self._topics(insight):
+                for question in self._follow_ups[topic]:
+                    if question not in seen:
+                        seen.add(question)
+                        sequence.append(question)
+        for question in base_questions:
+            if question not in seen:
+                seen.add(question)
+                sequence.append(question)
+        return sequence
+
+    def _topics(self, text: str) -> List[str]:
+        """文本中提到的话题，按首次出现的顺序"""
+        return list(dict.fromkeys(self._keyword_topic[keyword] for keyword in self._keyword_pattern.findall(text)))
+
+    def next_question(self, session_id: str) -> Optional[str]:
+        """取出会话中下一个待提出的问题，问题已全部提出时返回 None"""
+        def advance(session: CoachingSession) -> Optional[str]:
+            if session.asked >= len(session.questions):
+                return None
+            session.asked += 1
+            return session.questions[session.asked - 1]
+
+        return self.sessions.update(session_id, advance)
+
+    def record_insights(self, session_id: str, insight: str):
+        """记录关键洞察，并据此调整尚未提出的问题"""
+        def record(session: CoachingSession):
+            session.insights += (insight,)
+            asked = session.questions[:session.asked]
+            session.questions = asked + tuple(
+                self._customize_questions(session.questions[session.asked:], [insight], asked)
+            )
+
+        self.sessions.update(session_id, record)
+
+    def generate_action_items(self, session_id: str) -> Optional[List[str]]:
         """生成行动建议"""
-        if session_id < len(self.coaching_sessions):
-            session = self.coaching_sessions[session_id]
-            return self._create_action_plan(session["关键洞察"]) 
\ No newline at end of file
+        def plan(session: CoachingSession) -> List[str]:
+            actions = self._create_action_plan(session.insights)
+            session.actions = tuple(actions)
+            return actions
+
+        return self.sessions.update(session_id, plan)
+
+    def _create_action_plan(self, insights: Sequence[str]) -> List[str]:
+        """按洞察涉及的话题生成行动建议，未识别出话题的洞察各自生成一条待验证事项"""
+        actions = []
+        for insight in insights:
+            topics = self._topics(insight)
+            if not topics:
+                actions.append(f"围绕“{insight}”提出一个两周内可验证的假设，并确定衡量指标")
+            for topic in topics:
+                if TOPIC_ACTIONS[topic] not in actions:
+                    actions.append(TOPIC_ACTIONS[topic])
+        return actions
@@ -0,0 +1,142 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from pdf_extractor import extract_pdf_text
+from tracing import tracer
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+@dataclass
+class ExtractedDocument:
+    """一次文件解析的结果"""
+    name: str
+    label: str
+    text: str
+    content_hash: str
+    elapsed: float
+    cached: bool = False
+
+
+@dataclass
+class Extractor:
+    """单一格式的文本提取器"""
+    label: str
+    extract: Callable[[bytes, Optional[int]], str]
+
+
+def extract_pdf(data: bytes, max_chars: Optional[int] = None) -> str:
+    return extract_pdf_text(io.BytesIO(data), max_chars=max_chars)
+
+
+def extract_docx(data: bytes, max_chars: Optional[int] = None) -> str:
+    """按文档顺序提取段落和表格，表格每行以 | 分隔各单元格"""
+    # python-docx 只在真正解析 Word 文档时才导入，缩短应用冷启动时间
+    from docx import Document
+    from docx.oxml.ns import qn
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+
+    doc = Document(io.BytesIO(data))
+    parts = []
+    total = 0
+    for child in doc.element.body.iterchildren():
+        if child.tag == qn("w:p"):
+            line = Paragraph(child, doc).text
+        elif child.tag == qn("w:tbl"):
+            rows = []
+            for row in Table(child, doc).rows:
+                cells = []
+                previous = None
+                for cell in row.cells:
+                    # 横向合并的单元格会在每个被合并的位置以同一个元素重复出现；
+                    # 按元素而不是文本去重，相邻的相同取值（如两列都是 0）仍保留
+                    if cell._tc is not previous:
+                        cells.append(cell.text)
+                    previous = cell._tc
+                rows.append(" | ".join(cells))
+            line = "\n".join(rows)
+        else:
+            continue
+        parts.append(line)
+        total += len(line) + 1
+        if max_chars is not None and total >= max_chars:
+            break
+    text = "\n".join(parts)
+    return text[:max_chars] if max_chars is not None else text
+
+
+def extract_txt(data: bytes, max_chars: Optional[int] = None) -> str:
+    """解码纯文本，UTF-8 失败时按 GB18030 解码（兼容 Windows 下保存的中文文件）"""
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = data.decode("gb18030", errors="replace")
+    return text[:max_chars] if max_chars is not None else text
+
+
+class DocumentIngestor:
+    """文档解析入口：按格式分派提取器，并按文件内容哈希缓存解析结果"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.extractors: Dict[str, Extractor] = {}
+        self.mime_types: Dict[str, str] = {}
+        self._cache: "OrderedDict[tuple, ExtractedDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.register("pdf", Extractor("PDF文件", extract_pdf), ["application/pdf"])
+        self.register("docx", Extractor("Word文档", extract_docx), [DOCX_MIME])
+        self.register("txt", Extractor("文本文件", extract_txt), ["text/plain"])
+
+    def register(self, extension: str, extractor: Extractor, mime_types=()):
+        """注册（或替换）某一格式的提取器"""
+        self.extractors[extension] = extractor
+        for mime_type in mime_types:
+            self.mime_types[mime_type] = extension
+
+    def resolve(self, name: str, mime_type: Optional[str] = None) -> str:
+        """根据 MIME 类型或文件扩展名确定格式"""
+        if mime_type in self.mime_types:
+            return self.mime_types[mime_type]
+        extension = os.path.splitext(name)[1].lower().lstrip(".")
+        if extension in self.extractors:
+            return extension
+        raise ValueError(f"不支持的文件格式：{name}")
+
+    def ingest(self, name: str, data: bytes, mime_type: Optional[str] = None,
+               max_chars: Optional[int] = None) -> ExtractedDocument:
+        """解析文件内容；相同内容的文件在进程内只解析一次"""
+        file_format = self.resolve(name, mime_type)
+        content_hash = hashlib.sha256(data).hexdigest()
+        key = (content_hash, file_format, max_chars)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                tracer.count("document_cache_hits_total", format=file_format)
+                return ExtractedDocument(name, cached.label, cached.text, content_hash, cached.elapsed, cached=True)
+
+        extractor = self.extractors[file_format]
+        started = time.monotonic()
+        with tracer.span("document.extract", format=file_format, bytes=len(data)) as span:
+            text = extractor.extract(data, max_chars)
+            span.attrs["chars"] = len(text)
+        document = ExtractedDocument(name, extractor.label, text, content_hash, time.monotonic() - started)
+
+        with self._lock:
+            self._cache[key] = document
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return document
+
+
+# 进程级共享的解析器：Streamlit 每次重跑脚本时模块不会重新导入，缓存得以保留
+default_ingestor = DocumentIngestor()
@@ -1,11 +1,29 @@
 from docx import Document
+from docx.table import _Cell
 from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 import pandas as pd
 import numpy as np
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from document_ingestion import default_ingestor
+from document_scoring import KeywordScoringEngine, SECTION_KEYWORDS
+from tracing import tracer
+
+# 文档头部基本信息表的字段
+HEADER_FIELDS = ("项目名称", "咨询日期", "版本号", "文档状态")
+# 文档中用到的样式
+TEMPLATE_STYLES = ("Heading 1", "Heading 2", "Table Grid")
+# 批量生成时达到该数量才启用进程池
+BULK_RENDER_THRESHOLD = 20
 
 class DocumentProcessor:
+    # 预先生成的文档模板（含标题和基本信息表）及其样式 id，进程内共享
+    _template_bytes = None
+    _style_ids = {}
+    
     def __init__(self):
         self.feedback_templates = {
             "商业计划": self._analyze_business_plan,
@@ -13,9 +31,14 @@ class DocumentProcessor:
             "财务预测": self._analyze_financial_forecast,
             "团队介绍": self._analyze_team_profile
         }
+        self.scoring_engine = KeywordScoringEngine()
         
     def analyze_uploaded_documents(self, documents):
         """分析上传的文档并生成反馈"""
+        # 同一批文档先一次性统计词频，后续各项评估直接复用
+        self.scoring_engine.term_frequency(
+            [content for doc_type, content in documents.items() if doc_type in self.feedback_templates]
+        )
         analysis_results = {}
         for doc_type, content in documents.items():
             if doc_type in self.feedback_templates:
@@ -23,10 +46,66 @@ class DocumentProcessor:
                 
         return self._generate_comprehensive_feedback(analysis_results)
     
+    @tracer.traced("documents.score")
+    def score_documents(self, documents, doc_type=None):
+        """批量评分：documents 为 {文档名: 文本}，未指定类型时按内容自动识别"""
+        names = list(documents)
+        contents = [documents[name] for name in names]
+        doc_types = [doc_type] * len(names) if doc_type else self.scoring_engine.classify(contents)
+        
+        rows = [None] * len(names)
+        # 同类文档合并为一个矩阵批量计算
+        for current_type in set(doc_types):
+            indices = [i for i, t in enumerate(doc_types) if t == current_type]
+            scores = self.scoring_engine.score([contents[i] for i in indices], current_type)
+            for j, i in enumerate(indices):
+                rows[i] = {
+                    "文档": names[i],
+                    "文档类型": current_type,
+                    "完整性评分": int(round(scores["完整性"][j])),
+                    "可行性评分": int(round(scores["可行性"][j])),
+                    "创新性评分": int(round(scores["创新性"][j])),
+                    "风险提示": int(round(scores["风险"][j])),
+                    "缺失章节": "、".join(self.scoring_engine.missing_sections(scores["coverage"][j], current_type))
+                }
+        return pd.DataFrame(rows, columns=["文档", "文档类型", "完整性评分", "可行性评分", "创新性评分", "风险提示", "缺失章节"])
+    
+    @tracer.traced("documents.analyze_folder")
+    def analyze_folder(self, folder, doc_type=None, max_chars=50000):
+        """对文件夹中所有支持格式的文档批量评分，按完整性评分降序返回
+
+        单个文件读取或解析失败不影响其余文件：该文件的评分留空，原因写入“错误”列，排在最后
+        """
+        documents = {}
+        errors = {}
+        for name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, name)
+            if not os.path.isfile(path):
+                continue
+            try:
+                default_ingestor.resolve(name)
+            except ValueError:
+                continue
+            try:
+                with open(path, "rb") as f:
+                    documents[name] = default_ingestor.ingest(name, f.read(), max_chars=max_chars).text
+            except Exception as e:
+                errors[name] = f"{type(e).__name__}: {e}"
+                tracer.count("document_ingest_errors_total")
+        
+        result = self.score_documents(documents, doc_type)
+        result["错误"] = ""
+        if errors:
+            failed = pd.DataFrame({"文档": list(errors), "文档类型": "", "缺失章节": "", "错误": list(errors.values())})
+            result = pd.concat([result, failed], ignore_index=True)
+            for column in ("完整性评分", "可行性评分", "创新性评分", "风险提示"):
+                result[column] = result[column].astype("Int64")
+        return result.sort_values("完整性评分", ascending=False, kind="stable", na_position="last", ignore_index=True)
+    
     def generate_solution_document(self, consultation_data):
         """生成解决方案文档"""
-        doc = Document()
-        self._add_document_header(doc)
+        doc = self._load_template()
+        self._fill_document_header(doc, consultation_data)
         self._add_executive_summary(doc, consultation_data)
         self._add_problem_analysis(doc, consultation_data)
         self._add_solution_details(doc, consultation_data)
@@ -35,6 +114,50 @@ class DocumentProcessor:
         
         return doc
         
+    def render_solution_document(self, consultation_data):
+        """生成解决方案文档并直接输出为 .docx 字节，不落地临时文件"""
+        with tracer.span("docx.render") as span:
+            buffer = io.BytesIO()
+            self.generate_solution_document(consultation_data).save(buffer)
+            span.attrs["bytes"] = buffer.tell()
+        return buffer.getvalue()
+        
+    def render_solution_documents(self, consultations, max_workers=None):
+        """批量生成解决方案文档，数量较多时分发到进程池并行渲染"""
+        with tracer.span("docx.render_bulk", documents=len(consultations)):
+            if len(consultations) < BULK_RENDER_THRESHOLD:
+                return [self.render_solution_document(data) for data in consultations]
+            # 与 ProcessPoolExecutor 的默认值一致：不指定时按 CPU 核数，Windows 上最多 61 个进程
+            workers = max_workers or os.cpu_count() or 1
+            if os.name == "nt":
+                workers = min(workers, 61)
+            chunksize = max(1, len(consultations) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(_render_solution_document, consultations, chunksize=chunksize))
+        
+    @staticmethod
+    def build_consultation_data(project_info, analysis_result):
+        """把项目信息和五维分析结果整理为解决方案文档所需的数据"""
+        background = "；".join(
+            f"{key}：{project_info[key]}"
+            for key in ("项目阶段", "融资情况", "行业领域", "目标客户", "核心产品描述")
+            if project_info.get(key)
+        )
+        solution = analysis_result.get("解决方案", "")
+        return {
+            "project_name": project_info.get("项目名称", ""),
+            "background": background,
+            "core_issues": project_info.get("当前挑战", ""),
+            "solution_summary": solution.split("\n\n")[0] if solution else "",
+            "problem_analysis": analysis_result.get("需求分析", ""),
+            "solution_sections": {
+                title: analysis_result[title]
+                for title in ("解决方案", "商业模式", "增长策略", "竞争分析")
+                if analysis_result.get(title)
+            },
+            "appendix": {"上传文件": project_info["上传文件"]} if project_info.get("上传文件") else {}
+        }
+        
     def _analyze_business_plan(self, content):
         """分析商业计划书"""
         return {
@@ -53,6 +176,79 @@ class DocumentProcessor:
             "风险点": self._identify_risks(content)
         }
         
+    def _analyze_financial_forecast(self, content):
+        """分析财务预测"""
+        scores = self._score(content, "财务预测")
+        financial_words = [word for words in SECTION_KEYWORDS["财务预测"].values() for word in words]
+        return {
+            "完整性评分": int(round(scores["完整性"][0])),
+            "缺失项": self.scoring_engine.missing_sections(scores["coverage"][0], "财务预测"),
+            "关键数据": self.scoring_engine.key_sentences(content, financial_words, limit=5, require_digits=True),
+            "改进建议": self._missing_section_suggestions(scores["coverage"][0], "财务预测")
+        }
+        
+    def _analyze_team_profile(self, content):
+        """分析团队介绍"""
+        scores = self._score(content, "团队介绍")
+        return {
+            "完整性评分": int(round(scores["完整性"][0])),
+            "缺失角色": self.scoring_engine.missing_sections(scores["coverage"][0], "团队介绍"),
+            "改进建议": self._missing_section_suggestions(scores["coverage"][0], "团队介绍")
+        }
+        
+    def _score(self, content, doc_type="商业计划"):
+        """对单个文档评分（词频结果有缓存，同一文档的多项评估只扫描一次）"""
+        return self.scoring_engine.score([content], doc_type)
+        
+    def _evaluate_completeness(self, content):
+        """评估商业计划书的章节完整性"""
+        return int(round(self._score(content)["完整性"][0]))
+        
+    def _evaluate_feasibility(self, content):
+        """评估可行性：已验证的进展信号与章节完整性"""
+        return int(round(self._score(content)["可行性"][0]))
+        
+    def _evaluate_innovation(self, content):
+        """评估创新性"""
+        return int(round(self._score(content)["创新性"][0]))
+        
+    def _missing_section_suggestions(self, coverage_row, doc_type):
+        """针对缺失章节生成补充建议"""
+        sections = SECTION_KEYWORDS[doc_type]
+        return [
+            f"补充「{name}」相关内容，如{'、'.join(sections[name][:3])}"
+            for name in self.scoring_engine.missing_sections(coverage_row, doc_type)
+        ]
+        
+    def _generate_improvement_suggestions(self, content):
+        """生成商业计划书改进建议"""
+        scores = self._score(content)
+        suggestions = self._missing_section_suggestions(scores["coverage"][0], "商业计划")
+        if scores["可行性"][0] < 40:
+            suggestions.append("补充已验证的进展数据（如试点、付费用户、订单），提升方案可信度")
+        if scores["创新性"][0] < 40:
+            suggestions.append("突出产品在技术或模式上的创新点，说明与现有方案的差异")
+        return suggestions
+        
+    def _extract_market_insights(self, content):
+        """提取市场洞察：优先包含数据的市场规模、增长相关表述"""
+        return self.scoring_engine.key_sentences(content, self.scoring_engine.signal_keywords["市场"])
+        
+    def _analyze_competition(self, content):
+        """分析竞争情况"""
+        return {
+            "竞争描述充分度": int(round(self._score(content, "市场分析")["竞争"][0])),
+            "关键信息": self.scoring_engine.key_sentences(content, self.scoring_engine.signal_keywords["竞争"])
+        }
+        
+    def _identify_opportunities(self, content):
+        """识别机会点"""
+        return self.scoring_engine.key_sentences(content, self.scoring_engine.signal_keywords["机会"])
+        
+    def _identify_risks(self, content):
+        """识别风险点"""
+        return self.scoring_engine.key_sentences(content, self.scoring_engine.signal_keywords["风险"])
+        
     def _generate_comprehensive_feedback(self, analysis_results):
         """生成综合反馈意见"""
         return {
@@ -62,27 +258,106 @@ class DocumentProcessor:
             "下一步行动": self._suggest_next_steps(analysis_results)
         }
         
-    def _add_document_header(self, doc):
+    def _calculate_overall_score(self, analysis_results):
+        """计算总体评分：各文档所有评分项的平均值"""
+        scores = [
+            value
+            for result in analysis_results.values()
+            for key, value in result.items()
+            if key.endswith("评分") and isinstance(value, (int, float))
+        ]
+        return int(round(np.mean(scores))) if scores else 0
+        
+    def _summarize_key_findings(self, analysis_results):
+        """汇总各文档的关键发现"""
+        findings = []
+        for doc_type, result in analysis_results.items():
+            scores = "，".join(f"{key}{value}分" for key, value in result.items() if key.endswith("评分"))
+            if scores:
+                findings.append(f"{doc_type}：{scores}")
+            for key in ("市场洞察", "机会点", "风险点", "关键数据"):
+                if result.get(key):
+                    findings.append(f"{doc_type}{key}：{result[key][0]}")
+        return findings
+        
+    def _compile_improvement_suggestions(self, analysis_results):
+        """合并各文档的改进建议并去重"""
+        suggestions = []
+        for result in analysis_results.values():
+            for suggestion in result.get("改进建议", []):
+                if suggestion not in suggestions:
+                    suggestions.append(suggestion)
+        return suggestions
+        
+    def _suggest_next_steps(self, analysis_results):
+        """根据缺失文档和总体评分建议下一步行动"""
+        steps = [f"补充{doc_type}文档" for doc_type in self.feedback_templates if doc_type not in analysis_results]
+        if self._calculate_overall_score(analysis_results) < 60:
+            steps.append("优先完善评分较低的文档，再提交 AI 深度分析")
+        else:
+            steps.append("文档基础较完整，可提交 AI 深度分析进一步完善方案")
+        return steps
+        
+    @classmethod
+    def _load_template(cls):
+        """从预先生成的模板创建文档，模板只构建一次，此后仅在内存中解析"""
+        if cls._template_bytes is None:
+            doc = Document()
+            cls._add_document_header(doc)
+            buffer = io.BytesIO()
+            doc.save(buffer)
+            cls._template_bytes = buffer.getvalue()
+            cls._style_ids = {name: doc.styles[name].style_id for name in TEMPLATE_STYLES}
+        return Document(io.BytesIO(cls._template_bytes))
+        
+    def _add_heading(self, doc, text, level):
+        """添加标题：直接写入样式 id，跳过 python-docx 每次按名称遍历样式表的查找"""
+        paragraph = doc.add_paragraph(text)
+        paragraph._p.style = self._style_ids[f"Heading {level}"]
+        return paragraph
+        
+    @staticmethod
+    def _add_document_header(doc):
         """添加文档头部"""
         title = doc.add_heading('创业项目解决方案', 0)
         title.alignment = WD_ALIGN_PARAGRAPH.CENTER
         
-        # 添加基本信息表格
-        table = doc.add_table(rows=4, cols=2)
+        # 添加基本信息表格，取值在生成具体文档时填写
+        table = doc.add_table(rows=len(HEADER_FIELDS), cols=2)
         table.style = 'Table Grid'
-        cells = [
-            ("项目名称", ""),
-            ("咨询日期", datetime.now().strftime("%Y-%m-%d")),
-            ("版本号", "V1.0"),
-            ("文档状态", "终稿")
-        ]
-        for i, (key, value) in enumerate(cells):
-            table.cell(i, 0).text = key
-            table.cell(i, 1).text = value
+        for row, key in zip(table.rows, HEADER_FIELDS):
+            row.cells[0].text = key
+            
+    def _fill_document_header(self, doc, data):
+        """填写文档头部的基本信息"""
+        values = {
+            "项目名称": data.get('project_name', ''),
+            "咨询日期": datetime.now().strftime("%Y-%m-%d"),
+            "版本号": data.get('version', 'V1.0'),
+            "文档状态": data.get('status', '终稿')
+        }
+        table = doc.tables[0]
+        for row, key in zip(table.rows, HEADER_FIELDS):
+            row.cells[1].text = values[key]
+            
+    def _add_table(self, doc, headers, rows):
+        """按行追加表格内容
+
+        逐行直接写入新行的单元格，避免 table.cell()/row.cells 每次重新遍历整张表。
+        """
+        table = doc.add_table(rows=1, cols=len(headers))
+        table._tbl.tblStyle_val = self._style_ids['Table Grid']
+        for tc, header in zip(table.rows[0]._tr.tc_lst, headers):
+            _Cell(tc, table).text = header
+        for values in rows:
+            tr = table.add_row()._tr
+            for tc, value in zip(tr.tc_lst, values):
+                _Cell(tc, table).text = str(value)
+        return table
             
     def _add_executive_summary(self, doc, data):
         """添加执行摘要"""
-        doc.add_heading('执行摘要', level=1)
+        self._add_heading(doc, '执行摘要', 1)
         summary = doc.add_paragraph()
         summary.add_run('项目背景：').bold = True
         summary.add_run(data.get('background', ''))
@@ -95,24 +370,59 @@ class DocumentProcessor:
         summary.add_run('解决方案概述：').bold = True
         summary.add_run(data.get('solution_summary', ''))
         
+    def _add_problem_analysis(self, doc, data):
+        """添加问题分析"""
+        self._add_heading(doc, '问题分析', 1)
+        
+        problems = data.get('problems', [])
+        if problems:
+            self._add_table(doc, ['问题', '成因', '影响'], (
+                (item.get('issue', ''), item.get('cause', ''), item.get('impact', ''))
+                for item in problems
+            ))
+        self._add_paragraphs(doc, data.get('problem_analysis', ''))
+        
+    def _add_solution_details(self, doc, data):
+        """添加解决方案详情"""
+        self._add_heading(doc, '解决方案详情', 1)
+        
+        for title, content in data.get('solution_sections', {}).items():
+            self._add_heading(doc, title, 2)
+            self._add_paragraphs(doc, content)
+        
     def _add_implementation_plan(self, doc, data):
         """添加实施计划"""
-        doc.add_heading('实施计划', level=1)
+        self._add_heading(doc, '实施计划', 1)
         
         # 添加时间线
         timeline = data.get('timeline', [])
-        table = doc.add_table(rows=len(timeline)+1, cols=3)
-        table.style = 'Table Grid'
+        self._add_table(doc, ['时间节点', '关键任务', '预期成果'], (
+            (item.get('time', ''), item.get('task', ''), item.get('expected_outcome', ''))
+            for item in timeline
+        ))
         
-        # 添加表头
-        headers = table.rows[0].cells
-        headers[0].text = '时间节点'
-        headers[1].text = '关键任务'
-        headers[2].text = '预期成果'
-        
-        # 添加内容
-        for i, item in enumerate(timeline, 1):
-            row = table.rows[i].cells
-            row[0].text = item.get('time', '')
-            row[1].text = item.get('task', '')
-            row[2].text = item.get('expected_outcome', '') 
\ No newline at end of file
+    def _add_appendix(self, doc, data):
+        """添加附录"""
+        self._add_heading(doc, '附录', 1)
+        
+        appendix = data.get('appendix', {})
+        if appendix:
+            self._add_table(doc, ['项目', '内容'], appendix.items())
+        doc.add_paragraph(f"本文档由创业指导系统于 {datetime.now().strftime('%Y-%m-%d %H:%M')} 生成。")
+        
+    def _add_paragraphs(self, doc, text):
+        """按空行拆分为多个段落写入"""
+        for paragraph in text.split('\n\n'):
+            if paragraph.strip():
+                doc.add_paragraph(paragraph.strip())
+
+
+def _render_solution_document(consultation_data):
+    """进程池任务：每个子进程复用一个 DocumentProcessor 及其模板"""
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = DocumentProcessor()
+    return _worker_processor.render_solution_document(consultation_data)
+
+
+_worker_processor = None
\ No newline at end of file
@@ -0,0 +1,181 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# 各类文档应包含的章节及其识别关键词
+SECTION_KEYWORDS = {
+    "商业计划": {
+        "项目概述": ["项目简介", "项目概述", "公司简介", "愿景", "使命"],
+        "市场需求": ["市场规模", "目标市场", "目标客户", "用户画像", "痛点", "需求"],
+        "产品方案": ["产品", "解决方案", "核心功能", "技术方案"],
+        "商业模式": ["商业模式", "盈利模式", "收入来源", "定价", "付费"],
+        "竞争分析": ["竞争对手", "竞品", "竞争优势", "差异化"],
+        "营销策略": ["营销", "推广", "渠道", "获客"],
+        "团队介绍": ["团队", "创始人", "核心成员"],
+        "财务规划": ["财务", "融资", "收入预测", "成本", "利润", "现金流"],
+        "风险分析": ["风险", "应对措施"],
+    },
+    "市场分析": {
+        "市场规模": ["市场规模", "市场容量", "亿元", "万亿", "用户规模"],
+        "增长趋势": ["增长率", "复合增长", "CAGR", "趋势", "渗透率"],
+        "目标客户": ["目标客户", "用户画像", "细分市场", "客群"],
+        "客户痛点": ["痛点", "需求", "未被满足"],
+        "竞争格局": ["竞争对手", "竞品", "市场份额", "竞争格局"],
+        "政策环境": ["政策", "监管", "法规"],
+    },
+    "财务预测": {
+        "收入预测": ["收入预测", "营业收入", "营收", "销售额"],
+        "成本结构": ["成本", "费用", "毛利"],
+        "利润预测": ["利润", "净利润", "盈亏平衡"],
+        "现金流": ["现金流", "资金缺口", "烧钱"],
+        "融资计划": ["融资", "估值", "资金用途", "股权"],
+        "关键假设": ["假设", "单价", "转化率", "客单价"],
+    },
+    "团队介绍": {
+        "创始人": ["创始人", "CEO", "联合创始人"],
+        "技术负责人": ["CTO", "技术负责人", "研发"],
+        "市场与销售": ["CMO", "销售", "市场负责人", "商务"],
+        "运营管理": ["COO", "运营"],
+        "行业经验": ["年经验", "曾任", "从业", "背景"],
+        "股权激励": ["股权", "期权", "激励"],
+    },
+}
+
+# 评分信号关键词
+SIGNAL_KEYWORDS = {
+    "可行性": ["已上线", "付费用户", "营收", "试点", "合作协议", "订单", "验证", "复购", "MVP", "里程碑", "落地"],
+    "创新性": ["首创", "专利", "人工智能", "AI", "算法", "独家", "颠覆", "新模式", "技术壁垒", "创新"],
+    "市场": ["市场规模", "增长率", "CAGR", "亿元", "用户规模", "渗透率", "趋势", "需求"],
+    "竞争": ["竞争对手", "竞品", "市场份额", "领先", "替代品", "差异化", "壁垒"],
+    "机会": ["机会", "空白", "红利", "政策支持", "未被满足", "蓝海", "新兴"],
+    "风险": ["风险", "不确定", "监管", "合规", "依赖", "亏损", "波动", "挑战"],
+}
+
+# 信号密度（每千字命中次数）达到该值时评分约为 63 分，用于把密度压缩到 0-100
+SIGNAL_SCALE = 2.0
+
+_SENTENCE = re.compile(r"[^。！？!?\n]+[。！？!?]?")
+_DIGIT = re.compile(r"\d")
+
+
+def _term_regex(term: str) -> str:
+    """ASCII 缩写（AI、CEO 等）按词边界匹配，避免命中 email、director 这类单词内部；中文词仍按子串匹配"""
+    escaped = re.escape(term)
+    if term.isascii():
+        return rf"(?<![a-z0-9]){escaped}(?![a-z0-9])"
+    return escaped
+
+
+def _terms_pattern(terms: Sequence[str]) -> "re.Pattern[str]":
+    return re.compile("|".join(_term_regex(term) for term in terms))
+
+
+class KeywordScoringEngine:
+    """离线关键词评分引擎：一次正则扫描统计词频，评分以矩阵运算批量完成"""
+
+    def __init__(self, section_keywords=SECTION_KEYWORDS, signal_keywords=SIGNAL_KEYWORDS, cache_size: int = 256):
+        self.section_keywords = section_keywords
+        self.signal_keywords = signal_keywords
+        self.signals = list(signal_keywords)
+
+        terms = {term.lower() for sections in section_keywords.values() for words in sections.values() for term in words}
+        terms.update(term.lower() for words in signal_keywords.values() for term in words)
+        # 长词优先，避免“市场规模”被“市场”抢先匹配
+        self.vocabulary = sorted(terms, key=lambda term: (-len(term), term))
+        self.term_index = {term: i for i, term in enumerate(self.vocabulary)}
+        self._pattern = _terms_pattern(self.vocabulary)
+
+        # 词表 × 章节、词表 × 信号的 0/1 关联矩阵
+        self.section_names = {doc_type: list(sections) for doc_type, sections in section_keywords.items()}
+        self.section_matrix = {
+            doc_type: self._membership(list(sections.values()))
+            for doc_type, sections in section_keywords.items()
+        }
+        self.signal_matrix = self._membership([signal_keywords[name] for name in self.signals])
+
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _membership(self, groups: List[List[str]]) -> np.ndarray:
+        matrix = np.zeros((len(self.vocabulary), len(groups)), dtype=np.float32)
+        for column, words in enumerate(groups):
+            for word in words:
+                matrix[self.term_index[word.lower()], column] = 1.0
+        return matrix
+
+    def term_frequency(self, texts: Sequence[str]) -> np.ndarray:
+        """返回 文档 × 词表 的词频矩阵，已计算过的文档直接复用"""
+        matrix = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            with self._lock:
+                cached = self._cache.get(text)
+                if cached is not None:
+                    self._cache.move_to_end(text)
+            if cached is None:
+                indices = [self.term_index[match] for match in self._pattern.findall(text.lower())]
+                cached = np.bincount(indices, minlength=len(self.vocabulary)).astype(np.float32)
+                with self._lock:
+                    self._cache[text] = cached
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            matrix[row] = cached
+        return matrix
+
+    def section_coverage(self, tf: np.ndarray, doc_type: str) -> np.ndarray:
+        """各章节是否出现（文档 × 章节的布尔矩阵）"""
+        return (tf @ self.section_matrix[doc_type]) > 0
+
+    def signal_scores(self, tf: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """各评分信号的 0-100 分（文档 × 信号），按文档长度归一化"""
+        density = (tf @ self.signal_matrix) / np.maximum(lengths, 1)[:, None] * 1000
+        return 100 * (1 - np.exp(-density / SIGNAL_SCALE))
+
+    def score(self, texts: Sequence[str], doc_type: str) -> Dict[str, np.ndarray]:
+        """批量计算同类文档的各项评分"""
+        tf = self.term_frequency(texts)
+        lengths = np.array([len(text) for text in texts], dtype=np.float32)
+        coverage = self.section_coverage(tf, doc_type)
+        signals = self.signal_scores(tf, lengths)
+        column = {name: i for i, name in enumerate(self.signals)}
+
+        completeness = coverage.mean(axis=1) * 100
+        return {
+            "coverage": coverage,
+            "signals": signals,
+            "完整性": completeness,
+            "可行性": 0.6 * signals[:, column["可行性"]] + 0.4 * completeness,
+            "创新性": signals[:, column["创新性"]],
+            "市场": signals[:, column["市场"]],
+            "竞争": signals[:, column["竞争"]],
+            "机会": signals[:, column["机会"]],
+            "风险": signals[:, column["风险"]],
+        }
+
+    def classify(self, texts: Sequence[str]) -> List[str]:
+        """按章节覆盖率判断文档类型"""
+        tf = self.term_frequency(texts)
+        doc_types = list(self.section_matrix)
+        ratios = np.stack([self.section_coverage(tf, doc_type).mean(axis=1) for doc_type in doc_types], axis=1)
+        return [doc_types[i] for i in ratios.argmax(axis=1)]
+
+    def missing_sections(self, coverage_row: np.ndarray, doc_type: str) -> List[str]:
+        return [name for name, present in zip(self.section_names[doc_type], coverage_row) if not present]
+
+    def key_sentences(self, text: str, words: Sequence[str], limit: int = 3, require_digits: bool = False) -> List[str]:
+        """抽取命中关键词的句子，含数据的句子优先"""
+        pattern = _terms_pattern(sorted({word.lower() for word in words}, key=lambda word: (-len(word), word)))
+        hits = []
+        for match in _SENTENCE.finditer(text):
+            sentence = match.group().strip()
+            lowered = sentence.lower()
+            if not sentence or not pattern.search(lowered):
+                continue
+            has_digits = bool(_DIGIT.search(sentence))
+            if require_digits and not has_digits:
+                continue
+            hits.append((not has_digits, len(hits), sentence))
+        return [sentence for _, _, sentence in sorted(hits)[:limit]]
@@ -0,0 +1,198 @@
+import contextvars
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from llm_client import CircuitOpenError, estimate_tokens
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Markdown 标题或“一、”“1.”“第一章”式的编号标题
+_HEADING = re.compile(r"^\s*(#{1,6}\s|第[一二三四五六七八九十百0-9]+[章节部分]|[一二三四五六七八九十]+、|\d+(\.\d+)*[.、]\s*\S)")
+# 句末标点，用于切分超长段落
+_SENTENCE_END = re.compile(r"(?<=[。！？!?；;\n])")
+
+# 块数超出上限时，每组合并的块数上限，避免每块只剩零碎的几个字
+GROUP_PIECES = 4
+
+MAP_PROMPT = """以下是一份创业项目文件的第 {index}/{total} 部分。
+请提炼其中与市场需求、产品方案、商业模式、增长策略、竞争情况相关的关键信息，保留关键数据，控制在 {limit} 字以内：
+
+{chunk}"""
+
+REDUCE_PROMPT = """以下是同一份创业项目文件各部分的摘要。
+请合并去重，整理为一份完整的项目文件摘要，保留关键数据，控制在 {limit} 字以内：
+
+{summaries}"""
+
+
+def split_blocks(text: str) -> List[str]:
+    """按空行和标题切分为语义块，标题与其后的正文归为同一块"""
+    blocks = []
+    current = []
+    for line in text.splitlines():
+        if not line.strip() or _HEADING.match(line):
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            if not line.strip():
+                continue
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+def _split_oversized(block: str, max_tokens: int) -> List[str]:
+    """把超出预算的单个块按句子切开，单句仍超长时按字符硬切"""
+    pieces = []
+    for sentence in _SENTENCE_END.split(block):
+        if estimate_tokens(sentence) <= max_tokens:
+            pieces.append(sentence)
+            continue
+        # 中文约 1 字 1 token，按 max_tokens 个字符切分是保守的上界
+        pieces.extend(sentence[i:i + max_tokens] for i in range(0, len(sentence), max_tokens))
+    return [piece for piece in pieces if piece.strip()]
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """在段落/标题边界上把文本合并为不超过 max_tokens 的块"""
+    chunks = []
+    current = []
+    current_tokens = 0
+    for block in split_blocks(text):
+        block_tokens = estimate_tokens(block)
+        pieces = [block] if block_tokens <= max_tokens else _split_oversized(block, max_tokens)
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece) if len(pieces) > 1 else block_tokens
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append("\n\n".join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def limit_chunks(chunks: List[str], max_chunks: int, max_tokens: int) -> List[str]:
+    """块数超过 max_chunks 时，按顺序把相邻块分为 max_chunks 组，组内均匀选取至多 GROUP_PIECES 块，
+    各截取开头部分拼接
+
+    每块都以段落或标题开头，截取开头能保留全文各部分的要点；请求次数和输入 token 总量
+    不再随文件长度增长，单次请求仍不超过 max_tokens。
+    """
+    if max_chunks <= 0 or len(chunks) <= max_chunks:
+        return chunks
+    groups = []
+    for group in range(max_chunks):
+        members = chunks[group * len(chunks) // max_chunks:(group + 1) * len(chunks) // max_chunks]
+        pieces = min(len(members), GROUP_PIECES)
+        # 中文约 1 字 1 token，按字符截取是保守的上界
+        share = max_tokens // pieces
+        groups.append("\n\n".join(members[i * len(members) // pieces][:share] for i in range(pieces)))
+    return groups
+
+
+class DocumentSummarizer:
+    """对上传文件做 map-reduce 摘要：分块并发摘要，再合并为不超过总预算的文本
+
+    每轮 map 最多发起 max_chunks 次请求，超长文件的块会先合并截取（见 limit_chunks），0 表示不限制。
+    """
+
+    def __init__(
+        self,
+        complete: Callable[[str, int], str],
+        chunk_tokens: int = 3000,
+        max_workers: int = 4,
+        total_budget: int = 2000,
+        max_rounds: int = 3,
+        cache_size: int = 32,
+        max_chunks: int = 8,
+    ):
+        self.complete = complete
+        self.chunk_tokens = chunk_tokens
+        self.max_workers = max_workers
+        self.total_budget = total_budget
+        self.max_rounds = max_rounds
+        self.cache_size = cache_size
+        self.max_chunks = max_chunks
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def summarize(self, text: str) -> str:
+        """返回不超过 total_budget 的文件摘要；短文本原样返回，不发起请求"""
+        if estimate_tokens(text) <= self.total_budget:
+            return text
+
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        summary = self._map(chunk_text(text, self.chunk_tokens))
+        rounds = 1
+        while estimate_tokens(summary) > self.total_budget and rounds < self.max_rounds:
+            summary = self._reduce(summary)
+            rounds += 1
+        if estimate_tokens(summary) > self.total_budget:
+            # 多轮合并后仍超预算时按字符截断，保证 prompt 长度可控
+            summary = summary[:self.total_budget]
+
+        with self._lock:
+            self._cache[key] = summary
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return summary
+
+    def _map(self, chunks: List[str]) -> str:
+        """并发摘要各块，按原文顺序拼接"""
+        chunks = limit_chunks(chunks, self.max_chunks, self.chunk_tokens)
+        limit = max(100, self.total_budget // len(chunks))
+
+        failures: List[Exception] = []
+
+        def summarize_chunk(args):
+            index, chunk = args
+            prompt = MAP_PROMPT.format(index=index, total=len(chunks), limit=limit, chunk=chunk)
+            try:
+                return self.complete(prompt, limit * 2)
+            except CircuitOpenError:
+                # 上游已熔断，其余块也不会成功，直接失败
+                raise
+            except Exception as e:
+                # 个别块失败时保留该块原文开头，失败块过半时整体失败（见下）
+                logger.warning("文件摘要第 %d/%d 块失败：%s", index, len(chunks), e)
+                tracer.count("summary_chunk_errors_total")
+                failures.append(e)
+                return chunk[:limit]
+
+        executor = ThreadPoolExecutor(max_workers=max(1, self.max_workers))
+        try:
+            # 复制调用方上下文，使分块请求的埋点归入当前 trace
+            futures = [
+                executor.submit(contextvars.copy_context().run, summarize_chunk, item)
+                for item in enumerate(chunks, 1)
+            ]
+            summaries = [future.result() for future in futures]
+        finally:
+            # 出错时取消尚未开始的块
+            executor.shutdown(wait=True, cancel_futures=True)
+        if len(failures) * 2 > len(chunks):
+            # 多数块失败时拼出来的只是原文片段，抛出异常由调用方退回截断原文
+            raise failures[0]
+        return "\n\n".join(summaries)
+
+    def _reduce(self, summaries: str) -> str:
+        """合并分块摘要；合并内容本身超出单块预算时先再做一轮 map"""
+        if estimate_tokens(summaries) > self.chunk_tokens:
+            return self._map(chunk_text(summaries, self.chunk_tokens))
+        prompt = REDUCE_PROMPT.format(limit=self.total_budget, summaries=summaries)
+        return self.complete(prompt, self.total_budget * 2)
@@ -0,0 +1,298 @@
+"""财务预测引擎：按月推演客户数、收入、成本与现金流，并以蒙特卡洛方式同时计算大量假设场景
+
+所有场景以 NumPy 数组并行计算（形状为 场景数 x 月数），只在月份维度上循环，
+数千个场景的推演与敏感性分析在毫秒级完成；结果可导出为 pandas DataFrame。
+"""
+from dataclasses import dataclass, fields
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# 假设取值：单个数值为固定值，(低, 高) 为均匀分布，(低, 最可能, 高) 为三角分布
+Assumption = Union[float, Tuple[float, float], Tuple[float, float, float]]
+
+DEFAULT_MONTHS = 36
+DEFAULT_SCENARIOS = 5000
+DEFAULT_PERCENTILES = (10, 50, 90)
+# 汇总预测结果时使用的检查点月份
+CHECKPOINT_MONTHS = (6, 12, 24, 36)
+
+# 假设与结果在 DataFrame 中的列名
+ASSUMPTION_LABELS = {
+    "initial_investment": "前期投入",
+    "fixed_costs": "月固定成本",
+    "initial_customers": "初始客户数",
+    "new_customers": "首月新增客户",
+    "growth_rate": "新增客户月增长率",
+    "churn_rate": "月流失率",
+    "arpu": "客户月均收入",
+    "gross_margin": "毛利率",
+    "cac": "获客成本",
+}
+MONTHLY_LABELS = {
+    "customers": "客户数",
+    "new_customers": "新增客户",
+    "revenue": "收入",
+    "operating_costs": "运营成本",
+    "cash_flow": "现金流",
+    "cumulative_cash": "累计现金流",
+}
+
+
+@dataclass
+class ProjectionAssumptions:
+    """财务预测假设，金额单位为元，比例按月计"""
+
+    initial_investment: Assumption = (300000, 800000)
+    # 工资、房租等不随客户数变化的月度支出
+    fixed_costs: Assumption = (40000, 80000)
+    initial_customers: Assumption = 0
+    new_customers: Assumption = (20, 60)
+    growth_rate: Assumption = (0.03, 0.12)
+    churn_rate: Assumption = (0.02, 0.06)
+    arpu: Assumption = (200, 400)
+    gross_margin: Assumption = (0.55, 0.8)
+    cac: Assumption = (500, 1500)
+    # 潜在客户总数；设置后新增客户随市场饱和而减少，并可计算市场份额
+    market_size: Optional[float] = None
+
+    def sample(self, scenarios: int, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+        """为每个场景抽样一组假设，返回 名称 -> 形状为 (场景数,) 的数组"""
+        samples = {}
+        for f in fields(self):
+            if f.name == "market_size":
+                continue
+            value = getattr(self, f.name)
+            if isinstance(value, (int, float)):
+                samples[f.name] = np.full(scenarios, float(value))
+            elif len(value) == 2:
+                samples[f.name] = rng.uniform(value[0], value[1], scenarios)
+            elif len(value) == 3:
+                samples[f.name] = rng.triangular(value[0], value[1], value[2], scenarios)
+            else:
+                raise ValueError(f"无法识别的假设取值：{f.name}={value!r}")
+        return samples
+
+
+@dataclass
+class ProjectionResult:
+    """一次蒙特卡洛推演的结果；月度数组形状为 (场景数, 月数)，第 0 列为第 1 个月"""
+
+    assumptions: Dict[str, np.ndarray]
+    customers: np.ndarray
+    new_customers: np.ndarray
+    revenue: np.ndarray
+    operating_costs: np.ndarray
+    cash_flow: np.ndarray
+    cumulative_cash: np.ndarray
+    market_size: Optional[float] = None
+
+    @property
+    def scenario_count(self) -> int:
+        return self.revenue.shape[0]
+
+    @property
+    def months(self) -> int:
+        return self.revenue.shape[1]
+
+    @property
+    def payback_month(self) -> np.ndarray:
+        """累计现金流（含前期投入）首次转正的月份，预测期内未回本为 NaN"""
+        return _first_month(self.cumulative_cash >= 0)
+
+    @property
+    def breakeven_month(self) -> np.ndarray:
+        """当月现金流首次转正的月份，预测期内未盈亏平衡为 NaN"""
+        return _first_month(self.cash_flow >= 0)
+
+    @property
+    def funding_need(self) -> np.ndarray:
+        """累计现金流的最低点，即含前期投入在内所需的最少资金"""
+        return np.maximum(-self.cumulative_cash.min(axis=1), 0)
+
+    @property
+    def ltv(self) -> np.ndarray:
+        """客户生命周期价值：月均毛利除以月流失率"""
+        a = self.assumptions
+        return a["arpu"] * a["gross_margin"] / np.maximum(a["churn_rate"], 1e-6)
+
+    @property
+    def ltv_cac(self) -> np.ndarray:
+        return self.ltv / np.maximum(self.assumptions["cac"], 1e-6)
+
+    @property
+    def cac_payback_months(self) -> np.ndarray:
+        """收回单个客户获客成本所需的月数"""
+        a = self.assumptions
+        return a["cac"] / np.maximum(a["arpu"] * a["gross_margin"], 1e-6)
+
+    @property
+    def market_share(self) -> Optional[np.ndarray]:
+        if not self.market_size:
+            return None
+        return self.customers / self.market_size
+
+    def growth_rates(self, metric: str = "revenue") -> np.ndarray:
+        """月环比增长率，第 1 个月为 NaN"""
+        values = getattr(self, metric)
+        rates = np.full(values.shape, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates[:, 1:] = np.where(values[:, :-1] > 0, values[:, 1:] / values[:, :-1] - 1, np.nan)
+        return rates
+
+    def percentiles(self, metric: str, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> np.ndarray:
+        """按月计算指标在各场景间的分位数，形状为 (分位数个数, 月数)；增长率等含 NaN 的数组请先自行处理"""
+        return np.percentile(getattr(self, metric), percentiles, axis=0)
+
+    def summary(self) -> Dict[str, float]:
+        """关键结果的中位数与回本概率"""
+        payback = self.payback_month
+        return {
+            "场景数": self.scenario_count,
+            "回本概率": float(np.mean(~np.isnan(payback))),
+            "回本月份中位数": _nanmedian(payback),
+            "盈亏平衡月份中位数": _nanmedian(self.breakeven_month),
+            "资金需求中位数": float(np.median(self.funding_need)),
+            "LTV中位数": float(np.median(self.ltv)),
+            "获客成本中位数": float(np.median(self.assumptions["cac"])),
+            "LTV/CAC中位数": float(np.median(self.ltv_cac)),
+            "期末累计现金流中位数": float(np.median(self.cumulative_cash[:, -1])),
+        }
+
+    def scenarios(self):
+        """每个场景一行：抽样的假设与回本月份、资金需求、LTV/CAC 等结果"""
+        import pandas as pd
+
+        data = {ASSUMPTION_LABELS[name]: values for name, values in self.assumptions.items()}
+        data.update({
+            "回本月份": self.payback_month,
+            "盈亏平衡月份": self.breakeven_month,
+            "资金需求": self.funding_need,
+            "LTV": self.ltv,
+            "LTV/CAC": self.ltv_cac,
+            "期末客户数": self.customers[:, -1],
+            "累计收入": self.revenue.sum(axis=1),
+            "期末累计现金流": self.cumulative_cash[:, -1],
+        })
+        return pd.DataFrame(data)
+
+    def monthly(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES):
+        """每月一行，列为（指标, 分位数）的两级索引，如 df["收入"]["P50"]"""
+        import pandas as pd
+
+        columns = {}
+        for metric, label in MONTHLY_LABELS.items():
+            for p, row in zip(percentiles, self.percentiles(metric, percentiles)):
+                columns[label, f"P{p:g}"] = row
+        frame = pd.DataFrame(columns, index=pd.RangeIndex(1, self.months + 1, name="月份"))
+        frame.columns = pd.MultiIndex.from_tuples(frame.columns, names=["指标", "分位数"])
+        return frame
+
+    def sensitivity(self, target: Optional[np.ndarray] = None):
+        """各项假设与目标结果（默认期末累计现金流）的 Spearman 秩相关系数，按绝对值降序"""
+        import pandas as pd
+
+        target = self.cumulative_cash[:, -1] if target is None else target
+        names = [name for name, values in self.assumptions.items() if np.ptp(values) > 0]
+        if not names:
+            return pd.DataFrame(columns=["相关系数"])
+        ranks = _ranks(np.column_stack([self.assumptions[name] for name in names] + [target]))
+        correlation = np.corrcoef(ranks, rowvar=False)[-1, :-1]
+        frame = pd.DataFrame({"相关系数": correlation}, index=[ASSUMPTION_LABELS[name] for name in names])
+        frame.index.name = "假设"
+        return frame.reindex(frame["相关系数"].abs().sort_values(ascending=False).index)
+
+
+class FinancialProjector:
+    """按月推演财务模型；同一 seed 的结果可复现"""
+
+    def __init__(self, assumptions: Optional[ProjectionAssumptions] = None,
+                 months: int = DEFAULT_MONTHS, seed: Optional[int] = None):
+        self.assumptions = assumptions or ProjectionAssumptions()
+        self.months = months
+        self.seed = seed
+
+    def project(self, scenarios: int = DEFAULT_SCENARIOS) -> ProjectionResult:
+        sampled = self.assumptions.sample(scenarios, np.random.default_rng(self.seed))
+        return self.project_sampled(sampled)
+
+    def project_sampled(self, sampled: Dict[str, np.ndarray]) -> ProjectionResult:
+        """按给定的假设数组推演，可用于对单项假设做网格式的敏感性分析"""
+        months = self.months
+        market_size = self.assumptions.market_size
+        scenarios = len(sampled["arpu"])
+        growth = 1 + sampled["growth_rate"]
+        retention = 1 - sampled["churn_rate"]
+
+        # 内部按 (月数, 场景数) 存放，逐月写入的是连续内存；客户数依赖上月结果，
+        # 只在月份维度循环，场景维度全部向量化
+        customers = np.empty((months, scenarios))
+        new_customers = np.empty((months, scenarios))
+        current = sampled["initial_customers"].copy()
+        # 未饱和时每月新增客户按固定增长率递增
+        base_new = sampled["new_customers"].copy()
+        for t in range(months):
+            new = base_new * np.clip(1 - current / market_size, 0, 1) if market_size else base_new
+            current = current * retention + new
+            customers[t] = current
+            new_customers[t] = new
+            base_new = base_new * growth
+
+        revenue = customers * sampled["arpu"]
+        operating_costs = revenue * (1 - sampled["gross_margin"]) + sampled["fixed_costs"] + new_customers * sampled["cac"]
+        cash_flow = revenue - operating_costs
+        cumulative_cash = np.cumsum(cash_flow, axis=0) - sampled["initial_investment"]
+        return ProjectionResult(sampled, customers.T, new_customers.T, revenue.T, operating_costs.T,
+                                cash_flow.T, cumulative_cash.T, market_size)
+
+
+class CachedProjection:
+    """按假设、场景数缓存最近一次推演结果：假设未变时直接复用，任一假设修改后自动重新推演"""
+
+    def __init__(self):
+        self._key = None
+        self._result: Optional[ProjectionResult] = None
+
+    def get(self, assumptions: ProjectionAssumptions, scenarios: int = DEFAULT_SCENARIOS,
+            months: int = DEFAULT_MONTHS, seed: Optional[int] = None) -> ProjectionResult:
+        # 假设为可变的 dataclass，按其当前取值比较，调用方直接修改字段也能识别
+        key = (repr(assumptions), scenarios, months, seed)
+        if self._result is None or self._key != key:
+            self._result = FinancialProjector(assumptions, months, seed).project(scenarios)
+            self._key = key
+        return self._result
+
+    def clear(self):
+        self._key = None
+        self._result = None
+
+
+def _first_month(mask: np.ndarray) -> np.ndarray:
+    """每行第一个为 True 的月份（从 1 开始），整行为 False 时为 NaN"""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1) + 1, np.nan)
+
+
+def _nanmedian(values: np.ndarray) -> Optional[float]:
+    return None if np.all(np.isnan(values)) else float(np.nanmedian(values))
+
+
+def _ranks(matrix: np.ndarray) -> np.ndarray:
+    """按列计算秩（连续分布下几乎没有并列值，不做平均秩处理）"""
+    ranks = np.empty_like(matrix)
+    order = np.argsort(matrix, axis=0)
+    np.put_along_axis(ranks, order, np.arange(matrix.shape[0], dtype=float)[:, None], axis=0)
+    return ranks
+
+
+def percentile_summary(values: np.ndarray, percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                       digits: int = 2) -> Dict[str, Optional[float]]:
+    """一组场景结果的分位数，如 {"P10": ..., "P50": ..., "P90": ...}；全为 NaN 时各分位数为 None"""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {f"P{p:g}": None for p in percentiles}
+    return {f"P{p:g}": round(float(v), digits) for p, v in zip(percentiles, np.percentile(values, percentiles))}
+
+
+def checkpoint_months(months: int) -> Tuple[int, ...]:
+    """汇总使用的检查点月份（不超过预测期）"""
+    return tuple(month for month in CHECKPOINT_MONTHS if month <= months) or (months,)
@@ -1,7 +1,36 @@
+import dataclasses
+
+import numpy as np
+
+from financial_projection import (
+    DEFAULT_SCENARIOS, CachedProjection, ProjectionAssumptions, ProjectionResult, checkpoint_months,
+    percentile_summary
+)
+
+# LTV/CAC 的健康线
+TARGET_LTV_CAC = 3.0
+# 敏感性分析中影响最大的假设对应的优化建议
+OPTIMIZATION_SUGGESTIONS = {
+    "客户月均收入": "提高客单价：推出高阶套餐或增值服务，并测试价格弹性",
+    "获客成本": "降低获客成本：收缩低转化渠道，加大转介绍和内容营销的投入",
+    "毛利率": "提升毛利率：优化交付和服务成本，减少定制化项目",
+    "首月新增客户": "扩大早期获客规模：集中资源打透一到两个最有效的渠道",
+    "新增客户月增长率": "提高获客增速：建立可复制的销售流程和渠道合作",
+    "月流失率": "降低流失率：完善客户成功体系，跟踪活跃度并及时干预",
+    "月固定成本": "控制固定成本：按里程碑招聘，避免过早扩张团队和办公场地",
+    "前期投入": "降低前期投入：以最小可行产品验证后再追加投入",
+    "初始客户数": "在正式上线前积累种子客户，缩短冷启动周期",
+}
+
+
 class GrowthStrategist:
     def __init__(self):
         self.growth_metrics = ["用户增长", "收入增长", "市场份额"]
         self.market_data = {}
+        # 增长指标基于蒙特卡洛财务推演；market_data 中的“潜在客户数”用于计算市场份额
+        self.financial_assumptions = ProjectionAssumptions()
+        self.projection_scenarios = DEFAULT_SCENARIOS
+        self._projection = CachedProjection()
         
     def create_growth_plan(self, business_model):
         """制定增长策略"""
@@ -45,4 +74,72 @@ class GrowthStrategist:
             "KPI指标": self._define_kpis(),
             "监测方案": self._design_monitoring_system(),
             "优化建议": self._generate_optimization_suggestions()
-        } 
\ No newline at end of file
+        }
+
+    def project_financials(self) -> ProjectionResult:
+        """按当前假设做蒙特卡洛推演；假设或潜在客户数不变时复用上次结果"""
+        assumptions = dataclasses.replace(
+            self.financial_assumptions,
+            market_size=self.market_data.get("潜在客户数", self.financial_assumptions.market_size)
+        )
+        return self._projection.get(assumptions, self.projection_scenarios)
+
+    def _calculate_cac(self):
+        """获客成本、客户生命周期价值及其比值（各场景分位数）"""
+        projection = self.project_financials()
+        return {
+            "获客成本": percentile_summary(projection.assumptions["cac"]),
+            "LTV": percentile_summary(projection.ltv),
+            "LTV/CAC": percentile_summary(projection.ltv_cac),
+            "获客成本回收月数": percentile_summary(projection.cac_payback_months),
+            "LTV/CAC达标概率": round(float(np.mean(projection.ltv_cac >= TARGET_LTV_CAC)), 4),
+        }
+
+    def _growth_series(self, projection: ProjectionResult):
+        """growth_metrics 中各指标对应的按月数组，无法计算的指标（如缺少潜在客户数时的市场份额）为 None"""
+        return {
+            "用户增长": projection.customers,
+            "收入增长": projection.revenue,
+            "市场份额": projection.market_share,
+        }
+
+    def _define_kpis(self):
+        """以各检查点月份的中位数作为目标值，并给出月环比增长率的中位数"""
+        projection = self.project_financials()
+        series = self._growth_series(projection)
+        months = checkpoint_months(projection.months)
+        kpis = {}
+        for metric in self.growth_metrics:
+            values = series.get(metric)
+            if values is None:
+                continue
+            targets = np.median(values[:, [month - 1 for month in months]], axis=0)
+            kpis[metric] = {f"第{month}个月": round(float(target), 4) for month, target in zip(months, targets)}
+            if metric != "市场份额":
+                rates = projection.growth_rates("customers" if metric == "用户增长" else "revenue")
+                kpis[metric]["月环比增长率"] = round(float(np.nanmedian(rates[:, 1:])), 4)
+        return kpis
+
+    def _design_monitoring_system(self):
+        """各检查点月份的预警线（P10）与目标值（P50），实际值低于预警线时需复盘增长策略"""
+        projection = self.project_financials()
+        series = self._growth_series(projection)
+        series["累计现金流"] = projection.cumulative_cash
+        months = checkpoint_months(projection.months)
+        monitoring = {}
+        for metric, values in series.items():
+            if values is None:
+                continue
+            monitoring[metric] = {}
+            for month in months:
+                summary = percentile_summary(values[:, month - 1], (10, 50), digits=4)
+                monitoring[metric][f"第{month}个月"] = {"预警线": summary["P10"], "目标值": summary["P50"]}
+        return monitoring
+
+    def _generate_optimization_suggestions(self, limit: int = 3):
+        """按敏感性分析结果，对期末累计现金流影响最大的几项假设给出优化建议"""
+        sensitivity = self.project_financials().sensitivity()
+        return [
+            {"假设": label, "相关系数": round(float(row["相关系数"]), 3), "建议": OPTIMIZATION_SUGGESTIONS[label]}
+            for label, row in sensitivity.head(limit).iterrows()
+        ]
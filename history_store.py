@@ -0,0 +1,146 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 分析过程中派生的字段不随历史记录保存：文件原文可能很大，文件摘要和相似案例可随时重新生成，
+# 保存相似案例还会让旧的案例文本再次进入相似项目索引
+DERIVED_FIELDS = ("文件内容", "文件摘要", "相似案例")
+# 列表页返回的摘要字段，不包含分析正文，正文在查看详情时再按需读取
+SUMMARY_COLUMNS = ("id", "created_at", "project_name", "industry", "stage", "funding", "mode")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    project_name TEXT NOT NULL,
+    industry TEXT NOT NULL DEFAULT '',
+    stage TEXT NOT NULL DEFAULT '',
+    funding TEXT NOT NULL DEFAULT '',
+    mode TEXT NOT NULL DEFAULT '',
+    prompt_version TEXT NOT NULL DEFAULT '',
+    project_info TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses (created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_analyses_project ON analyses (project_name, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_analyses_industry ON analyses (industry, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_analyses_stage ON analyses (stage, created_at DESC);
+"""
+
+# trigram 分词支持中文子串检索（SQLite 3.34+）；rowid 与 analyses.id 一致
+FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5(project_name, body, tokenize='trigram')"
+
+
+class HistoryStore:
+    """分析历史记录：SQLite（WAL 模式）持久化，FTS5 全文索引，支持分页查询"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.execute(FTS_SCHEMA)
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程使用独立连接，WAL 模式下读写互不阻塞"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, project_info: Dict[str, Any], analysis_result: Dict[str, str],
+             mode: str = "", prompt_version: str = "") -> int:
+        """保存一次分析结果，返回记录 id"""
+        # 只保留表单填写的信息和文件名
+        info = {key: value for key, value in project_info.items() if key not in DERIVED_FIELDS}
+        project_name = info.get("项目名称", "")
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO analyses (created_at, project_name, industry, stage, funding, mode, "
+                "prompt_version, project_info, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    time.time(), project_name, info.get("行业领域", ""), info.get("项目阶段", ""),
+                    info.get("融资情况", ""), mode, prompt_version,
+                    json.dumps(info, ensure_ascii=False), json.dumps(analysis_result, ensure_ascii=False)
+                )
+            )
+            record_id = cursor.lastrowid
+            conn.execute(
+                "INSERT INTO analyses_fts (rowid, project_name, body) VALUES (?, ?, ?)",
+                (record_id, project_name, "\n".join(analysis_result.values()))
+            )
+        return record_id
+
+    def query(self, search: Optional[str] = None, industry: Optional[str] = None,
+              stage: Optional[str] = None, project_name: Optional[str] = None,
+              page: int = 1, page_size: int = 20) -> Tuple[List[Dict[str, Any]], int]:
+        """分页查询历史记录摘要，按时间倒序，返回 (当前页记录, 总数)"""
+        conditions = []
+        params: List[Any] = []
+        for column, value in (("industry", industry), ("stage", stage), ("project_name", project_name)):
+            if value:
+                conditions.append(f"a.{column} = ?")
+                params.append(value)
+
+        search = (search or "").strip()
+        if len(search) >= 3:
+            conditions.append("a.id IN (SELECT rowid FROM analyses_fts WHERE analyses_fts MATCH ?)")
+            # 整体作为短语匹配，避免用户输入被解析为 FTS 查询语法
+            params.append('"' + search.replace('"', '""') + '"')
+        elif search:
+            # trigram 索引无法匹配不足 3 个字的关键词，退回 LIKE
+            conditions.append("a.id IN (SELECT rowid FROM analyses_fts WHERE project_name LIKE ? OR body LIKE ?)")
+            params.extend([f"%{search}%"] * 2)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM analyses a {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {', '.join('a.' + column for column in SUMMARY_COLUMNS)} FROM analyses a {where} "
+            "ORDER BY a.created_at DESC LIMIT ? OFFSET ?",
+            params + [page_size, max(0, page - 1) * page_size]
+        ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        """读取单条记录的完整内容"""
+        row = self._connect().execute("SELECT * FROM analyses WHERE id = ?", (record_id,)).fetchone()
+        if row is None:
+            return None
+        record = dict(row)
+        record["project_info"] = json.loads(record["project_info"])
+        record["result"] = json.loads(record["result"])
+        return record
+
+    def iter_records(self, after_id: int = 0, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """按 id 顺序分批遍历 id 大于 after_id 的完整记录，用于重建或增量同步索引"""
+        conn = self._connect()
+        while True:
+            rows = conn.execute(
+                "SELECT * FROM analyses WHERE id > ? ORDER BY id LIMIT ?", (after_id, batch_size)
+            ).fetchall()
+            for row in rows:
+                record = dict(row)
+                record["project_info"] = json.loads(record["project_info"])
+                record["result"] = json.loads(record["result"])
+                yield record
+            if len(rows) < batch_size:
+                return
+            after_id = rows[-1]["id"]
+
+    def distinct_values(self, column: str) -> List[str]:
+        """筛选项：某一索引列的全部取值"""
+        if column not in ("industry", "stage", "project_name"):
+            raise ValueError(f"不支持的筛选字段：{column}")
+        rows = self._connect().execute(
+            f"SELECT DISTINCT {column} FROM analyses WHERE {column} != '' ORDER BY {column}"
+        ).fetchall()
+        return [row[0] for row in rows]
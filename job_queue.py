@@ -0,0 +1,365 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from analysis_engine import AnalysisEngine, MODE_WHOLE
+from history_store import HistoryStore
+from similarity_index import SimilarityIndex
+from tracing import tracer
+
+# 任务状态
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# 流式输出时中间结果写库的最小间隔（秒），避免每个片段都触发一次写入
+PROGRESS_INTERVAL = 0.5
+# 已结束任务的保留时长（秒），超时的任务在启动时清理
+JOB_RETENTION = 7 * 24 * 3600
+# 运行中任务的心跳间隔（秒）；心跳超过 JOB_STALE_AFTER 未更新的任务视为所属进程已退出
+HEARTBEAT_INTERVAL = 10.0
+JOB_STALE_AFTER = 60.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    status TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    max_workers INTEGER NOT NULL DEFAULT 3,
+    claim TEXT,
+    owner TEXT,
+    heartbeat REAL,
+    project_info TEXT NOT NULL,
+    progress TEXT,
+    result TEXT,
+    meta TEXT,
+    cached INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (claim);
+"""
+
+_JSON_COLUMNS = ("project_info", "progress", "result", "meta")
+# 旧版数据库中没有的列
+_ADDED_COLUMNS = {"owner": "TEXT", "heartbeat": "REAL"}
+
+
+_process_owner: Optional[Tuple[int, str]] = None
+
+
+def default_owner() -> str:
+    """本进程的标识：主机名:pid:随机后缀，pid 被复用时也能区分不同的进程实例
+
+    同一进程内的所有队列共用一个标识，界面缓存重建出新队列时不会把本进程仍在执行的任务当作遗留任务。
+    """
+    global _process_owner
+    if _process_owner is None or _process_owner[0] != os.getpid():
+        _process_owner = (os.getpid(), f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}")
+    return _process_owner[1]
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """分析任务队列：SQLite（WAL 模式）持久化，页面刷新或应用重启后任务状态仍可查询
+
+    多个进程（如多个 Streamlit 实例和命令行）可共用同一个数据库：领取任务时记录所属进程（owner），
+    运行中定期更新心跳，恢复时只重新排队所属进程已退出或心跳过期的任务。
+    """
+
+    def __init__(self, path: str, owner: Optional[str] = None):
+        self.path = path
+        self.owner = owner or default_owner()
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, column_type in _ADDED_COLUMNS.items():
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程使用独立连接，WAL 模式下界面轮询不会阻塞后台写入"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        conn = self._connect()
+        with conn:
+            return conn.execute(sql, params)
+
+    def submit(self, project_info: Dict[str, Any], mode: str = MODE_WHOLE, max_workers: int = 3) -> str:
+        """提交分析任务，返回任务 id"""
+        job_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO jobs (id, created_at, status, mode, max_workers, project_info) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, time.time(), STATUS_QUEUED, mode, max_workers, json.dumps(project_info, ensure_ascii=False))
+        )
+        return job_id
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """领取最早提交的排队任务；单条 UPDATE 完成领取，多个 worker 之间不会重复领取"""
+        token = uuid.uuid4().hex
+        now = time.time()
+        cursor = self._execute(
+            "UPDATE jobs SET status = ?, started_at = ?, claim = ?, owner = ?, heartbeat = ? WHERE id = ("
+            "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1) AND status = ?",
+            (STATUS_RUNNING, now, token, self.owner, now, STATUS_QUEUED, STATUS_QUEUED)
+        )
+        if cursor.rowcount == 0:
+            return None
+        row = self._connect().execute("SELECT * FROM jobs WHERE claim = ?", (token,)).fetchone()
+        return self._decode(row)
+
+    def update_progress(self, job_id: str, progress: Dict[str, str]):
+        """写入运行中任务的中间结果"""
+        self._execute(
+            "UPDATE jobs SET progress = ? WHERE id = ? AND status = ?",
+            (json.dumps(progress, ensure_ascii=False), job_id, STATUS_RUNNING)
+        )
+
+    def finish(self, job_id: str, project_info: Dict[str, Any], result: Dict[str, str],
+               cached: bool = False, meta: Optional[Dict[str, Any]] = None):
+        """任务完成；文件原文可能很大，只保留文件名和摘要"""
+        info = {key: value for key, value in project_info.items() if key != "文件内容"}
+        self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, project_info = ?, progress = NULL, result = ?, "
+            "meta = ?, cached = ? WHERE id = ?",
+            (
+                STATUS_DONE, time.time(), json.dumps(info, ensure_ascii=False),
+                json.dumps(result, ensure_ascii=False), json.dumps(meta or {}, ensure_ascii=False),
+                int(cached), job_id
+            )
+        )
+
+    def update_meta(self, job_id: str, meta: Dict[str, Any]):
+        """更新已结束任务的附加信息（如归档警告）"""
+        self._execute("UPDATE jobs SET meta = ? WHERE id = ?", (json.dumps(meta, ensure_ascii=False), job_id))
+
+    def fail(self, job_id: str, error: str, meta: Optional[Dict[str, Any]] = None):
+        self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, error = ?, meta = ? WHERE id = ?",
+            (STATUS_FAILED, time.time(), error, json.dumps(meta or {}, ensure_ascii=False), job_id)
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """读取任务状态；排队中的任务附带前面还有几个任务（position）"""
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = self._decode(row)
+        if job["status"] == STATUS_QUEUED:
+            job["position"] = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?", (STATUS_QUEUED, job["created_at"])
+            ).fetchone()[0]
+        return job
+
+    def pending_count(self) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (STATUS_QUEUED, STATUS_RUNNING)
+        ).fetchone()[0]
+
+    def heartbeat(self):
+        """更新本进程所有运行中任务的心跳"""
+        self._execute(
+            "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = ?", (time.time(), self.owner, STATUS_RUNNING)
+        )
+
+    def _orphaned(self, owner: Optional[str], heartbeat: Optional[float], now: float, stale_after: float) -> bool:
+        """运行中的任务是否已无进程执行：心跳过期，或所属进程在本机且已退出"""
+        if owner == self.owner:
+            return False
+        if not owner or heartbeat is None or now - heartbeat > stale_after:
+            return True
+        host, pid, _ = owner.rsplit(":", 2)
+        if host != socket.gethostname() or os.name == "nt":
+            # 其他主机的进程无法直接检查，只看心跳；Windows 上 os.kill 不能用于探测进程
+            return False
+        # 同一 pid 但不是本实例，说明是重启前的进程（容器内 pid 常被复用）
+        return int(pid) == os.getpid() or not _pid_alive(int(pid))
+
+    def requeue_orphaned(self, stale_after: float = JOB_STALE_AFTER) -> int:
+        """把所属进程已退出的运行中任务重新排队，返回重新排队的任务数"""
+        now = time.time()
+        rows = self._connect().execute(
+            "SELECT id, claim, owner, heartbeat FROM jobs WHERE status = ?", (STATUS_RUNNING,)
+        ).fetchall()
+        requeued = 0
+        for row in rows:
+            if not self._orphaned(row["owner"], row["heartbeat"], now, stale_after):
+                continue
+            # 以领取时的 claim 为条件，避免覆盖期间被重新领取的任务
+            requeued += self._execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, claim = NULL, owner = NULL, heartbeat = NULL, "
+                "progress = NULL WHERE id = ? AND status = ? AND claim IS ?",
+                (STATUS_QUEUED, row["id"], STATUS_RUNNING, row["claim"])
+            ).rowcount
+        return requeued
+
+    def recover(self, retention: float = JOB_RETENTION, stale_after: float = JOB_STALE_AFTER) -> int:
+        """启动时调用：重新排队所属进程已退出的任务（其他进程仍在执行的任务不受影响），并清理过期的已结束任务
+
+        返回重新排队的任务数。
+        """
+        requeued = self.requeue_orphaned(stale_after)
+        self._execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+            (STATUS_DONE, STATUS_FAILED, time.time() - retention)
+        )
+        return requeued
+
+    def _decode(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        for column in _JSON_COLUMNS:
+            if job[column] is not None:
+                job[column] = json.loads(job[column])
+        job["cached"] = bool(job["cached"])
+        return job
+
+
+class JobWorkerPool:
+    """后台 worker 线程：从队列领取任务并调用分析引擎，界面只负责提交和轮询"""
+
+    def __init__(self, queue: JobQueue, engine: AnalysisEngine, history: Optional[HistoryStore] = None,
+                 workers: int = 2, poll_interval: float = 1.0, similarity: Optional[SimilarityIndex] = None):
+        self.queue = queue
+        self.engine = engine
+        self.history = history
+        # 新保存的历史记录同时加入相似项目索引
+        self.similarity = similarity
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "JobWorkerPool":
+        """重新排队上次未完成的任务，启动 worker 线程和心跳线程"""
+        self.queue.recover()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"analysis-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name="analysis-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """停止领取新任务，等待正在执行的任务结束"""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def submit(self, project_info: Dict[str, Any], mode: str = MODE_WHOLE, max_workers: int = 3) -> str:
+        """提交任务并唤醒空闲 worker，返回任务 id"""
+        job_id = self.queue.submit(project_info, mode, max_workers)
+        self._wakeup.set()
+        return job_id
+
+    def _heartbeat(self):
+        """定期更新本进程运行中任务的心跳，并接手其他进程退出后遗留的任务"""
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                self.queue.heartbeat()
+                if self.queue.requeue_orphaned():
+                    self._wakeup.set()
+            except sqlite3.Error:
+                pass
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim()
+            except sqlite3.Error:
+                job = None
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self.run_job(job)
+
+    def run_job(self, job: Dict[str, Any]):
+        """执行单个任务，结果、耗时和失败原因写回队列"""
+        project_info = job["project_info"]
+        timings: Dict[str, float] = {}
+        errors: Dict[str, str] = {}
+        last_write = 0.0
+
+        def on_progress(sections: Dict[str, str]):
+            nonlocal last_write
+            now = time.monotonic()
+            if now - last_write >= PROGRESS_INTERVAL:
+                last_write = now
+                self.queue.update_progress(job["id"], sections)
+
+        meta: Dict[str, Any] = {"timings": timings, "errors": errors}
+        try:
+            with tracer.trace("analysis.job", job=job["id"], mode=job["mode"],
+                              queued_ms=round((job["started_at"] - job["created_at"]) * 1000, 1)) as trace:
+                result, cached = self.engine.run_analysis(
+                    project_info, job["mode"], job["max_workers"], timings, errors, on_progress
+                )
+                trace.attrs["cached"] = cached
+                if not result:
+                    raise ValueError("；".join(errors.values()) or "模型返回的内容中未识别出任何分析维度")
+                # 先写回结果，归档失败只记为警告，不影响任务本身
+                self.queue.finish(job["id"], project_info, result, cached, meta)
+                warnings = [] if cached else self._archive(job, result)
+        except Exception as e:
+            self.queue.fail(job["id"], str(e), meta)
+            return
+        if warnings:
+            meta["warnings"] = warnings
+            self.queue.update_meta(job["id"], meta)
+
+    def _archive(self, job: Dict[str, Any], result: Dict[str, str]) -> List[str]:
+        """保存到历史记录和相似度索引，返回失败原因"""
+        if self.history is None:
+            return []
+        project_info = job["project_info"]
+        try:
+            # 保存到历史记录，之后可在“历史记录”标签页检索和重新下载
+            with tracer.span("history.save"):
+                record_id = self.history.save(
+                    project_info, result, job["mode"], self.engine.prompt_version(project_info, job["mode"])
+                )
+        except Exception as e:
+            tracer.count("job_archive_errors_total", target="history")
+            return [f"保存历史记录失败：{e}"]
+        if self.similarity is None:
+            return []
+        try:
+            with tracer.span("similar.add"):
+                self.similarity.add(record_id, project_info, result)
+        except Exception as e:
+            tracer.count("job_archive_errors_total", target="similarity")
+            return [f"更新相似项目索引失败：{e}"]
+        return []
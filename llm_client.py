@@ -0,0 +1,307 @@
+import json
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tracing import tracer
+
+if TYPE_CHECKING:
+    from rate_limiter import RateLimiter
+
+DEFAULT_API_URL = "https://api.302.ai/v1/chat/completions"  # 302AI的API地址
+DEFAULT_MODEL = "claude-3-opus-20240229"
+
+# 可重试的 HTTP 状态码：限流与服务端错误
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+_CJK = re.compile(r"[\u3000-\u303f\u3400-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中文字符约 1 字 1 token，其余约 4 字符 1 token"""
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+class LLMError(Exception):
+    """调用大模型接口失败"""
+
+
+class CircuitOpenError(LLMError):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后暂停请求，冷却后放行一次试探请求"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._half_open_probe = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        """请求前检查，熔断期间抛出 CircuitOpenError"""
+        with self._lock:
+            state = self._state()
+            if state == "open":
+                raise CircuitOpenError("上游服务连续失败，已暂停请求，请稍后再试")
+            if state == "half_open":
+                # 半开状态只放行一个试探请求
+                if self._half_open_probe:
+                    raise CircuitOpenError("上游服务恢复检测中，请稍后再试")
+                self._half_open_probe = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._half_open_probe = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._half_open_probe or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._half_open_probe = False
+
+
+class LLMClient:
+    """302AI chat/completions 客户端：连接池复用、超时、退避重试与熔断"""
+
+    def __init__(
+        self,
+        api_key: str,
+        api_url: str = DEFAULT_API_URL,
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.7,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 120.0,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        pool_size: int = 10,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        rate_limiter: Optional["RateLimiter"] = None,
+        priority: Optional[int] = None,
+    ):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.model = model
+        self.temperature = temperature
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        # 多个客户端可共享同一个限流器；priority 为本客户端请求的默认排队优先级
+        self.rate_limiter = rate_limiter
+        self.priority = priority
+
+        # 复用 keep-alive 连接，避免每次分析都重新进行 TLS 握手
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+
+    def build_payload(self, messages: List[Dict[str, str]], stream: bool = False, **params) -> Dict[str, Any]:
+        """构建请求体，params 可覆盖 temperature、max_tokens 等参数"""
+        data = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": 4000
+        }
+        data.update(params)
+        if stream:
+            data["stream"] = True
+        return data
+
+    @staticmethod
+    def estimate_prompt_tokens(messages: List[Dict[str, str]]) -> int:
+        """发送前预估 prompt 的 token 数，每条消息另计少量格式开销"""
+        return sum(estimate_tokens(message.get("content", "")) + 4 for message in messages)
+
+    def _acquire(self, data: Dict[str, Any], priority: Optional[int]) -> int:
+        """按预估 prompt 长度加 max_tokens 预扣限流额度，返回预扣的 token 数"""
+        if self.rate_limiter is None:
+            return 0
+        reserved = self.estimate_prompt_tokens(data["messages"]) + data.get("max_tokens", 0)
+        self._acquire_slot(reserved, priority)
+        return reserved
+
+    def _acquire_slot(self, tokens: int, priority: Optional[int]):
+        self.rate_limiter.acquire(self.api_key, tokens, self.priority if priority is None else priority)
+
+    def _release(self, reserved: int, used: int):
+        if self.rate_limiter is not None and reserved:
+            self.rate_limiter.release(self.api_key, reserved, used)
+
+    def complete(self, messages: List[Dict[str, str]], priority: Optional[int] = None, **params) -> str:
+        """发送非流式请求，返回生成的文本"""
+        data = self.build_payload(messages, **params)
+        prompt_tokens = self.estimate_prompt_tokens(messages)
+        reserved = 0
+        used = 0
+        with tracer.span("llm.complete", prompt_tokens=prompt_tokens, max_tokens=data["max_tokens"]) as span:
+            try:
+                with tracer.span("llm.rate_limit"):
+                    reserved = self._acquire(data, priority)
+                response = self._post(data, priority=priority)
+                with response:
+                    try:
+                        result = response.json()
+                        text = result['choices'][0]['message']['content']
+                    except (ValueError, KeyError, IndexError, TypeError) as e:
+                        raise LLMError(f"接口返回的内容无法解析：{response.text[:200]}") from e
+                usage = result.get("usage") or {}
+                completion_tokens = usage.get("completion_tokens") or estimate_tokens(text)
+                used = usage.get("total_tokens") or prompt_tokens + completion_tokens
+                span.attrs["completion_tokens"] = completion_tokens
+                tracer.count("llm_tokens_total", prompt_tokens, kind="prompt")
+                tracer.count("llm_tokens_total", completion_tokens, kind="completion")
+                return text
+            finally:
+                self._release(reserved, used)
+
+    def stream(self, messages: List[Dict[str, str]], priority: Optional[int] = None, **params) -> Iterator[str]:
+        """以 SSE 流式方式请求，逐段返回生成的文本"""
+        data = self.build_payload(messages, stream=True, **params)
+        prompt_tokens = self.estimate_prompt_tokens(messages)
+        started = time.monotonic()
+        reserved = 0
+        ttfb = None
+        generated = []
+        try:
+            reserved = self._acquire(data, priority)
+            tracer.record("llm.rate_limit", time.monotonic() - started, start=started)
+            response = self._post(data, stream=True, priority=priority)
+            with response:
+                # SSE 响应常不带 charset，requests 会按 ISO-8859-1 解码导致中文乱码
+                response.encoding = "utf-8"
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    payload = line[len("data:"):].strip()
+                    if payload == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(payload)
+                        choices = chunk.get("choices") or [{}]
+                        delta = choices[0].get("delta", {}).get("content")
+                    except (ValueError, AttributeError, IndexError) as e:
+                        raise LLMError(f"流式响应无法解析：{payload[:200]}") from e
+                    if delta:
+                        if ttfb is None:
+                            ttfb = time.monotonic() - started
+                        generated.append(delta)
+                        yield delta
+        finally:
+            completion_tokens = estimate_tokens("".join(generated))
+            self._release(reserved, prompt_tokens + completion_tokens if generated else 0)
+            # 生成器跨越多次 yield，不便使用 with 块，结束时一次性记录
+            tracer.record(
+                "llm.stream", time.monotonic() - started, start=started, prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens, ttfb_ms=round(ttfb * 1000, 1) if ttfb is not None else None
+            )
+            tracer.count("llm_tokens_total", prompt_tokens, kind="prompt")
+            tracer.count("llm_tokens_total", completion_tokens, kind="completion")
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _post(self, data: Dict[str, Any], stream: bool = False, priority: Optional[int] = None) -> requests.Response:
+        """带重试的 POST 请求；流式请求只在收到响应头之前重试"""
+        # 请求体只序列化一次，重试时复用
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        attempt = 0
+        while True:
+            if attempt and self.rate_limiter is not None:
+                # 重试同样占用请求数额度，token 已在首次请求前预扣
+                self._acquire_slot(0, priority)
+            self.circuit_breaker.before_call()
+            retry_after = None
+            try:
+                response = self.session.post(self.api_url, data=body, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                tracer.count("llm_requests_total", status="network_error")
+                self.circuit_breaker.record_failure()
+                error = LLMError(f"请求失败：{e}")
+            else:
+                tracer.count("llm_requests_total", status=response.status_code)
+                tracer.count("llm_request_bytes_total", len(body))
+                if response.status_code not in RETRYABLE_STATUS:
+                    if response.ok:
+                        self.circuit_breaker.record_success()
+                        return response
+                    # 4xx 客户端错误不重试，也不计入熔断
+                    self.circuit_breaker.record_success()
+                    detail = response.text[:200]
+                    response.close()
+                    raise LLMError(f"接口返回错误 {response.status_code}：{detail}")
+                self.circuit_breaker.record_failure()
+                retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    error = LLMError("接口限流（429），请求过于频繁，请稍后再试")
+                else:
+                    error = LLMError(f"接口返回错误 {response.status_code}")
+                response.close()
+
+            if attempt >= self.max_retries:
+                raise error
+            delay = self._backoff_delay(attempt, retry_after)
+            if retry_after is not None and self.rate_limiter is not None:
+                # 上游要求等待时，让共享同一限流器的其他请求一起等待，避免集中重试
+                self.rate_limiter.pause(delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """指数退避加全抖动；服务端给出 Retry-After 时以其为准"""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """解析 Retry-After，支持秒数和 HTTP 日期两种格式"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,89 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+from tracing import tracer
+
+# 页数达到该阈值时才启用多进程，小文件的进程启动开销得不偿失
+PARALLEL_PAGE_THRESHOLD = 40
+# 每个子进程任务处理的页数
+PAGES_PER_TASK = 8
+
+
+def _read_bytes(pdf_file) -> bytes:
+    """兼容文件路径、Streamlit UploadedFile 和普通文件对象"""
+    if isinstance(pdf_file, (str, os.PathLike)):
+        with open(pdf_file, "rb") as f:
+            return f.read()
+    if hasattr(pdf_file, "getvalue"):
+        return pdf_file.getvalue()
+    if hasattr(pdf_file, "seek"):
+        pdf_file.seek(0)
+    return pdf_file.read()
+
+
+def _extract_page_range(data: bytes, start: int, end: int) -> List[str]:
+    """子进程任务：提取 [start, end) 范围内各页文本"""
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    # 扫描件等无文本层的页面会返回 None
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def iter_pdf_pages(pdf_file, max_workers: Optional[int] = None,
+                   parallel_threshold: int = PARALLEL_PAGE_THRESHOLD) -> Iterator[str]:
+    """按页序逐页返回 PDF 文本；大文件按页段分发到进程池并行提取"""
+    # PyPDF2 只在真正解析 PDF 时才导入，缩短应用冷启动时间
+    from PyPDF2 import PdfReader
+
+    data = _read_bytes(pdf_file)
+    reader = PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+
+    if page_count < parallel_threshold:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    ranges = [(start, min(start + PAGES_PER_TASK, page_count))
+              for start in range(0, page_count, PAGES_PER_TASK)]
+    max_workers = max_workers or min(os.cpu_count() or 1, len(ranges))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # 只保持有限个任务在途，调用方提前停止时不会浪费太多算力
+        window = max_workers * 2
+        pending = [executor.submit(_extract_page_range, data, start, end) for start, end in ranges[:window]]
+        next_range = window
+        try:
+            while pending:
+                for text in pending.pop(0).result():
+                    yield text
+                if next_range < len(ranges):
+                    start, end = ranges[next_range]
+                    pending.append(executor.submit(_extract_page_range, data, start, end))
+                    next_range += 1
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def extract_pdf_text(pdf_file, max_chars: Optional[int] = None, max_workers: Optional[int] = None,
+                     parallel_threshold: int = PARALLEL_PAGE_THRESHOLD) -> str:
+    """提取 PDF 文本，达到字符预算 max_chars 后立即停止"""
+    parts = []
+    total = 0
+    with tracer.span("pdf.extract") as span:
+        pages = iter_pdf_pages(pdf_file, max_workers=max_workers, parallel_threshold=parallel_threshold)
+        try:
+            for text in pages:
+                parts.append(text)
+                parts.append("\n")
+                total += len(text) + 1
+                if max_chars is not None and total >= max_chars:
+                    break
+        finally:
+            pages.close()
+        span.attrs.update(pages=len(parts) // 2, chars=total)
+    text = "".join(parts)
+    return text[:max_chars] if max_chars is not None else text
@@ -0,0 +1,205 @@
+"""分析 prompt 模板注册表：按模板类型、语言和项目阶段管理带版本号的模板
+
+模板在注册时编译一次。不随项目变化的内容（系统提示、分析维度说明、输出格式要求）排在消息最前面，
+项目信息和文件内容排在最后，使同一模板的请求共享相同的前缀，便于接口侧的 prompt 前缀缓存命中。
+修改模板内容时需提高其 version，模板标识（id）会记入缓存键和历史记录。
+"""
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from section_parser import SECTION_TITLES
+
+# 模板类型：整体分析（整体/流式模式）与单维度分析（分维度并行及补全缺失维度）
+KIND_ANALYSIS = "analysis"
+KIND_SECTION = "section"
+DEFAULT_LANGUAGE = "zh"
+# 不区分项目阶段的通用模板
+ANY_STAGE = ""
+
+# 各分析维度的关注重点
+SECTION_FOCUS = {
+    "需求分析": "评估市场需求的真实性和规模",
+    "解决方案": "分析产品/服务的创新性和可行性",
+    "商业模式": "评估商业模式的合理性和盈利能力",
+    "增长策略": "建议合适的市场策略和增长路径",
+    "竞争分析": "分析竞争优势和潜在风险",
+}
+SECTION_FOCUS_EN = {
+    "需求分析": "assess whether the market need is real and how large it is",
+    "解决方案": "evaluate how innovative and feasible the product or service is",
+    "商业模式": "judge whether the business model is sound and can be profitable",
+    "增长策略": "recommend suitable go-to-market strategies and growth paths",
+    "竞争分析": "analyze competitive advantages and potential risks",
+}
+
+# 各项目阶段的侧重点，追加在通用说明之后
+STAGE_NOTES = {
+    "概念阶段": "该项目尚处于概念阶段，请侧重需求是否真实存在、如何以最低成本验证，以及最小可行产品的范围。",
+    "产品研发": "该项目处于产品研发阶段，请侧重产品方案的取舍、研发节奏与早期种子用户的获取。",
+    "市场验证": "该项目处于市场验证阶段，请侧重付费意愿、留存与单位经济模型能否成立。",
+    "规模化": "该项目处于规模化阶段，请侧重可复制的获客渠道、组织与运营效率以及竞争壁垒。",
+}
+
+_PROJECT_ZH = """项目名称：{项目名称}
+项目阶段：{项目阶段}
+融资情况：{融资情况}
+行业领域：{行业领域}
+目标客户：{目标客户}
+核心产品：{核心产品描述}
+当前挑战：{当前挑战}"""
+
+_PROJECT_EN = """Project name: {项目名称}
+Stage: {项目阶段}
+Funding: {融资情况}
+Industry: {行业领域}
+Target customers: {目标客户}
+Core product: {核心产品描述}
+Current challenges: {当前挑战}"""
+
+
+class _ProjectFields(dict):
+    """format_map 使用的字段表，缺失的字段显示为 N/A"""
+
+    def __missing__(self, key: str) -> str:
+        return "N/A"
+
+
+@dataclass
+class PromptTemplate:
+    """一个版本化的 prompt 模板
+
+    instructions 为静态说明：整体分析模板可使用 {sections}（编号的维度列表），
+    单维度模板可使用 {title} 和 {focus}。project 为项目信息的格式串，file_context 中的 {content}
+    为文件摘要或截断的原文。structured_instruction 为要求以 JSON 返回时追加在静态说明后的要求。
+    similar_context 中的 {cases} 为检索到的相似历史项目，为空时模板不引用相似案例。
+    """
+
+    name: str
+    version: str
+    system: str
+    instructions: str
+    project: str
+    file_context: str
+    structured_instruction: str = ""
+    language: str = DEFAULT_LANGUAGE
+    stage: str = ANY_STAGE
+    focus: Dict[str, str] = field(default_factory=lambda: dict(SECTION_FOCUS))
+    similar_context: str = ""
+    # 编译后的静态前缀，键为（维度名或 None, 是否要求 JSON）
+    _prefixes: Dict[Tuple[Optional[str], bool], str] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        self.compile()
+
+    @property
+    def id(self) -> str:
+        """模板标识，如 analysis/zh/市场验证@v3"""
+        return f"{self.name}/{self.language}/{self.stage or '*'}@{self.version}"
+
+    def compile(self):
+        """预先渲染所有静态前缀，之后每次请求只需拼接项目信息"""
+        sections = "\n".join(f"{i}. {title}：{self.focus[title]}" for i, title in enumerate(SECTION_TITLES, 1))
+        prefixes = {}
+        for title in (SECTION_TITLES if self.name == KIND_SECTION else [None]):
+            text = self.instructions.format(
+                sections=sections, title=title or "", focus=self.focus.get(title, "") if title else ""
+            )
+            prefixes[title, False] = text + "\n\n"
+            if self.structured_instruction:
+                prefixes[title, True] = text + "\n\n" + self.structured_instruction + "\n\n"
+        self._prefixes = prefixes
+
+    def static_prefix(self, title: Optional[str] = None, structured: bool = False) -> str:
+        return self._prefixes[title, structured and bool(self.structured_instruction)]
+
+    def render(self, project_info: Dict[str, Any], file_text: Optional[str] = None,
+               title: Optional[str] = None, structured: bool = False,
+               similar_cases: Optional[str] = None) -> List[Dict[str, str]]:
+        """生成对话消息：系统提示和静态说明在前，项目信息、文件内容和相似案例在后"""
+        content = self.static_prefix(title, structured) + self.project.format_map(_ProjectFields(project_info))
+        if file_text:
+            content += self.file_context.format(content=file_text)
+        if similar_cases and self.similar_context:
+            content += self.similar_context.format(cases=similar_cases)
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": content},
+        ]
+
+
+class PromptRegistry:
+    """按（模板类型, 语言, 项目阶段）查找模板，找不到时依次退回通用阶段和默认语言"""
+
+    def __init__(self):
+        self._templates: Dict[Tuple[str, str, str], PromptTemplate] = {}
+        self._lock = threading.Lock()
+
+    def register(self, template: PromptTemplate) -> PromptTemplate:
+        """注册模板，同一类型、语言和阶段的旧模板会被替换"""
+        with self._lock:
+            self._templates[template.name, template.language, template.stage] = template
+        return template
+
+    def get(self, name: str, language: str = DEFAULT_LANGUAGE, stage: Optional[str] = None) -> PromptTemplate:
+        stage = stage or ANY_STAGE
+        with self._lock:
+            for key in ((name, language, stage), (name, language, ANY_STAGE),
+                        (name, DEFAULT_LANGUAGE, stage), (name, DEFAULT_LANGUAGE, ANY_STAGE)):
+                template = self._templates.get(key)
+                if template is not None:
+                    return template
+        raise KeyError(f"未注册的 prompt 模板：{name}/{language}")
+
+    def templates(self) -> List[PromptTemplate]:
+        with self._lock:
+            return list(self._templates.values())
+
+
+def _default_templates() -> List[PromptTemplate]:
+    system = "你是一位经验丰富的创业顾问，擅长分析创业项目并提供专业建议。"
+    file_context = "\n\n此外，请结合以下项目文件内容进行分析：\n{content}"
+    similar = "\n\n以下是之前分析过的相似项目，仅供参考，请针对本项目的具体情况给出判断：\n{cases}"
+    analysis = ("作为一个创业顾问，请从以下几个方面分析文末给出的创业项目：\n{sections}\n\n"
+                "对于每个方面，请给出具体的建议和可执行的行动方案，并以维度名作为小标题。")
+    section = ("作为一个创业顾问，请只从「{title}」这一个方面分析文末给出的创业项目：{focus}。\n"
+               "请给出具体的建议和可执行的行动方案，无需重复标题。")
+    structured = ("请只输出一个 JSON 对象，不要输出其他内容。对象的键依次为：" + "、".join(SECTION_TITLES)
+                  + "，每个键的值为该方面的分析内容（Markdown 文本）。")
+
+    templates = []
+    for stage, note in [(ANY_STAGE, "")] + list(STAGE_NOTES.items()):
+        suffix = "\n" + note if note else ""
+        templates.append(PromptTemplate(KIND_ANALYSIS, "v3", system, analysis + suffix, _PROJECT_ZH,
+                                        file_context, structured, stage=stage, similar_context=similar))
+        templates.append(PromptTemplate(KIND_SECTION, "v3", system, section + suffix, _PROJECT_ZH,
+                                        file_context, stage=stage, similar_context=similar))
+
+    # 英文模板仍要求以中文维度名作为小标题，结果解析规则不变
+    system_en = "You are an experienced startup advisor who analyzes startup projects and gives practical advice."
+    file_context_en = "\n\nAlso take the following project document into account:\n{content}"
+    similar_en = ("\n\nSimilar projects analyzed earlier, for reference only; "
+                  "base your judgement on this project's own situation:\n{cases}")
+    headings = ", ".join(SECTION_TITLES)
+    templates.append(PromptTemplate(
+        KIND_ANALYSIS, "v1", system_en,
+        "As a startup advisor, analyze the startup project described at the end from these angles:\n{sections}\n\n"
+        f"Give concrete, actionable recommendations for each angle. Use exactly these headings: {headings}.",
+        _PROJECT_EN, file_context_en,
+        f"Output a single JSON object and nothing else. Its keys are, in order: {headings}; "
+        "each value is the analysis for that angle as Markdown text.",
+        language="en", focus=dict(SECTION_FOCUS_EN), similar_context=similar_en,
+    ))
+    templates.append(PromptTemplate(
+        KIND_SECTION, "v1", system_en,
+        "As a startup advisor, analyze the startup project described at the end only from the angle "
+        "\"{title}\": {focus}.\nGive concrete, actionable recommendations without repeating the heading.",
+        _PROJECT_EN, file_context_en, language="en", focus=dict(SECTION_FOCUS_EN), similar_context=similar_en,
+    ))
+    return templates
+
+
+# 进程内共享的默认注册表
+default_registry = PromptRegistry()
+for _template in _default_templates():
+    default_registry.register(_template)
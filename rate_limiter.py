@@ -0,0 +1,151 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from llm_client import LLMError
+
+# 请求优先级，数值越小越先放行：界面上的交互式分析优先于批处理任务
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# 默认的全局限额（每分钟请求数 / token 数），可通过配置覆盖
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_TOKENS_PER_MINUTE = 200000
+
+
+class RateLimitError(LLMError):
+    """排队等待限流额度超时"""
+
+
+class TokenBucket:
+    """令牌桶：按每分钟速率匀速补充，容量默认为一分钟的额度；本身不加锁，由 RateLimiter 统一加锁"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """距离可扣除 amount 还需等待的秒数；超过容量的请求按容量计，避免永远等不到"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """出站请求限流：全局与按 API Key 的请求数、token 数令牌桶，等待中的请求按优先级排队放行
+
+    限额为 None 表示不限制。token 按预估的 prompt 长度加 max_tokens 预扣，请求结束后按实际用量退还差额。
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: Optional[float] = DEFAULT_TOKENS_PER_MINUTE,
+                 key_requests_per_minute: Optional[float] = None,
+                 key_tokens_per_minute: Optional[float] = None,
+                 max_wait: float = 120.0):
+        self.global_buckets = self._make_buckets(requests_per_minute, tokens_per_minute)
+        self.key_limits = (key_requests_per_minute, key_tokens_per_minute)
+        self.key_buckets: Dict[str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]] = {}
+        self.max_wait = max_wait
+        self.paused_until = 0.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def _make_buckets(requests_per_minute, tokens_per_minute):
+        return (
+            TokenBucket(requests_per_minute) if requests_per_minute else None,
+            TokenBucket(tokens_per_minute) if tokens_per_minute else None,
+        )
+
+    def _buckets(self, key: str):
+        if key not in self.key_buckets:
+            self.key_buckets[key] = self._make_buckets(*self.key_limits)
+        return (self.global_buckets, self.key_buckets[key])
+
+    def _delay(self, key: str, tokens: int, now: float) -> float:
+        delay = max(0.0, self.paused_until - now)
+        for requests, token_bucket in self._buckets(key):
+            if requests is not None:
+                delay = max(delay, requests.delay(1, now))
+            if token_bucket is not None and tokens:
+                delay = max(delay, token_bucket.delay(tokens, now))
+        return delay
+
+    def acquire(self, key: str = "", tokens: int = 0, priority: Optional[int] = None,
+                timeout: Optional[float] = None):
+        """阻塞直到额度足够并扣除；只有队首（优先级最高、最早到达）的请求可以扣除额度
+
+        priority 默认为交互式优先级，等待超过 timeout（默认 max_wait）秒时抛出 RateLimitError。
+        """
+        priority = PRIORITY_INTERACTIVE if priority is None else priority
+        timeout = self.max_wait if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waiter = (priority, next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiters, waiter)
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = self._delay(key, tokens, now) if self._waiters[0] == waiter else None
+                    if delay == 0:
+                        for requests, token_bucket in self._buckets(key):
+                            if requests is not None:
+                                requests.consume(1)
+                            if token_bucket is not None:
+                                token_bucket.consume(tokens)
+                        return
+                    if now >= deadline:
+                        raise RateLimitError(f"请求过多，排队 {timeout:g} 秒仍未获得额度，请稍后再试")
+                    # 非队首的请求等待前面的请求放行后被唤醒
+                    self._cond.wait(deadline - now if delay is None else min(delay, deadline - now))
+            finally:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def release(self, key: str, reserved: int, used: int):
+        """请求结束后按实际用量退还预扣的 token"""
+        if reserved <= used:
+            return
+        with self._cond:
+            for _, token_bucket in self._buckets(key):
+                if token_bucket is not None:
+                    token_bucket.refund(reserved - used)
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        """上游返回 429 时暂停全部放行，避免所有请求同时重试"""
+        with self._cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, float]:
+        """当前排队数与全局剩余额度"""
+        with self._cond:
+            now = time.monotonic()
+            requests, token_bucket = self.global_buckets
+            for bucket in self.global_buckets:
+                if bucket is not None:
+                    bucket._refill(now)
+            return {
+                "waiting": len(self._waiters),
+                "requests_available": requests.tokens if requests is not None else float("inf"),
+                "tokens_available": token_bucket.tokens if token_bucket is not None else float("inf"),
+                "paused": max(0.0, self.paused_until - now),
+            }
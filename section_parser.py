@@ -0,0 +1,172 @@
+import json
+import re
+from typing import Dict, List, Optional
+
+# 分析报告的五个维度（顺序即展示顺序）
+SECTION_TITLES = ["需求分析", "解决方案", "商业模式", "增长策略", "竞争分析"]
+
+# 标题行前缀：Markdown 标记、列表符号、序号（1. / 一、 / (1)）等
+_HEADING_PREFIX = re.compile(r"^[\s#>*\-]*(?:[(（]?[0-9一二三四五]+[.、)）:：]?\s*)?[\s*]*")
+_HEADING_SUFFIX = re.compile(r"^[\s*#:：]*")
+# 列表项标记；列表项只有在整行只是维度名（可带冒号）时才视为标题，“- 商业模式：见下”是正文
+_BULLET = re.compile(r"^[\s>]*[-*+]\s")
+# 流式输入时行首只到达了序号的左括号，如“(”“（”，之后仍可能是“(1) 需求分析”
+_PARTIAL_OPENER = re.compile(r"^[(（]$")
+# 非 Markdown 标题行中，维度名之后只能紧跟这些字符（或行尾），避免“需求分析显示……”这类正文被误判为标题
+_TITLE_TERMINATORS = r"：:（(*#-—\s"
+_TITLE_END = re.compile(f"^(?:$|[{_TITLE_TERMINATORS}])")
+_JSON_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+class SectionSplitter:
+    """增量式分段器：逐块接收流式文本，按五个分析维度归档"""
+
+    def __init__(self, titles: Optional[List[str]] = None):
+        self.titles = titles or SECTION_TITLES
+        self._title_pattern = re.compile("|".join(re.escape(title) for title in self.titles))
+        self.sections: Dict[str, str] = {}
+        self.current: Optional[str] = None
+        self._pending = ""
+        # 当前行是否已有部分内容提前输出（此时该行不可能再是标题）
+        self._midline = False
+
+    def feed(self, chunk: str) -> List[str]:
+        """写入一段文本，返回内容发生变化的维度"""
+        touched = []
+        if self._midline and "\n" not in chunk:
+            # 行中间的文本不可能是标题，直接归档（逐 token 输出时最常见的情况）
+            self._append(chunk, touched)
+            return touched
+        self._pending += chunk
+        end = self._pending.rfind("\n") + 1
+        if end:
+            block, self._pending = self._pending[:end], self._pending[end:]
+            if self._midline:
+                first = block.index("\n") + 1
+                self._append(block[:first], touched)
+                block = block[first:]
+                self._midline = False
+            self._consume_block(block, touched)
+
+        # 未完成的行如果不可能是标题，立即归入当前维度，保证首字尽快展示
+        if self._pending and not self._could_be_heading(self._pending):
+            self._append(self._pending, touched)
+            self._pending = ""
+            self._midline = True
+        return touched
+
+    def close(self) -> Dict[str, str]:
+        """结束输入，返回各维度的完整文本"""
+        if self._pending:
+            if self._midline:
+                self._append(self._pending, [])
+            else:
+                self._consume_block(self._pending, [])
+            self._pending = ""
+            self._midline = False
+        return {title: text.strip() for title, text in self.sections.items()}
+
+    def _consume_block(self, block: str, touched: List[str]):
+        """处理若干完整的行：先搜索维度名定位候选标题行，其余正文整段归档"""
+        pos = 0
+        end = 0
+        for match in self._title_pattern.finditer(block):
+            if match.start() < end:
+                # 同一行内再次出现维度名
+                continue
+            start = block.rfind("\n", 0, match.start()) + 1
+            end = block.find("\n", match.end()) + 1 or len(block)
+            line = block[start:end]
+            title, rest = self._match_heading(line)
+            if title and title in self.sections and title != self.current and not self._is_markdown_heading(line):
+                # 已结束的维度只能由 Markdown 标题重新打开，列表项中提到的维度名视为正文
+                title = None
+            if not title:
+                continue
+            if start > pos:
+                self._append(block[pos:start], touched)
+            pos = end
+            self.current = title
+            self.sections.setdefault(title, "")
+            if title not in touched:
+                touched.append(title)
+            if rest.strip():
+                self._append(rest, touched)
+        if pos < len(block):
+            self._append(block[pos:], touched)
+
+    def _append(self, text: str, touched: List[str]):
+        if self.current is None:
+            # 第一个标题之前的开场白不属于任何维度
+            return
+        self.sections[self.current] += text
+        if self.current not in touched:
+            touched.append(self.current)
+
+    @staticmethod
+    def _is_markdown_heading(line: str) -> bool:
+        return line.lstrip().startswith("#")
+
+    def _match_heading(self, line: str):
+        body = _HEADING_PREFIX.sub("", line, count=1)
+        match = self._title_pattern.match(body)
+        if not match:
+            return None, ""
+        title = match.group()
+        rest = body[len(title):]
+        if not _TITLE_END.match(rest):
+            if not self._is_markdown_heading(line):
+                return None, ""
+            # “## 增长策略与渠道”：维度名之后仍是标题文字，不作为正文
+            rest = ""
+        rest = _HEADING_SUFFIX.sub("", rest, count=1)
+        if rest.strip() and _BULLET.match(line):
+            return None, ""
+        return title, rest
+
+    def _could_be_heading(self, fragment: str) -> bool:
+        body = _HEADING_PREFIX.sub("", fragment, count=1)
+        if not body or _PARTIAL_OPENER.match(body):
+            return True
+        markdown = self._is_markdown_heading(fragment)
+        for title in self.titles:
+            if title.startswith(body):
+                return True
+            if body.startswith(title) and (markdown or _TITLE_END.match(body[len(title):])):
+                return True
+        return False
+
+
+def parse_sections(text: str, titles: Optional[List[str]] = None) -> Dict[str, str]:
+    """一次扫描完整回复，按标题行切分为各维度；与流式分段使用同一套规则"""
+    splitter = SectionSplitter(titles)
+    splitter.feed(text)
+    return splitter.close()
+
+
+def parse_structured_sections(text: str, titles: Optional[List[str]] = None) -> Optional[Dict[str, str]]:
+    """解析 JSON 格式的回复并校验
+
+    回复应为以维度名为键的 JSON 对象（允许包裹在 ```json 代码块中），值为字符串或字符串列表。
+    不是合法的 JSON 对象或没有任何有效维度时返回 None，由调用方退回按标题解析。
+    """
+    titles = titles or SECTION_TITLES
+    body = _JSON_FENCE.sub("", text.strip())
+    start, end = body.find("{"), body.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        data = json.loads(body[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    sections = {}
+    for title in titles:
+        value = data.get(title)
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            value = "\n".join(value)
+        if isinstance(value, str) and value.strip():
+            sections[title] = value.strip()
+    return sections or None
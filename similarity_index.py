@@ -0,0 +1,335 @@
+"""历史项目相似度索引，用于在分析时参考相似的历史案例
+
+中文不分词，直接取 2/3 字符 n-gram 的 TF-IDF 权重，经带符号的特征哈希投影为 dim 维（默认 256）的定长向量；
+查询为一次矩阵-向量乘法加 argpartition 取 top-k，10 万个项目时向量约占 100 MB 内存。
+文档频率表随新增项目增量更新：已入库向量的 IDF 按入库时的统计计算（近似），查询向量使用最新统计；
+更新已入库的记录时不重复计入文档频率。
+"""
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_DIM = 256
+# 文档频率统计的哈希桶数
+DF_BUCKETS = 1 << 18
+NGRAM_SIZES = (2, 3)
+# 各字段的权重（每个字段先归一化再加权，长字段不会淹没短字段）：以项目描述为主，
+# 分析结果只取每个维度开头的一部分，合并为一个字段作为补充
+FIELD_WEIGHTS = {
+    "行业领域": 2.0,
+    "核心产品描述": 2.0,
+    "目标客户": 1.5,
+    "当前挑战": 1.0,
+    "项目名称": 0.5,
+}
+RESULT_WEIGHT = 1.0
+RESULT_CHARS = 300
+# 低于该余弦相似度的结果不返回（256 维哈希投影下无关文本的相似度大致在 ±0.1 以内）
+MIN_SIMILARITY = 0.2
+# 行业、阶段相同时在余弦相似度上的加分
+INDUSTRY_BONUS = 0.1
+STAGE_BONUS = 0.05
+# 案例摘要取自这些维度的第一句话
+SNIPPET_SECTIONS = ("需求分析", "商业模式", "增长策略")
+SNIPPET_CHARS = 40
+
+_NON_WORD = re.compile(r"[\W_]+")
+_SENTENCE = re.compile(r"[^。！？!?\n]+")
+_MARKDOWN = re.compile(r"[*>`]+|^\s*[-\d.、]+\s*")
+_PRIME = np.uint64(1000003)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS similarity_vectors (
+    id INTEGER PRIMARY KEY,
+    project_name TEXT NOT NULL DEFAULT '',
+    industry TEXT NOT NULL DEFAULT '',
+    stage TEXT NOT NULL DEFAULT '',
+    snippet TEXT NOT NULL DEFAULT '',
+    vector BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS similarity_meta (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL
+);
+"""
+
+
+def ngram_hashes(text: str) -> np.ndarray:
+    """去除空白和标点后，计算全部 2/3 字符 n-gram 的 64 位哈希（跨进程稳定）"""
+    text = _NON_WORD.sub("", text.lower())
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    hashes = []
+    for n in NGRAM_SIZES:
+        count = len(codes) - n + 1
+        if count <= 0:
+            continue
+        h = codes[:count].copy()
+        for i in range(1, n):
+            h = h * _PRIME + codes[i:i + count]
+        hashes.append((h + np.uint64(n)) * _MIX)
+    return np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+
+
+def _first_sentence(text: str, limit: int = SNIPPET_CHARS) -> str:
+    for line in text.splitlines():
+        if line.lstrip().startswith("#"):
+            continue
+        line = _MARKDOWN.sub("", line).strip()
+        match = _SENTENCE.search(line)
+        if match and match.group().strip():
+            sentence = match.group().strip()
+            return sentence if len(sentence) <= limit else sentence[:limit] + "…"
+    return ""
+
+
+def make_snippet(analysis_result: Dict[str, str]) -> str:
+    """案例摘要：几个关键维度各取第一句话"""
+    return "；".join(
+        f"{title}：{sentence}" for title in SNIPPET_SECTIONS
+        for sentence in [_first_sentence(analysis_result.get(title, ""))] if sentence
+    )
+
+
+def format_cases(hits: List[Dict[str, Any]]) -> str:
+    """把检索结果整理为紧凑的文本，供 prompt 引用"""
+    lines = []
+    for hit in hits:
+        labels = "，".join(value for value in (hit["行业领域"], hit["项目阶段"]) if value)
+        line = f"- {hit['项目名称']}（{labels + '，' if labels else ''}相似度 {hit['相似度']:.2f}）"
+        if hit["摘要"]:
+            line += f"：{hit['摘要']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+class _Codes:
+    """字符串到整数编码的映射，用于按行业、阶段、项目名向量化比较"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def get(self, value: Optional[str]) -> int:
+        return self._codes.get(value, -1) if value else -1
+
+
+class SimilarityIndex:
+    """历史项目的向量索引：内存中保存全部向量，SQLite 持久化向量、元数据和文档频率，可增量添加
+
+    path 可与历史记录共用同一个数据库文件，默认 ":memory:" 只在进程内有效。
+    """
+
+    def __init__(self, path: str = ":memory:", dim: int = DEFAULT_DIM):
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._names = np.empty(0, dtype=np.int32)
+        self._industries = np.empty(0, dtype=np.int32)
+        self._stages = np.empty(0, dtype=np.int32)
+        self._rows: Dict[int, int] = {}
+        self._size = 0
+        self._name_codes, self._industry_codes, self._stage_codes = _Codes(), _Codes(), _Codes()
+        self._df = np.zeros(DF_BUCKETS, dtype=np.int32)
+        self._count = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def max_id(self) -> int:
+        """已入索引的最大记录 id，用于增量同步"""
+        return int(self._ids[:self._size].max()) if self._size else 0
+
+    def _load(self):
+        meta = dict(self._db.execute("SELECT key, value FROM similarity_meta").fetchall())
+        if meta and int(meta.get("dim", 0)) != self.dim:
+            # 向量维度变化后旧向量无法使用，清空后由 sync 重新建立
+            self._db.execute("DELETE FROM similarity_vectors")
+            self._db.execute("DELETE FROM similarity_meta")
+            self._db.commit()
+            return
+        if "df" in meta:
+            self._df = np.frombuffer(meta["df"], dtype=np.int32).copy()
+            self._count = int(meta["count"])
+        rows = self._db.execute(
+            "SELECT id, project_name, industry, stage, vector FROM similarity_vectors ORDER BY id"
+        ).fetchall()
+        if rows:
+            self._append(
+                [row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows], [row[3] for row in rows],
+                np.frombuffer(b"".join(row[4] for row in rows), dtype=np.float32).reshape(len(rows), self.dim)
+            )
+
+    def _append(self, ids: List[int], names: List[str], industries: List[str], stages: List[str],
+                vectors: np.ndarray):
+        """追加到内存数组；容量不足时按倍数扩容，避免每次添加都复制整个矩阵"""
+        for i, record_id in enumerate(ids):
+            row = self._rows.get(record_id)
+            if row is None:
+                if self._size == len(self._ids):
+                    self._grow(max(1024, self._size * 2))
+                row = self._rows[record_id] = self._size
+                self._size += 1
+            self._ids[row] = record_id
+            self._vectors[row] = vectors[i]
+            self._names[row] = self._name_codes.encode(names[i])
+            self._industries[row] = self._industry_codes.encode(industries[i])
+            self._stages[row] = self._stage_codes.encode(stages[i])
+
+    def _grow(self, capacity: int):
+        for name in ("_ids", "_names", "_industries", "_stages", "_vectors"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    @staticmethod
+    def _texts(project_info: Dict[str, Any], analysis_result: Optional[Dict[str, str]] = None) -> List[Tuple[str, float]]:
+        texts = [(str(project_info[field]), weight) for field, weight in FIELD_WEIGHTS.items() if project_info.get(field)]
+        if analysis_result:
+            texts.append(("\n".join(text[:RESULT_CHARS] for text in analysis_result.values()), RESULT_WEIGHT))
+        return texts
+
+    @staticmethod
+    def _features(texts: List[Tuple[str, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """n-gram 哈希及其对数词频；每个字段的词频向量归一化后乘以字段权重"""
+        hashes, weights = [], []
+        for text, weight in texts:
+            h, counts = np.unique(ngram_hashes(text), return_counts=True)
+            if not len(h):
+                continue
+            tf = 1 + np.log(counts)
+            hashes.append(h)
+            weights.append(weight * tf / np.linalg.norm(tf))
+        if not hashes:
+            return np.empty(0, dtype=np.uint64), np.empty(0)
+        return np.concatenate(hashes), np.concatenate(weights)
+
+    def _project(self, hashes: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """按当前文档频率加权后投影到 dim 维并归一化"""
+        buckets = (hashes >> np.uint64(64 - DF_BUCKETS.bit_length() + 1)).astype(np.intp)
+        idf = np.log((self._count + 1) / (self._df[buckets] + 1)) + 1
+        index = ((hashes >> np.uint64(20)) % np.uint64(self.dim)).astype(np.intp)
+        sign = np.where((hashes >> np.uint64(19)) & np.uint64(1), 1.0, -1.0)
+        vector = np.bincount(index, weights=sign * weights * idf, minlength=self.dim).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def add(self, record_id: int, project_info: Dict[str, Any], analysis_result: Dict[str, str]):
+        self.add_many([(record_id, project_info, analysis_result)])
+
+    def add_many(self, records: Iterable[Tuple[int, Dict[str, Any], Dict[str, str]]]):
+        """批量添加（或更新）历史记录，文档频率表在批次结束时写入一次"""
+        rows = []
+        with self._lock:
+            for record_id, project_info, analysis_result in records:
+                hashes, weights = self._features(self._texts(project_info, analysis_result))
+                if record_id not in self._rows:
+                    buckets = np.unique((hashes >> np.uint64(64 - DF_BUCKETS.bit_length() + 1)).astype(np.intp))
+                    self._df[buckets] += 1
+                    self._count += 1
+                vector = self._project(hashes, weights)
+                name = str(project_info.get("项目名称", ""))
+                industry = str(project_info.get("行业领域", ""))
+                stage = str(project_info.get("项目阶段", ""))
+                self._append([record_id], [name], [industry], [stage], vector[None, :])
+                rows.append((record_id, name, industry, stage, make_snippet(analysis_result), vector.tobytes()))
+            if not rows:
+                return
+            self._db.executemany(
+                "INSERT OR REPLACE INTO similarity_vectors (id, project_name, industry, stage, snippet, vector) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO similarity_meta (key, value) VALUES (?, ?)",
+                [("dim", str(self.dim)), ("count", str(self._count)), ("df", self._df.tobytes())]
+            )
+            self._db.commit()
+
+    def sync(self, history, batch_size: int = 500) -> int:
+        """把历史记录中尚未入索引的记录补充进来，返回新增数量"""
+        added = 0
+        batch = []
+        for record in history.iter_records(after_id=self.max_id):
+            batch.append((record["id"], record["project_info"], record["result"]))
+            if len(batch) >= batch_size:
+                self.add_many(batch)
+                added += len(batch)
+                batch = []
+        self.add_many(batch)
+        return added + len(batch)
+
+    def search(self, project_info: Dict[str, Any], k: int = 3, exclude_name: Optional[str] = None,
+               min_similarity: float = MIN_SIMILARITY) -> List[Dict[str, Any]]:
+        """检索最相似的 k 个历史项目，相似度为余弦相似度
+
+        排序时行业、阶段相同的项目略微加分；exclude_name 排除同名项目（如同一项目的重复分析），
+        相似度低于 min_similarity 的项目不返回。
+        """
+        hashes, weights = self._features(self._texts(project_info))
+        with self._lock:
+            size = self._size
+            if not size or not len(hashes) or k <= 0:
+                return []
+            query = self._project(hashes, weights)
+            vectors, ids = self._vectors[:size], self._ids[:size]
+            industries, stages, names = self._industries[:size], self._stages[:size], self._names[:size]
+            industry = self._industry_codes.get(project_info.get("行业领域"))
+            stage = self._stage_codes.get(project_info.get("项目阶段"))
+            excluded = self._name_codes.get(exclude_name)
+            name_values = self._name_codes.values
+            industry_values, stage_values = self._industry_codes.values, self._stage_codes.values
+
+        similarity = vectors @ query
+        scores = similarity.copy()
+        if industry >= 0:
+            scores += INDUSTRY_BONUS * (industries == industry)
+        if stage >= 0:
+            scores += STAGE_BONUS * (stages == stage)
+        scores[similarity < min_similarity] = -np.inf
+        if excluded >= 0:
+            scores[names == excluded] = -np.inf
+        k = min(k, size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        if not len(top):
+            return []
+
+        top_ids = [int(ids[i]) for i in top]
+        with self._lock:
+            snippets = dict(self._db.execute(
+                f"SELECT id, snippet FROM similarity_vectors WHERE id IN ({','.join('?' * len(top_ids))})", top_ids
+            ).fetchall())
+        return [
+            {
+                "id": int(ids[i]),
+                "项目名称": name_values[names[i]],
+                "行业领域": industry_values[industries[i]],
+                "项目阶段": stage_values[stages[i]],
+                "相似度": round(float(similarity[i]), 4),
+                "摘要": snippets.get(int(ids[i]), ""),
+            }
+            for i in top
+        ]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
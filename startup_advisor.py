@@ -1,3 +1,11 @@
+import numpy as np
+
+from financial_projection import (
+    DEFAULT_SCENARIOS, CachedProjection, ProjectionAssumptions, ProjectionResult, checkpoint_months,
+    percentile_summary
+)
+
+
 class StartupAdvisor:
     def __init__(self):
         self.expertise_areas = {
@@ -9,6 +17,10 @@ class StartupAdvisor:
         }
         self.current_analysis = {}
         self.industry_insights = {}
+        # 财务预测假设与蒙特卡洛场景数，可通过 set_financial_assumptions 按项目实际情况调整
+        self.financial_assumptions = ProjectionAssumptions()
+        self.projection_scenarios = DEFAULT_SCENARIOS
+        self._projection = CachedProjection()
         
     def analyze_needs(self, startup_info):
         """分析创业需求"""
@@ -17,8 +29,21 @@ class StartupAdvisor:
             if area in startup_info:
                 analysis[area] = startup_info[area]
         self.current_analysis["needs"] = analysis
+        # 新的一次分析重新抽样推演
+        self._projection.clear()
         return analysis
 
+    def set_financial_assumptions(self, **assumptions):
+        """更新财务预测假设（字段见 ProjectionAssumptions），已有的预测结果随之失效"""
+        for name, value in assumptions.items():
+            if not hasattr(self.financial_assumptions, name):
+                raise ValueError(f"未知的财务假设：{name}")
+            setattr(self.financial_assumptions, name, value)
+
+    def project_financials(self) -> ProjectionResult:
+        """按当前假设做蒙特卡洛财务推演；同一次分析中的各项财务指标共享一次推演结果"""
+        return self._projection.get(self.financial_assumptions, self.projection_scenarios)
+
     def provide_solution(self):
         """提供解决方案"""
         if not self.current_analysis.get("needs"):
@@ -72,6 +97,40 @@ class StartupAdvisor:
             "预期收入": self._forecast_revenue(),
             "回收周期": self._calculate_payback_period()
         }
+
+    def _estimate_initial_investment(self):
+        """前期投入及含前期亏损在内的总资金需求（各场景分位数，元）"""
+        projection = self.project_financials()
+        return {
+            "前期投入": percentile_summary(projection.assumptions["initial_investment"]),
+            "资金需求": percentile_summary(projection.funding_need),
+        }
+
+    def _estimate_operating_costs(self):
+        """各检查点月份的月运营成本（含变动成本、固定成本和获客支出）"""
+        projection = self.project_financials()
+        return {
+            f"第{month}个月": percentile_summary(projection.operating_costs[:, month - 1])
+            for month in checkpoint_months(projection.months)
+        }
+
+    def _forecast_revenue(self):
+        """各检查点月份的月收入"""
+        projection = self.project_financials()
+        return {
+            f"第{month}个月": percentile_summary(projection.revenue[:, month - 1])
+            for month in checkpoint_months(projection.months)
+        }
+
+    def _calculate_payback_period(self):
+        """回本月份（累计现金流转正）与预测期内的回本概率；月份分位数只统计预测期内回本的场景"""
+        projection = self.project_financials()
+        payback = projection.payback_month
+        return {
+            "回本概率": round(float(np.mean(~np.isnan(payback))), 4),
+            "回本月份": percentile_summary(payback),
+            "盈亏平衡月份": percentile_summary(projection.breakeven_month),
+        }
         
     def validate_solution(self, solution):
         """验证解决方案可行性"""
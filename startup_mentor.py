@@ -0,0 +1,224 @@
+"""命令行入口：脱离 Streamlit 界面批量分析创业项目
+
+用法示例：
+    python -m startup_mentor batch cohort.jsonl -o results.jsonl --workers 8
+
+输入为 JSONL 或 CSV，每条记录的字段与界面表单一致（项目名称、项目阶段、融资情况、
+行业领域、目标客户、核心产品描述、当前挑战），可选字段 id 用于断点续跑时识别记录，
+可选字段“附件”为项目文件路径（相对路径基于 --files-dir 或输入文件所在目录）。
+结果逐条追加写入 JSONL；中断后以相同参数重新运行，会跳过已成功的记录。
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, Set, Tuple
+
+from analysis_engine import (
+    AnalysisEngine, FILE_CONTEXT_TOKENS, FILE_TEXT_LIMIT, MODE_PARALLEL, MODE_WHOLE, SUMMARY_CHUNK_TOKENS,
+    SUMMARY_CONCURRENCY, SUMMARY_MAX_CHUNKS
+)
+from document_ingestion import default_ingestor
+from history_store import HistoryStore
+from prompt_templates import DEFAULT_LANGUAGE
+from rate_limiter import DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE, PRIORITY_BATCH, RateLimiter
+from similarity_index import SimilarityIndex
+from tracing import tracer
+
+MODES = {"whole": MODE_WHOLE, "parallel": MODE_PARALLEL}
+# 同时提交到线程池的记录数为并发数的倍数，避免中断时大量排队的记录仍被发出
+IN_FLIGHT_FACTOR = 2
+# 记录中不属于项目信息的字段
+RESERVED_FIELDS = ("id", "附件")
+
+
+def read_records(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """读取 JSONL 或 CSV 输入，返回 (记录 id, 记录) 序列"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for number, record in enumerate(rows, 1):
+            record_id = str(record.get("id") or f"line-{number}")
+            yield record_id, record
+
+
+def load_completed(output_path: str) -> Set[str]:
+    """读取已有输出中成功完成的记录 id，用于断点续跑"""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # 中断时可能留下写了一半的最后一行
+                continue
+            if result.get("status") == "ok":
+                completed.add(result["id"])
+    return completed
+
+
+def build_project_info(record: Dict[str, Any], files_dir: str) -> Dict[str, Any]:
+    """把输入记录转换为分析用的 project_info，附件在此解析为文本"""
+    project_info = {
+        key: value for key, value in record.items()
+        if key not in RESERVED_FIELDS and value not in ("", None)
+    }
+    attachment = record.get("附件")
+    if attachment:
+        path = attachment if os.path.isabs(attachment) else os.path.join(files_dir, attachment)
+        with open(path, "rb") as f:
+            document = default_ingestor.ingest(os.path.basename(path), f.read(), max_chars=FILE_TEXT_LIMIT)
+        project_info["上传文件"] = document.name
+        project_info["文件内容"] = document.text
+    return project_info
+
+
+def run_batch(args) -> int:
+    api_key = args.api_key or os.environ.get("AI302_API_KEY")
+    if not api_key:
+        print("请通过 --api-key 或环境变量 AI302_API_KEY 设置 302AI API Key", file=sys.stderr)
+        return 2
+
+    output = args.output or os.path.splitext(args.input)[0] + ".results.jsonl"
+    files_dir = args.files_dir or os.path.dirname(os.path.abspath(args.input))
+    mode = MODES[args.mode]
+
+    completed = load_completed(output)
+    pending = [(record_id, record) for record_id, record in read_records(args.input) if record_id not in completed]
+    total = len(pending)
+    print(f"待分析 {total} 条，已完成 {len(completed)} 条，结果写入 {output}", file=sys.stderr)
+    if not pending:
+        return 0
+
+    tracer.log_path = args.trace_log
+    # 批处理以较低优先级排队，限额为 0 时不限制
+    rate_limiter = RateLimiter(requests_per_minute=args.rpm or None, tokens_per_minute=args.tpm or None)
+    similarity = None
+    if args.similar_db:
+        # 索引只在内存中建立，不写入历史数据库
+        similarity = SimilarityIndex()
+        similarity.sync(HistoryStore(args.similar_db))
+    engine = AnalysisEngine.from_settings(
+        api_key, args.api_url, cache_path=args.cache,
+        pool_size=max(10, args.workers * (args.section_workers if mode == MODE_PARALLEL else 1)),
+        rate_limiter=rate_limiter, priority=PRIORITY_BATCH, structured_output=args.structured,
+        language=args.language, similarity=similarity, summary_chunk_tokens=args.summary_chunk_tokens,
+        summary_concurrency=args.summary_concurrency, file_context_tokens=args.file_context_tokens,
+        summary_max_chunks=args.summary_max_chunks
+    )
+
+    def analyze(record_id: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.monotonic()
+        result = {"id": record_id, "项目名称": record.get("项目名称", "")}
+        try:
+            with tracer.trace("batch.record", id=record_id, mode=mode):
+                with tracer.span("document.load"):
+                    project_info = build_project_info(record, files_dir)
+                analysis, cached = engine.run_analysis(project_info, mode, args.section_workers)
+                if not analysis:
+                    raise ValueError("模型返回的内容中未识别出任何分析维度")
+            result.update(status="ok", cached=cached, prompt_version=engine.prompt_version(project_info, mode),
+                          result=analysis)
+        except Exception as e:
+            result.update(status="error", error=str(e))
+        result["elapsed"] = round(time.monotonic() - started, 3)
+        return result
+
+    failures = 0
+    done = 0
+    records = iter(pending)
+    in_flight = set()
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+
+    def submit_next() -> bool:
+        record = next(records, None)
+        if record is not None:
+            in_flight.add(executor.submit(analyze, *record))
+        return record is not None
+
+    def write_result(result: Dict[str, Any]):
+        nonlocal failures, done
+        done += 1
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+        if result["status"] != "ok":
+            failures += 1
+        print(f"[{done}/{total}] {result['id']} {result['项目名称']} {result['status']} {result['elapsed']:.1f}s",
+              file=sys.stderr)
+
+    with open(output, "a", encoding="utf-8") as out:
+        try:
+            # 最多同时提交 IN_FLIGHT_FACTOR 倍于并发数的记录，完成一条再补充一条，
+            # 中断时只有正在分析的记录会继续请求接口
+            for _ in range(max(1, args.workers) * IN_FLIGHT_FACTOR):
+                if not submit_next():
+                    break
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    in_flight.discard(future)
+                    write_result(future.result())
+                    submit_next()
+        except BaseException as e:
+            # 取消尚未开始的记录，等待正在分析的记录结束并写入结果，重新运行时从断点继续
+            executor.shutdown(wait=True, cancel_futures=True)
+            for future in in_flight:
+                if not future.cancelled():
+                    write_result(future.result())
+            engine.client.close()
+            if not isinstance(e, KeyboardInterrupt):
+                raise
+            print(f"已中断：完成 {done} 条，未分析 {total - done} 条，以相同参数重新运行可继续", file=sys.stderr)
+            return 130
+    executor.shutdown()
+
+    engine.client.close()
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(tracer.prometheus())
+    print(f"完成：成功 {total - failures} 条，失败 {failures} 条", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="startup_mentor", description="创业指导系统命令行工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser("batch", help="批量分析 JSONL/CSV 中的项目")
+    batch.add_argument("input", help="输入文件（.jsonl 或 .csv）")
+    batch.add_argument("-o", "--output", help="输出 JSONL 文件，默认为 <输入文件名>.results.jsonl")
+    batch.add_argument("--workers", type=int, default=4, help="同时分析的项目数")
+    batch.add_argument("--mode", choices=sorted(MODES), default="whole",
+                       help="whole 为整体分析，parallel 为分维度并行分析")
+    batch.add_argument("--section-workers", type=int, default=3, help="分维度并行时每个项目的并发请求数")
+    batch.add_argument("--files-dir", help="附件相对路径的根目录，默认为输入文件所在目录")
+    batch.add_argument("--api-key", help="302AI API Key，默认读取环境变量 AI302_API_KEY")
+    batch.add_argument("--api-url", default=os.environ.get("AI302_API_URL"), help="接口地址，默认读取环境变量 AI302_API_URL")
+    batch.add_argument("--cache", help="SQLite 结果缓存路径，重复运行时复用已有分析")
+    batch.add_argument("--rpm", type=float, default=DEFAULT_REQUESTS_PER_MINUTE, help="每分钟最多请求数，0 为不限制")
+    batch.add_argument("--tpm", type=float, default=DEFAULT_TOKENS_PER_MINUTE, help="每分钟最多 token 数（预估），0 为不限制")
+    batch.add_argument("--structured", action="store_true", help="整体分析时要求模型以 JSON 返回各维度，解析失败时按标题切分")
+    batch.add_argument("--language", default=DEFAULT_LANGUAGE, help="prompt 模板语言（zh/en），分析维度名保持不变")
+    batch.add_argument("--summary-chunk-tokens", type=int, default=SUMMARY_CHUNK_TOKENS, help="附件摘要每块的 token 数")
+    batch.add_argument("--summary-concurrency", type=int, default=SUMMARY_CONCURRENCY, help="附件摘要的并发请求数")
+    batch.add_argument("--file-context-tokens", type=int, default=FILE_CONTEXT_TOKENS, help="附件摘要纳入 prompt 的 token 预算")
+    batch.add_argument("--summary-max-chunks", type=int, default=SUMMARY_MAX_CHUNKS,
+                       help="附件摘要每轮最多的分块请求数，超长文件的块会合并截取，0 为不限制")
+    batch.add_argument("--similar-db", help="历史记录数据库（如界面使用的 analysis_history.db），分析时在 prompt 中引用其中的相似项目")
+    batch.add_argument("--trace-log", help="逐条写入每个项目各阶段耗时的 JSON Lines 文件")
+    batch.add_argument("--metrics", help="运行结束后写入 Prometheus 文本格式的汇总指标")
+    batch.set_defaults(handler=run_batch)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
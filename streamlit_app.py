@@ -1,99 +1,361 @@
 import streamlit as st
-import pandas as pd
-from docx import Document
-import io
-from PyPDF2 import PdfReader
-import requests
+import hashlib
+import json
+import time
 from typing import Dict, Any
+from datetime import datetime
+from analysis_engine import (
+    AnalysisEngine, FILE_CONTEXT_TOKENS, FILE_TEXT_LIMIT, MODE_PARALLEL, MODE_STREAM, MODE_WHOLE, SIMILAR_CASES,
+    SUMMARY_CHUNK_TOKENS, SUMMARY_CONCURRENCY, SUMMARY_MAX_CHUNKS
+)
+from document_ingestion import DOCX_MIME, default_ingestor
+from history_store import HistoryStore
+from job_queue import JobQueue, JobWorkerPool, STATUS_DONE, STATUS_FAILED, STATUS_QUEUED
+from llm_client import DEFAULT_API_URL
+from rate_limiter import DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE, PRIORITY_INTERACTIVE, RateLimiter
+from pdf_extractor import extract_pdf_text
+from prompt_templates import DEFAULT_LANGUAGE
+from section_parser import SECTION_TITLES
+from similarity_index import SimilarityIndex
+from tracing import tracer
+
+PROJECT_STAGES = ["概念阶段", "产品研发", "市场验证", "规模化"]
+# 历史记录每页条数及列表列名
+HISTORY_PAGE_SIZE = 20
+HISTORY_COLUMN_LABELS = {
+    "id": "编号",
+    "created_at": "分析时间",
+    "project_name": "项目名称",
+    "industry": "行业领域",
+    "stage": "项目阶段",
+    "funding": "融资情况",
+    "mode": "分析模式"
+}
+
+# 会话中缓存的 Word 文档数量上限
+SESSION_DOCX_LIMIT = 8
+# 任务未结束时界面刷新进度的间隔（秒）
+JOB_POLL_INTERVAL = 1.0
+# 调试面板展示的最近请求数
+DEBUG_TRACE_COUNT = 10
+# 分析结果下方展示的相似项目数
+SIMILAR_PROJECTS_SHOWN = 5
+
+
+def _secret_limit(name: str, default):
+    """读取限额配置，0 表示不限制"""
+    value = st.secrets.get(name, default)
+    return float(value) if value else None
+
+
+@st.cache_resource
+def init_tracing():
+    """配置埋点导出：TRACE_LOG_PATH 逐行写入每次分析的耗时分解，METRICS_PORT 启动 Prometheus /metrics 端点"""
+    tracer.log_path = st.secrets.get('TRACE_LOG_PATH')
+    if st.secrets.get('METRICS_PORT'):
+        tracer.serve(int(st.secrets['METRICS_PORT']), st.secrets.get('METRICS_HOST', '127.0.0.1'))
+    return tracer
+
+
+@st.cache_resource
+def get_rate_limiter() -> RateLimiter:
+    """进程内所有会话共享的出站限流器：全局及按 API Key 的每分钟请求数、token 数"""
+    return RateLimiter(
+        requests_per_minute=_secret_limit('LLM_REQUESTS_PER_MINUTE', DEFAULT_REQUESTS_PER_MINUTE),
+        tokens_per_minute=_secret_limit('LLM_TOKENS_PER_MINUTE', DEFAULT_TOKENS_PER_MINUTE),
+        key_requests_per_minute=_secret_limit('LLM_KEY_REQUESTS_PER_MINUTE', None),
+        key_tokens_per_minute=_secret_limit('LLM_KEY_TOKENS_PER_MINUTE', None)
+    )
+
+
+@st.cache_resource
+def get_engine(api_key: str, api_url: str, cache_path: str = None, history_path: str = None) -> AnalysisEngine:
+    """分析引擎（HTTP 连接池、结果缓存）按配置在进程内只创建一次，所有会话共享
+
+    设置 STRUCTURED_OUTPUT 后整体分析要求模型以 JSON 返回各维度；PROMPT_LANGUAGE 选择 prompt 模板的语言；
+    SIMILAR_CASES 为 prompt 中引用的相似历史项目数，0 表示不引用。上传文件摘要的分块大小、并发数、
+    纳入 prompt 的 token 预算和每轮最多的分块请求数分别由 SUMMARY_CHUNK_TOKENS、SUMMARY_CONCURRENCY、
+    FILE_CONTEXT_TOKENS、SUMMARY_MAX_CHUNKS 配置。
+    """
+    return AnalysisEngine.from_settings(
+        api_key, api_url, cache_path=cache_path,
+        rate_limiter=get_rate_limiter(), priority=PRIORITY_INTERACTIVE,
+        structured_output=bool(st.secrets.get('STRUCTURED_OUTPUT', False)),
+        language=st.secrets.get('PROMPT_LANGUAGE', DEFAULT_LANGUAGE),
+        similarity=get_similarity_index(history_path) if history_path else None,
+        similar_cases=int(st.secrets.get('SIMILAR_CASES', SIMILAR_CASES)),
+        summary_chunk_tokens=int(st.secrets.get('SUMMARY_CHUNK_TOKENS', SUMMARY_CHUNK_TOKENS)),
+        summary_concurrency=int(st.secrets.get('SUMMARY_CONCURRENCY', SUMMARY_CONCURRENCY)),
+        file_context_tokens=int(st.secrets.get('FILE_CONTEXT_TOKENS', FILE_CONTEXT_TOKENS)),
+        summary_max_chunks=int(st.secrets.get('SUMMARY_MAX_CHUNKS', SUMMARY_MAX_CHUNKS))
+    )
+
+
+@st.cache_resource
+def get_processor():
+    """文档处理器依赖 python-docx，首次生成 Word 文档时才导入和创建"""
+    from document_processor import DocumentProcessor
+    return DocumentProcessor()
+
+
+@st.cache_resource
+def get_history(path: str) -> HistoryStore:
+    return HistoryStore(path)
+
+
+@st.cache_resource
+def get_similarity_index(history_path: str) -> SimilarityIndex:
+    """相似项目索引与历史记录共用同一数据库文件，启动时补入尚未索引的历史记录"""
+    index = SimilarityIndex(history_path)
+    index.sync(get_history(history_path))
+    return index
+
+
+@st.cache_resource
+def get_job_workers(path: str, workers: int, api_key: str, api_url: str,
+                    cache_path: str = None, history_path: str = None) -> JobWorkerPool:
+    """后台 worker 在进程内只启动一次，所有会话共享同一任务队列"""
+    return JobWorkerPool(
+        JobQueue(path),
+        get_engine(api_key, api_url, cache_path, history_path),
+        get_history(history_path) if history_path else None,
+        workers=workers,
+        similarity=get_similarity_index(history_path) if history_path else None
+    ).start()
+
 
 class StartupMentorSystem:
     def __init__(self):
         st.set_page_config(page_title="创业指导系统", layout="wide")
+        init_tracing()
+        history_path = st.secrets.get('HISTORY_DB_PATH', 'analysis_history.db')
         # 设置 302AI API key
         if 'AI302_API_KEY' not in st.secrets:
             st.sidebar.warning('请设置 302AI API Key')
         else:
             self.api_key = st.secrets['AI302_API_KEY']
-            self.api_url = "https://api.302.ai/v1/chat/completions"  # 302AI的API地址
-    
-    def analyze_with_claude(self, project_info: Dict[str, Any]) -> Dict[str, str]:
-        """使用 Claude 分析项目信息"""
-        # 构建 prompt
-        prompt = f"""作为一个创业顾问，请分析以下创业项目：
-        
-项目名称：{project_info.get('项目名称', 'N/A')}
-项目阶段：{project_info.get('项目阶段', 'N/A')}
-融资情况：{project_info.get('融资情况', 'N/A')}
-行业领域：{project_info.get('行业领域', 'N/A')}
-目标客户：{project_info.get('目标客户', 'N/A')}
-核心产品：{project_info.get('核心产品描述', 'N/A')}
-当前挑战：{project_info.get('当前挑战', 'N/A')}
-
-请从以下几个方面进行分析：
-1. 需求分析：评估市场需求的真实性和规模
-2. 解决方案：分析产品/服务的创新性和可行性
-3. 商业模式：评估商业模式的合理性和盈利能力
-4. 增长策略：建议合适的市场策略和增长路径
-5. 竞争分析：分析竞争优势和潜在风险
-
-对于每个方面，请给出具体的建议和可执行的行动方案。"""
-
-        if "上传文件" in project_info and "文件内容" in project_info:
-            prompt += f"\n\n此外，请结合以下项目文件内容进行分析：\n{project_info['文件内容'][:2000]}"
-
-        try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "model": "claude-3-opus-20240229",  # 使用最新的 Claude 3 模型
-                "messages": [
-                    {"role": "system", "content": "你是一位经验丰富的创业顾问，擅长分析创业项目并提供专业建议。"},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 4000
-            }
-            
-            response = requests.post(self.api_url, headers=headers, json=data)
-            response.raise_for_status()  # 检查请求是否成功
-            
-            # 解析返回结果
-            result = response.json()
-            analysis = result['choices'][0]['message']['content']
+            # 302AI的API地址，可通过 AI302_API_URL 指向本地模拟服务进行测试
+            self.api_url = st.secrets.get('AI302_API_URL', DEFAULT_API_URL)
+            # 分析结果缓存，设置 ANALYSIS_CACHE_PATH 后结果会持久化到磁盘，重启后仍可命中
+            self.engine = get_engine(self.api_key, self.api_url, st.secrets.get('ANALYSIS_CACHE_PATH'), history_path)
+            # 分析任务在后台 worker 中执行，界面只负责提交任务和轮询进度
+            self.jobs = get_job_workers(
+                st.secrets.get('JOB_DB_PATH', 'analysis_jobs.db'),
+                int(st.secrets.get('JOB_WORKERS', 2)),
+                self.api_key, self.api_url, st.secrets.get('ANALYSIS_CACHE_PATH'), history_path
+            )
+        self.history = get_history(history_path)
+        # 相似项目索引：分析时检索相似案例纳入 prompt，结果页展示相似项目
+        self.similarity = get_similarity_index(history_path)
+
+    def _render_result(self, container, analysis_result: Dict[str, str]):
+        """在指定容器中展示完整的分析结果"""
+        container.write("## 分析结果")
+        
+        # 创建两列布局显示结果
+        col1, col2 = container.columns(2)
+        
+        with col1:
+            st.subheader("需求分析")
+            st.write(analysis_result.get("需求分析", ""))
             
-            # 将分析结果分段
-            sections = analysis.split('\n\n')
-            result = {}
-            current_section = ""
+            st.subheader("解决方案")
+            st.write(analysis_result.get("解决方案", ""))
             
-            for section in sections:
-                if "需求分析" in section:
-                    result["需求分析"] = section
-                elif "解决方案" in section:
-                    result["解决方案"] = section
-                elif "商业模式" in section:
-                    result["商业模式"] = section
-                elif "增长策略" in section:
-                    result["增长策略"] = section
-                elif "竞争分析" in section:
-                    result["竞争分析"] = section
+            st.subheader("商业模式")
+            st.write(analysis_result.get("商业模式", ""))
             
-            return result
+        with col2:
+            st.subheader("增长策略")
+            st.write(analysis_result.get("增长策略", ""))
             
-        except Exception as e:
-            st.error(f"分析过程中出现错误：{str(e)}")
-            return {}
+            st.subheader("竞争分析")
+            st.write(analysis_result.get("竞争分析", ""))
+
+    def _build_report_markdown(self, project_name: str, analysis_result: Dict[str, str]) -> str:
+        """生成 Markdown 格式的分析报告"""
+        return "\n\n".join([
+            f"# {project_name} - 创业项目分析报告\n",
+            "## 需求分析",
+            analysis_result.get("需求分析", ""),
+            "## 解决方案",
+            analysis_result.get("解决方案", ""),
+            "## 商业模式",
+            analysis_result.get("商业模式", ""),
+            "## 增长策略",
+            analysis_result.get("增长策略", ""),
+            "## 竞争分析",
+            analysis_result.get("竞争分析", "")
+        ])
+
+    def _render_downloads(self, container, project_info: Dict[str, Any], analysis_result: Dict[str, str], key: str = ""):
+        """提供 Markdown 报告和 Word 版解决方案下载"""
+        project_name = project_info.get("项目名称", "")
+        container.download_button(
+            "下载完整分析报告",
+            self._build_report_markdown(project_name, analysis_result),
+            file_name=f"{project_name}-创业分析报告.md",
+            mime="text/markdown",
+            key=f"download_md{key}"
+        )
+        
+        # Word 版解决方案直接在内存中生成，不写临时文件
+        container.download_button(
+            "下载 Word 版解决方案",
+            self._solution_docx(project_info, analysis_result),
+            file_name=f"{project_name}-解决方案.docx",
+            mime=DOCX_MIME,
+            key=f"download_docx{key}"
+        )
+
+    def _solution_docx(self, project_info: Dict[str, Any], analysis_result: Dict[str, str]) -> bytes:
+        """生成 Word 版解决方案，结果按内容缓存在会话中，重跑脚本时无需重新生成"""
+        key = hashlib.sha256(
+            json.dumps([project_info, analysis_result], ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        documents = st.session_state.setdefault("solution_docx", {})
+        if key not in documents:
+            if len(documents) >= SESSION_DOCX_LIMIT:
+                documents.clear()
+            processor = get_processor()
+            documents[key] = processor.render_solution_document(
+                processor.build_consultation_data(project_info, analysis_result)
+            )
+        return documents[key]
+
+    def _render_job(self, job_id: str) -> bool:
+        """展示分析任务的进度或结果，任务尚未结束时返回 True"""
+        job = self.jobs.queue.get(job_id)
+        if job is None:
+            st.info('请在"项目信息"标签页填写信息并点击"开始分析"')
+            return False
+        
+        if job["status"] == STATUS_QUEUED:
+            st.info(f"任务排队中，前面还有 {job['position']} 个任务")
+            return True
+        if job["status"] == STATUS_FAILED:
+            st.error(f"分析过程中出现错误：{job['error']}")
+            return False
+        
+        meta = job["meta"] or {}
+        timings = meta.get("timings", {})
+        if job["status"] != STATUS_DONE:
+            # 流式和分维度并行模式下先展示已生成的维度
+            self._render_result(st, job["progress"] or {})
+            st.info(f"正在分析中...（已用时 {time.time() - job['started_at']:.0f} 秒）")
+            return True
+        
+        with tracer.span("render.result"):
+            self._render_result(st, job["result"])
+        if job["cached"]:
+            st.caption("命中缓存，已直接返回历史分析结果")
+        elif "ttfb" in timings:
+            st.caption(f"首字节耗时 {timings['ttfb']:.2f} 秒")
+        elif job["mode"] == MODE_PARALLEL:
+            st.caption("各维度耗时：" + "，".join(
+                f"{title} {timings[title]:.1f}s" for title in SECTION_TITLES if title in timings
+            ))
+        for title, error in meta.get("errors", {}).items():
+            st.warning(f"{title}失败：{error}")
+        for warning in meta.get("warnings", []):
+            st.warning(warning)
+        with tracer.span("render.downloads"):
+            self._render_downloads(st, job["project_info"], job["result"])
+        with tracer.span("render.similar"):
+            self._render_similar_projects(job["project_info"])
+        return False
+
+    def _render_similar_projects(self, project_info: Dict[str, Any]):
+        """分析结果下方列出相似的历史项目（排除同名项目），可在“历史记录”标签页按编号查看详情"""
+        hits = self.similarity.search(project_info, SIMILAR_PROJECTS_SHOWN, exclude_name=project_info.get("项目名称"))
+        if not hits:
+            return
+        with st.expander("相似项目"):
+            for hit in hits:
+                labels = "，".join(value for value in (hit["行业领域"], hit["项目阶段"]) if value)
+                st.markdown(f"**{hit['项目名称']}**（{labels + '，' if labels else ''}编号 {hit['id']}）"
+                            f" 相似度 {hit['相似度']:.2f}")
+                if hit["摘要"]:
+                    st.caption(hit["摘要"])
+
+    def _render_debug_panel(self):
+        """侧边栏调试面板：各阶段耗时汇总、计数器与最近几次分析的耗时分解"""
+        import pandas as pd
+        
+        summary = tracer.summary()
+        if not summary:
+            st.caption("暂无埋点数据")
+            return
+        st.dataframe(pd.DataFrame(summary).set_index("name"), use_container_width=True)
+        st.json(tracer.counters(), expanded=False)
+        if hasattr(self, "engine") and self.engine.client.rate_limiter is not None:
+            st.caption("限流器：" + "，".join(
+                f"{name} {value:.0f}" for name, value in self.engine.client.rate_limiter.stats().items()
+            ))
+        
+        traces = tracer.recent(DEBUG_TRACE_COUNT)
+        for trace in traces:
+            label = f"{datetime.fromtimestamp(trace['started_at']).strftime('%H:%M:%S')} {trace['name']} {trace['duration_ms']:.0f}ms"
+            with st.expander(label + ("（失败）" if trace["error"] else "")):
+                st.dataframe(pd.DataFrame([
+                    {
+                        "阶段": "　" * (span["depth"] - 1) + span["name"],
+                        "开始(ms)": span["offset_ms"],
+                        "耗时(ms)": span["duration_ms"],
+                        "详情": json.dumps(span["attrs"], ensure_ascii=False)
+                    }
+                    for span in trace["spans"]
+                ]), hide_index=True, use_container_width=True)
+        st.download_button(
+            "导出 Prometheus 指标", tracer.prometheus(), file_name="metrics.txt", mime="text/plain",
+            key="debug_metrics"
+        )
+        st.download_button(
+            "导出最近请求（JSON Lines）",
+            "\n".join(json.dumps(trace, ensure_ascii=False) for trace in traces),
+            file_name="traces.jsonl", mime="application/json", key="debug_traces"
+        )
+
+    def _render_history(self):
+        """历史记录：分页列出摘要，选中某条记录后才读取完整内容"""
+        col1, col2, col3 = st.columns([2, 1, 1])
+        search = col1.text_input("搜索项目名称或分析内容", key="history_search")
+        industry = col2.selectbox("行业领域", ["全部"] + self.history.distinct_values("industry"), key="history_industry")
+        stage = col3.selectbox("项目阶段", ["全部"] + PROJECT_STAGES, key="history_stage")
+        page = st.number_input("页码", min_value=1, value=1, step=1, key="history_page")
+        
+        rows, total = self.history.query(
+            search=search,
+            industry=None if industry == "全部" else industry,
+            stage=None if stage == "全部" else stage,
+            page=page,
+            page_size=HISTORY_PAGE_SIZE
+        )
+        st.caption(f"共 {total} 条记录，第 {page}/{max(1, -(-total // HISTORY_PAGE_SIZE))} 页")
+        if not rows:
+            st.info("暂无历史记录")
+            return
+        
+        import pandas as pd
+        
+        for row in rows:
+            row["created_at"] = datetime.fromtimestamp(row["created_at"]).strftime("%Y-%m-%d %H:%M")
+        st.dataframe(
+            pd.DataFrame(rows).rename(columns=HISTORY_COLUMN_LABELS),
+            hide_index=True,
+            use_container_width=True
+        )
+        
+        options = {f"#{row['id']} {row['project_name']}（{row['created_at']}）": row["id"] for row in rows}
+        selected = st.selectbox("查看记录详情", list(options), index=None, key="history_selected")
+        if selected:
+            record = self.history.get(options[selected])
+            self._render_result(st, record["result"])
+            self._render_downloads(st, record["project_info"], record["result"], key=f"_history_{record['id']}")
 
     def extract_text_from_pdf(self, pdf_file) -> str:
-        """从PDF文件中提取文本"""
-        pdf_reader = PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        """从PDF文件中提取文本，只提取 prompt 实际用得到的部分"""
+        return extract_pdf_text(pdf_file, max_chars=FILE_TEXT_LIMIT)
 
     def run(self):
         st.title("创业指导系统")
@@ -109,6 +371,16 @@ class StartupMentorSystem:
             4. 增长策略
             5. 竞争分析
             """)
+            analysis_mode = st.radio(
+                "分析模式",
+                [MODE_STREAM, MODE_PARALLEL, MODE_WHOLE],
+                help="流式输出边生成边展示；分维度并行对五个维度分别并发请求"
+            )
+            max_workers = 3
+            if analysis_mode == MODE_PARALLEL:
+                max_workers = st.slider("并发请求数", min_value=1, max_value=len(SECTION_TITLES), value=3)
+            if st.checkbox("显示性能调试面板"):
+                self._render_debug_panel()
         
         # 主要标签页
         tab1, tab2, tab3 = st.tabs(["项目信息", "分析结果", "历史记录"])
@@ -120,7 +392,7 @@ class StartupMentorSystem:
                 # 手动输入表单
                 st.subheader("项目基本信息")
                 project_name = st.text_input("项目名称")
-                project_stage = st.selectbox("项目阶段", ["概念阶段", "产品研发", "市场验证", "规模化"])
+                project_stage = st.selectbox("项目阶段", PROJECT_STAGES)
                 funding_status = st.selectbox("融资情况", ["未融资", "天使轮", "A轮", "B轮及以上"])
                 industry = st.text_input("行业领域")
                 target_users = st.text_input("目标客户")
@@ -139,18 +411,17 @@ class StartupMentorSystem:
                 if uploaded_file is not None:
                     st.success(f"文件 {uploaded_file.name} 上传成功！")
                     
-                    # 读取文件内容
+                    # 读取文件内容（相同文件只解析一次，后续重跑直接命中缓存）
                     try:
-                        if uploaded_file.type == "application/pdf":
-                            text_content = self.extract_text_from_pdf(uploaded_file)
-                            st.info("PDF文件已接收，系统将进行分析")
-                        elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                            doc = Document(uploaded_file)
-                            text_content = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-                            st.info("Word文档已接收，系统将进行分析")
-                        else:  # txt文件
-                            text_content = uploaded_file.getvalue().decode("utf-8")
-                            st.info("文本文件已接收，系统将进行分析")
+                        document = default_ingestor.ingest(
+                            uploaded_file.name,
+                            uploaded_file.getvalue(),
+                            uploaded_file.type,
+                            max_chars=FILE_TEXT_LIMIT
+                        )
+                        text_content = document.text
+                        st.info(f"{document.label}已接收，系统将进行分析")
+                        st.caption(f"解析耗时 {document.elapsed:.2f} 秒" + ("（缓存）" if document.cached else ""))
                     except Exception as e:
                         st.error(f"文件处理出错：{str(e)}")
                         text_content = ""
@@ -160,78 +431,47 @@ class StartupMentorSystem:
                 if not project_name:
                     st.error("请至少输入项目名称")
                     return
+                if not hasattr(self, "jobs"):
+                    st.error("请先设置 302AI API Key")
+                    return
                     
-                with st.spinner("正在分析中..."):
-                    # 收集所有输入信息
-                    project_info = {
-                        "项目名称": project_name,
-                        "项目阶段": project_stage,
-                        "融资情况": funding_status,
-                        "行业领域": industry,
-                        "目标客户": target_users,
-                        "核心产品描述": core_product,
-                        "当前挑战": current_challenges
-                    }
-                    
-                    # 如果有上传文件，添加文件内容到分析
-                    if uploaded_file is not None and 'text_content' in locals():
-                        project_info["上传文件"] = uploaded_file.name
-                        project_info["文件内容"] = text_content
-                    
-                    # 使用 Claude 进行分析
-                    analysis_result = self.analyze_with_claude(project_info)
-                    
-                    if analysis_result:
-                        # 在分析结果标签页显示结果
-                        tab2.write("## 分析结果")
-                        
-                        # 创建两列布局显示结果
-                        col1, col2 = tab2.columns(2)
-                        
-                        with col1:
-                            st.subheader("需求分析")
-                            st.write(analysis_result.get("需求分析", ""))
-                            
-                            st.subheader("解决方案")
-                            st.write(analysis_result.get("解决方案", ""))
-                            
-                            st.subheader("商业模式")
-                            st.write(analysis_result.get("商业模式", ""))
-                            
-                        with col2:
-                            st.subheader("增长策略")
-                            st.write(analysis_result.get("增长策略", ""))
-                            
-                            st.subheader("竞争分析")
-                            st.write(analysis_result.get("竞争分析", ""))
-                        
-                        # 生成并提供下载报告
-                        report_content = "\n\n".join([
-                            f"# {project_name} - 创业项目分析报告\n",
-                            "## 需求分析",
-                            analysis_result.get("需求分析", ""),
-                            "## 解决方案",
-                            analysis_result.get("解决方案", ""),
-                            "## 商业模式",
-                            analysis_result.get("商业模式", ""),
-                            "## 增长策略",
-                            analysis_result.get("增长策略", ""),
-                            "## 竞争分析",
-                            analysis_result.get("竞争分析", "")
-                        ])
-                        
-                        tab2.download_button(
-                            "下载完整分析报告",
-                            report_content,
-                            file_name=f"{project_name}-创业分析报告.md",
-                            mime="text/markdown"
-                        )
-                    
+                # 收集所有输入信息
+                project_info = {
+                    "项目名称": project_name,
+                    "项目阶段": project_stage,
+                    "融资情况": funding_status,
+                    "行业领域": industry,
+                    "目标客户": target_users,
+                    "核心产品描述": core_product,
+                    "当前挑战": current_challenges
+                }
+                
+                # 如果有上传文件，添加文件内容到分析
+                if uploaded_file is not None and 'text_content' in locals():
+                    project_info["上传文件"] = uploaded_file.name
+                    project_info["文件内容"] = text_content
+                
+                # 提交到后台任务队列后立即返回，任务 id 记入地址栏，刷新页面后仍可继续查看进度
+                job_id = self.jobs.submit(project_info, analysis_mode, max_workers)
+                st.session_state["job_id"] = job_id
+                st.query_params["job"] = job_id
+                st.success("分析任务已提交，请在“分析结果”标签页查看进度")
+                
+        job_pending = False
         with tab2:
-            st.info('请在"项目信息"标签页填写信息并点击"开始分析"')
+            job_id = st.session_state.get("job_id") or st.query_params.get("job")
+            if job_id and hasattr(self, "jobs"):
+                job_pending = self._render_job(job_id)
+            else:
+                st.info('请在"项目信息"标签页填写信息并点击"开始分析"')
             
         with tab3:
-            st.info("历史记录功能开发中...")
+            self._render_history()
+        
+        # 任务未结束时稍后重跑脚本刷新进度，不在脚本线程中等待模型生成
+        if job_pending:
+            time.sleep(JOB_POLL_INTERVAL)
+            st.rerun()
 
 if __name__ == "__main__":
     system = StartupMentorSystem()
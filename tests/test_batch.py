@@ -0,0 +1,68 @@
+import json
+import signal
+import threading
+import time
+
+import startup_mentor
+from analysis_engine import AnalysisEngine
+from benchmarks.fake_llm import make_analysis_text
+from llm_client import DEFAULT_MODEL
+
+
+class FakeClient:
+    """每次请求稍作等待后返回完整的分析文本；interrupt_at 指定在第几次请求时向主线程发送 SIGINT"""
+
+    model = DEFAULT_MODEL
+    temperature = 0.7
+    rate_limiter = None
+
+    def __init__(self, interrupt_at=None):
+        self.calls = 0
+        self.interrupt_at = interrupt_at
+        self._lock = threading.Lock()
+
+    def complete(self, messages, **params):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        if calls == self.interrupt_at:
+            signal.pthread_kill(threading.main_thread().ident, signal.SIGINT)
+        time.sleep(0.05)
+        return make_analysis_text()
+
+    def close(self):
+        pass
+
+
+def _run(monkeypatch, tmp_path, client, workers=2):
+    monkeypatch.setattr(AnalysisEngine, "from_settings", classmethod(lambda cls, *args, **kwargs: cls(client)))
+    return startup_mentor.main([
+        "batch", str(tmp_path / "cohort.jsonl"), "-o", str(tmp_path / "results.jsonl"),
+        "--workers", str(workers), "--api-key", "test", "--rpm", "0", "--tpm", "0"
+    ])
+
+
+def _results(tmp_path):
+    with open(tmp_path / "results.jsonl", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_interrupt_cancels_queued_records_and_resumes(monkeypatch, tmp_path):
+    with open(tmp_path / "cohort.jsonl", "w", encoding="utf-8") as f:
+        for i in range(16):
+            f.write(json.dumps({"id": f"p{i}", "项目名称": f"项目{i}", "行业领域": "企业服务"}, ensure_ascii=False) + "\n")
+
+    client = FakeClient(interrupt_at=3)
+    assert _run(monkeypatch, tmp_path, client) == 130
+    # 中断后只有已提交到线程池的记录（并发数的 IN_FLIGHT_FACTOR 倍）可能发出请求
+    assert client.calls <= 2 * startup_mentor.IN_FLIGHT_FACTOR
+    first = _results(tmp_path)
+    # 已发出的请求结果全部写入，不会白白计费
+    assert len(first) == client.calls
+    assert all(result["status"] == "ok" for result in first)
+
+    resumed = FakeClient()
+    assert _run(monkeypatch, tmp_path, resumed) == 0
+    assert resumed.calls == 16 - len(first)
+    results = _results(tmp_path)
+    assert sorted(result["id"] for result in results) == sorted(f"p{i}" for i in range(16))
@@ -0,0 +1,70 @@
+import threading
+
+from coaching_system import CoachingSession, SessionStore, StartupCoach
+
+
+def _session(session_id, **kwargs):
+    return CoachingSession(session_id, "需求探索", ("问题一", "问题二"), **kwargs)
+
+
+def test_lru_keeps_most_recently_used_sessions():
+    store = SessionStore(max_sessions=2, idle_timeout=None)
+    for session_id in "ab":
+        store.put(_session(session_id))
+    store.get("a")
+    store.put(_session("c"))
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.stats["dropped"] == 1
+
+
+def test_idle_sessions_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("coaching_system.time.time", lambda: now[0])
+    store = SessionStore(idle_timeout=60)
+    store.put(_session("old"))
+    now[0] += 30
+    store.put(_session("new"))
+    now[0] += 40
+    assert store.evict_idle() == 1
+    assert store.get("old") is None and store.get("new") is not None
+
+
+def test_spilled_sessions_are_reloaded(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    coach = StartupCoach(SessionStore(max_sessions=1, idle_timeout=None, path=path))
+    first = coach.create_coaching_session("需求探索")
+    coach.record_insights(first.id, "客户的痛点是报税太麻烦")
+    expected = first.to_record()
+    coach.create_coaching_session("商业模式")
+    assert coach.sessions.stats["spilled"] == 1
+
+    reloaded = coach.get_session(first.id)
+    assert reloaded is not first
+    assert {**reloaded.to_record(), "last_active": 0} == {**expected, "last_active": 0}
+    assert coach.sessions.stats["loaded"] == 1
+
+    # 关闭时写盘，重新打开后仍可继续会话
+    coach.sessions.close()
+    coach = StartupCoach(SessionStore(path=path))
+    assert coach.next_question(first.id) == expected["questions"][0]
+
+
+def test_next_question_is_not_repeated_across_threads():
+    coach = StartupCoach(SessionStore(max_sessions=1, idle_timeout=None))
+    session = coach.create_coaching_session("需求探索")
+    asked = []
+    threads = [threading.Thread(target=lambda: asked.append(coach.next_question(session.id))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    questions = [question for question in asked if question is not None]
+    assert sorted(questions) == sorted(session.questions)
+
+
+def test_updates_to_missing_session_return_none():
+    coach = StartupCoach()
+    assert coach.next_question("missing") is None
+    assert coach.generate_action_items("missing") is None
+    coach.record_insights("missing", "客户")
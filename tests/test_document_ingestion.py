@@ -0,0 +1,31 @@
+import io
+
+from docx import Document
+
+from document_ingestion import extract_docx
+
+
+def _docx_with_table() -> bytes:
+    doc = Document()
+    table = doc.add_table(rows=2, cols=3)
+    for c, text in enumerate(["指标", "2023", "2024"]):
+        table.rows[0].cells[c].text = text
+    merged = table.rows[1].cells[0].merge(table.rows[1].cells[1])
+    merged.text = "营收"
+    table.rows[1].cells[2].text = "0"
+    zeros = doc.add_table(rows=1, cols=3)
+    for c, text in enumerate(["亏损", "0", "0"]):
+        zeros.rows[0].cells[c].text = text
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def test_table_cells_dedupe_merged_but_keep_equal_values():
+    text = extract_docx(_docx_with_table())
+    lines = text.splitlines()
+    assert "指标 | 2023 | 2024" in lines
+    # 合并单元格只出现一次
+    assert "营收 | 0" in lines
+    # 相邻的相同取值都保留
+    assert "亏损 | 0 | 0" in lines
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from benchmarks.corpus import make_txt
+from document_processor import DocumentProcessor
+
+
+def test_analyze_folder_reports_bad_file_and_scores_the_rest(tmp_path):
+    (tmp_path / "plan.txt").write_bytes(make_txt(5))
+    (tmp_path / "market.txt").write_bytes(make_txt(3, seed=1))
+    # 扩展名是 docx 但内容不是 zip，解析会失败
+    (tmp_path / "broken.docx").write_bytes(b"not a docx file")
+    (tmp_path / "notes.bin").write_bytes(b"\x00\x01")
+
+    result = DocumentProcessor().analyze_folder(str(tmp_path), doc_type="商业计划")
+
+    assert set(result["文档"]) == {"plan.txt", "market.txt", "broken.docx"}
+    broken = result[result["文档"] == "broken.docx"].iloc[0]
+    assert result.iloc[-1]["文档"] == "broken.docx"
+    assert broken["错误"]
+    assert pd.isna(broken["完整性评分"])
+    assert (result[result["文档"] != "broken.docx"]["错误"] == "").all()
+    assert result["完整性评分"].dropna().is_monotonic_decreasing
+
+
+def test_analyze_folder_with_only_bad_files(tmp_path):
+    (tmp_path / "broken.pdf").write_bytes(b"%PDF-garbage")
+
+    result = DocumentProcessor().analyze_folder(str(tmp_path))
+
+    assert list(result["文档"]) == ["broken.pdf"]
+    assert result.iloc[0]["错误"]
@@ -0,0 +1,30 @@
+from document_scoring import KeywordScoringEngine
+
+
+def _hits(engine, text):
+    tf = engine.term_frequency([text])[0]
+    return {term: int(tf[i]) for i, term in enumerate(engine.vocabulary) if tf[i]}
+
+
+def test_ascii_terms_do_not_match_inside_words():
+    engine = KeywordScoringEngine()
+    text = ("We maintain email contact. The director said the factor of cooperation "
+            "is a chemvp and the tacagr group will coordinate.")
+    assert _hits(engine, text) == {}
+    assert engine.key_sentences(text, engine.signal_keywords["创新性"]) == []
+
+
+def test_ascii_terms_match_as_whole_words():
+    engine = KeywordScoringEngine()
+    hits = _hits(engine, "Our AI team (CEO, CTO) shipped the MVP; CAGR 30%. AI算法已落地")
+    assert hits["ai"] == 2
+    assert hits["ceo"] == hits["cto"] == hits["mvp"] == hits["cagr"] == 1
+    assert hits["算法"] == 1 and hits["落地"] == 1
+
+
+def test_cjk_terms_still_match_as_substrings():
+    engine = KeywordScoringEngine()
+    hits = _hits(engine, "本项目的市场规模约50亿元，增长率逐年提高。")
+    assert hits["市场规模"] == 1 and hits["亿元"] == 1 and hits["增长率"] == 1
+    # 长词优先：“市场规模”不会再额外计一次“市场”
+    assert "市场" not in hits
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from benchmarks.corpus import make_paragraphs
+from document_summarizer import DocumentSummarizer, chunk_text, limit_chunks
+from llm_client import CircuitOpenError, LLMError, estimate_tokens
+
+
+class CountingComplete:
+    def __init__(self):
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt: str, max_tokens: int) -> str:
+        with self._lock:
+            self.prompts.append(prompt)
+        return "摘要" * 20
+
+
+def test_map_calls_are_capped_for_long_documents():
+    text = "\n\n".join(make_paragraphs(3000))
+    assert len(text) > 150000
+    complete = CountingComplete()
+    summarizer = DocumentSummarizer(complete, chunk_tokens=3000, total_budget=2000, max_chunks=8)
+    summary = summarizer.summarize(text)
+    assert estimate_tokens(summary) <= 2000
+    # 8 次分块请求加一次合并
+    assert len(complete.prompts) <= 9
+    assert all(estimate_tokens(prompt) <= 3200 for prompt in complete.prompts)
+
+
+def test_limit_chunks_keeps_order_and_size():
+    chunks = chunk_text("\n\n".join(make_paragraphs(500)), 300)
+    limited = limit_chunks(chunks, 4, 300)
+    assert len(limited) == 4
+    assert limited[0].startswith(chunks[0][:50])
+    assert all(estimate_tokens(chunk) <= 300 + 10 for chunk in limited)
+    assert limit_chunks(chunks[:3], 4, 300) == chunks[:3]
+
+
+def _long_text() -> str:
+    return "\n\n".join(make_paragraphs(300))
+
+
+def test_circuit_open_propagates():
+    calls = []
+
+    def complete(prompt, max_tokens):
+        calls.append(prompt)
+        raise CircuitOpenError("上游服务连续失败")
+
+    with pytest.raises(CircuitOpenError):
+        DocumentSummarizer(complete, max_workers=1).summarize(_long_text())
+    # 熔断后不再逐块请求
+    assert len(calls) == 1
+
+
+def test_most_chunks_failing_raises():
+    def complete(prompt, max_tokens):
+        raise LLMError("503")
+
+    with pytest.raises(LLMError):
+        DocumentSummarizer(complete).summarize(_long_text())
+
+
+def test_single_chunk_failure_keeps_other_summaries(caplog):
+    complete = CountingComplete()
+
+    def flaky(prompt, max_tokens):
+        if "第 2/" in prompt:
+            raise LLMError("503")
+        return complete(prompt, max_tokens)
+
+    summary = DocumentSummarizer(flaky).summarize(_long_text())
+    assert "摘要" in summary
+    assert "文件摘要第 2/" in caplog.text
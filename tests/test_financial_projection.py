@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from financial_projection import CachedProjection, FinancialProjector, ProjectionAssumptions
+from growth_strategies import GrowthStrategist
+from startup_advisor import StartupAdvisor
+
+# 固定取值：每月新增 10 个客户、不流失，第 t 个月现金流为 5000t - 15000
+FIXED = dict(initial_investment=100000, fixed_costs=10000, initial_customers=0, new_customers=10,
+             growth_rate=0, churn_rate=0, arpu=1000, gross_margin=0.5, cac=500)
+
+
+def test_payback_and_breakeven_months():
+    result = FinancialProjector(ProjectionAssumptions(**FIXED), months=24).project(4)
+    assert np.allclose(result.cash_flow[0, :4], [-10000, -5000, 0, 5000])
+    assert list(result.breakeven_month) == [3] * 4
+    # 累计现金流：2500T(T+1) - 15000T - 100000，第 10 个月首次转正
+    assert list(result.payback_month) == [10] * 4
+    assert result.funding_need[0] == pytest.approx(100000 + 10000 + 5000)
+
+    short = FinancialProjector(ProjectionAssumptions(**FIXED), months=6).project(2)
+    assert np.isnan(short.payback_month).all()
+    assert short.summary()["回本概率"] == 0 and short.summary()["回本月份中位数"] is None
+
+
+def test_ltv_cac():
+    result = FinancialProjector(ProjectionAssumptions(**dict(FIXED, churn_rate=0.05))).project(3)
+    assert result.ltv == pytest.approx([10000] * 3)
+    assert result.ltv_cac == pytest.approx([20] * 3)
+    assert result.cac_payback_months == pytest.approx([1] * 3)
+
+
+def test_sensitivity_ranks_varied_assumptions():
+    assumptions = ProjectionAssumptions(**dict(FIXED, arpu=(200, 2000), cac=(500, 520)))
+    sensitivity = FinancialProjector(assumptions, seed=1).project(2000).sensitivity()
+    assert set(sensitivity.index) == {"客户月均收入", "获客成本"}
+    assert sensitivity.index[0] == "客户月均收入"
+    assert sensitivity.loc["客户月均收入", "相关系数"] > 0.9
+    assert sensitivity.loc["获客成本", "相关系数"] < 0
+
+
+def test_advisor_roi_uses_one_cached_projection():
+    advisor = StartupAdvisor()
+    advisor.projection_scenarios = 50
+    advisor.set_financial_assumptions(**FIXED)
+    roi = advisor._calculate_roi()
+    assert roi["回收周期"]["回本概率"] == 1.0
+    assert roi["回收周期"]["回本月份"]["P50"] == 10
+    assert roi["前期投入"]["前期投入"]["P50"] == 100000
+    assert roi["预期收入"]["第12个月"]["P50"] == 120000
+
+    first = advisor.project_financials()
+    assert advisor.project_financials() is first
+    # 直接修改假设字段也会重新推演
+    advisor.financial_assumptions.arpu = 2000
+    assert advisor.project_financials() is not first
+    assert advisor._forecast_revenue()["第12个月"]["P50"] == 240000
+
+
+def test_strategist_recomputes_when_market_size_changes():
+    strategist = GrowthStrategist()
+    strategist.projection_scenarios = 50
+    first = strategist.project_financials()
+    assert first.market_share is None and strategist.project_financials() is first
+    strategist.market_data["潜在客户数"] = 5000
+    second = strategist.project_financials()
+    assert second is not first and second.market_share is not None
+    assert "市场份额" in strategist._define_kpis()
+    assert len(strategist._generate_optimization_suggestions()) == 3
+
+
+def test_cached_projection_clear():
+    cache = CachedProjection()
+    assumptions = ProjectionAssumptions(**FIXED)
+    first = cache.get(assumptions, 10)
+    assert cache.get(assumptions, 10) is first
+    assert cache.get(assumptions, 20) is not first
+    second = cache.get(assumptions, 20)
+    cache.clear()
+    assert cache.get(assumptions, 20) is not second
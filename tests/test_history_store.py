@@ -0,0 +1,15 @@
+from history_store import HistoryStore
+
+
+def test_save_strips_derived_fields(tmp_path):
+    history = HistoryStore(str(tmp_path / "history.db"))
+    project_info = {
+        "项目名称": "甲", "行业领域": "企业服务", "上传文件": "bp.docx",
+        "文件内容": "原文" * 1000, "文件摘要": "摘要", "相似案例": "- 乙（相似度 0.80）",
+    }
+    record_id = history.save(project_info, {"需求分析": "需求真实"}, "整体分析")
+    saved = history.get(record_id)["project_info"]
+    assert saved == {"项目名称": "甲", "行业领域": "企业服务", "上传文件": "bp.docx"}
+    assert [record["project_info"] for record in history.iter_records()] == [saved]
+    # 全文检索只包含分析内容，不包含相似案例文本
+    assert history.query(search="相似度")[1] == 0
@@ -0,0 +1,115 @@
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+
+from job_queue import STATUS_DONE, STATUS_QUEUED, STATUS_RUNNING, JobQueue, JobWorkerPool
+
+
+class StubEngine:
+    def run_analysis(self, project_info, mode, max_workers, timings, errors, on_progress):
+        return {"需求分析": "需求真实"}, False
+
+    def prompt_version(self, project_info, mode):
+        return "v1"
+
+
+class BrokenHistory:
+    def save(self, *args):
+        raise OSError("disk full")
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_recover_keeps_jobs_running_in_another_process(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        other = JobQueue(path, owner=f"{socket.gethostname()}:{process.pid}:live")
+        job_id = other.submit({"项目名称": "甲"})
+        assert other.claim()["id"] == job_id
+
+        # 另一个进程启动时不会接手仍在执行的任务
+        queue = JobQueue(path)
+        assert queue.recover() == 0
+        assert queue.get(job_id)["status"] == STATUS_RUNNING
+        assert queue.claim() is None
+    finally:
+        process.kill()
+        process.wait()
+
+
+def test_queues_in_same_process_share_owner(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    first = JobQueue(path)
+    job_id = first.submit({"项目名称": "甲"})
+    first.claim()
+    assert JobQueue(path).recover() == 0
+    assert first.get(job_id)["status"] == STATUS_RUNNING
+
+
+def test_recover_requeues_jobs_of_exited_process(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    exited = JobQueue(path, owner=f"{socket.gethostname()}:{_dead_pid()}:old")
+    job_id = exited.submit({"项目名称": "甲"})
+    exited.claim()
+
+    queue = JobQueue(path)
+    assert queue.recover() == 1
+    assert queue.get(job_id)["status"] == STATUS_QUEUED
+    assert queue.claim()["owner"] == queue.owner
+
+
+def test_recover_requeues_stale_heartbeat_from_other_host(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    remote = JobQueue(path, owner="other-host:1234:abcd")
+    fresh_id = remote.submit({"项目名称": "甲"})
+    remote.claim()
+    stale_id = remote.submit({"项目名称": "乙"})
+    remote.claim()
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time() - 600, stale_id))
+
+    queue = JobQueue(path)
+    assert queue.recover() == 1
+    assert queue.get(fresh_id)["status"] == STATUS_RUNNING
+    assert queue.get(stale_id)["status"] == STATUS_QUEUED
+
+    # 心跳更新后不会被其他进程接手
+    remote.heartbeat()
+    assert queue.recover(stale_after=1) == 0
+
+
+def test_old_database_is_migrated(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE jobs (id TEXT PRIMARY KEY, created_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+            "status TEXT NOT NULL, mode TEXT NOT NULL, max_workers INTEGER NOT NULL DEFAULT 3, claim TEXT, "
+            "project_info TEXT NOT NULL, progress TEXT, result TEXT, meta TEXT, cached INTEGER NOT NULL DEFAULT 0, "
+            "error TEXT)"
+        )
+        conn.execute("INSERT INTO jobs (id, created_at, started_at, status, mode, project_info) "
+                     "VALUES ('old', 0, 0, 'running', '整体分析', '{}')")
+    queue = JobQueue(path)
+    # 旧版进程留下的运行中任务没有心跳，直接重新排队
+    assert queue.recover() == 1
+    assert queue.claim()["id"] == "old"
+
+
+def test_history_failure_keeps_result_and_records_warning(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    job_id = queue.submit({"项目名称": "甲"})
+    pool = JobWorkerPool(queue, StubEngine(), history=BrokenHistory())
+
+    pool.run_job(queue.claim())
+
+    job = queue.get(job_id)
+    assert job["status"] == STATUS_DONE
+    assert job["result"] == {"需求分析": "需求真实"}
+    assert job["meta"]["warnings"] == ["保存历史记录失败：disk full"]
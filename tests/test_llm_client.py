@@ -0,0 +1,111 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from benchmarks.fake_llm import FakeLLMServer
+from llm_client import CircuitBreaker, CircuitOpenError, LLMClient, LLMError
+
+MESSAGES = [{"role": "user", "content": "分析一下"}]
+
+
+def _client(server, **kwargs):
+    kwargs.setdefault("backoff_base", 0.0)
+    return LLMClient("test", api_url=server.url, **kwargs)
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retryable_status_is_retried(status):
+    with FakeLLMServer(statuses=[status, status], response_text="好") as server, _client(server) as client:
+        assert client.complete(MESSAGES) == "好"
+        assert server.requests == 3
+
+
+def test_gives_up_after_max_retries():
+    with FakeLLMServer(statuses=[503] * 5) as server, _client(server, max_retries=2) as client:
+        with pytest.raises(LLMError, match="503"):
+            client.complete(MESSAGES)
+        assert server.requests == 3
+
+
+def test_client_error_is_not_retried():
+    with FakeLLMServer(statuses=[400]) as server, _client(server) as client:
+        with pytest.raises(LLMError, match="400"):
+            client.complete(MESSAGES)
+        assert server.requests == 1
+        assert client.circuit_breaker.state == "closed"
+
+
+def test_retry_after_header_sets_the_delay():
+    with FakeLLMServer(statuses=[429], retry_after="0.3", response_text="好") as server, _client(server) as client:
+        started = time.monotonic()
+        assert client.complete(MESSAGES) == "好"
+        assert time.monotonic() - started >= 0.3
+
+
+def test_parse_retry_after():
+    assert LLMClient._parse_retry_after("5") == 5.0
+    assert LLMClient._parse_retry_after("-3") == 0.0
+    assert 8 < LLMClient._parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
+    assert LLMClient._parse_retry_after(formatdate(time.time() - 10, usegmt=True)) == 0.0
+    assert LLMClient._parse_retry_after("soon") is None
+    assert LLMClient._parse_retry_after(None) is None
+
+
+def test_backoff_delay_is_capped():
+    client = LLMClient("test", backoff_base=1.0, backoff_max=2.0)
+    assert client._backoff_delay(0, retry_after=60) == 2.0
+    assert all(0 <= client._backoff_delay(10) <= 2.0 for _ in range(20))
+
+
+def test_read_timeout_is_retried_then_raised():
+    with FakeLLMServer(latency=0.5) as server, _client(server, read_timeout=0.1, max_retries=1) as client:
+        with pytest.raises(LLMError, match="请求失败"):
+            client.complete(MESSAGES)
+        assert server.requests == 2
+
+
+def test_stream_yields_chunks():
+    with FakeLLMServer(response_text="需求真实存在，渠道可行。", chunk_chars=4) as server, _client(server) as client:
+        assert "".join(client.stream(MESSAGES)) == "需求真实存在，渠道可行。"
+
+
+def test_malformed_stream_event_raises_llm_error():
+    events = ['{"choices": [{"delta": {"content": "需求"}}]}', "{not json"]
+    with FakeLLMServer(stream_events=events) as server, _client(server) as client:
+        chunks = []
+        with pytest.raises(LLMError, match="流式响应无法解析"):
+            for chunk in client.stream(MESSAGES):
+                chunks.append(chunk)
+        assert chunks == ["需求"]
+
+
+def test_circuit_opens_and_recovers_through_half_open_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    with FakeLLMServer(statuses=[503, 503], response_text="好") as server, \
+            _client(server, max_retries=0, circuit_breaker=breaker) as client:
+        for _ in range(2):
+            with pytest.raises(LLMError):
+                client.complete(MESSAGES)
+        assert breaker.state == "open"
+        # 熔断期间请求不会发到上游
+        with pytest.raises(CircuitOpenError):
+            client.complete(MESSAGES)
+        assert server.requests == 2
+
+        time.sleep(0.2)
+        assert breaker.state == "half_open"
+        assert client.complete(MESSAGES) == "好"
+        assert breaker.state == "closed"
+
+
+def test_failed_half_open_probe_reopens_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+    breaker.record_failure()
+    time.sleep(0.1)
+    breaker.before_call()
+    # 半开状态只放行一个试探请求
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
@@ -0,0 +1,56 @@
+import io
+
+import pytest
+from PyPDF2 import PageObject
+
+import pdf_extractor
+from benchmarks.corpus import make_pdf
+from pdf_extractor import extract_pdf_text, iter_pdf_pages
+
+@pytest.fixture
+def extracted_pages(monkeypatch):
+    """统计主进程中实际提取了多少页"""
+    calls = []
+    original = PageObject.extract_text
+
+    def extract_text(self, *args, **kwargs):
+        calls.append(self)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(PageObject, "extract_text", extract_text)
+    return calls
+
+
+def test_stops_at_character_budget(extracted_pages):
+    text = extract_pdf_text(io.BytesIO(make_pdf(30)), max_chars=500)
+    # 第一页就已超出预算，之后的页不再解析
+    assert len(extracted_pages) == 1
+    assert len(text) == 500
+    assert text == extract_pdf_text(io.BytesIO(make_pdf(1)))[:500]
+
+
+def test_process_pool_is_used_from_page_threshold(monkeypatch):
+    pools = []
+    real_pool = pdf_extractor.ProcessPoolExecutor
+
+    def pool(*args, **kwargs):
+        pools.append(kwargs)
+        return real_pool(*args, **kwargs)
+
+    monkeypatch.setattr(pdf_extractor, "ProcessPoolExecutor", pool)
+    data = make_pdf(20, lines_per_page=5)
+
+    sequential = list(iter_pdf_pages(io.BytesIO(data), parallel_threshold=21))
+    assert not pools
+    parallel = list(iter_pdf_pages(io.BytesIO(data), max_workers=2, parallel_threshold=20))
+    assert pools == [{"max_workers": 2}]
+    # 并行提取保持页序
+    assert parallel == sequential and len(parallel) == 20
+
+
+def test_pages_without_text_become_empty_strings(monkeypatch):
+    data = make_pdf(3, lines_per_page=0)
+    assert list(iter_pdf_pages(io.BytesIO(data), max_workers=2, parallel_threshold=2)) == ["", "", ""]
+    # 无文本层的页面 extract_text 可能返回 None
+    monkeypatch.setattr(PageObject, "extract_text", lambda self, *args, **kwargs: None)
+    assert extract_pdf_text(io.BytesIO(make_pdf(2))) == "\n\n"
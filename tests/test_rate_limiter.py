@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from rate_limiter import PRIORITY_BATCH, PRIORITY_INTERACTIVE, RateLimiter, RateLimitError
+
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    return thread
+
+
+def test_interactive_requests_are_released_before_batch():
+    limiter = RateLimiter(requests_per_minute=None, tokens_per_minute=None)
+    limiter.pause(0.3)
+    order = []
+
+    def acquire(name, priority):
+        limiter.acquire("k", priority=priority)
+        order.append(name)
+
+    threads = [_start(acquire, "batch", PRIORITY_BATCH)]
+    time.sleep(0.05)
+    threads.append(_start(acquire, "interactive", PRIORITY_INTERACTIVE))
+    for thread in threads:
+        thread.join()
+    assert order == ["interactive", "batch"]
+
+
+def test_per_key_buckets_are_independent():
+    limiter = RateLimiter(requests_per_minute=None, tokens_per_minute=None, key_tokens_per_minute=600)
+    limiter.acquire("a", 600)
+    with pytest.raises(RateLimitError):
+        limiter.acquire("a", 100, timeout=0.1)
+    started = time.monotonic()
+    limiter.acquire("b", 600)
+    assert time.monotonic() - started < 0.1
+
+
+def test_max_wait_raises_rate_limit_error():
+    limiter = RateLimiter(requests_per_minute=None, tokens_per_minute=600, max_wait=0.2)
+    limiter.acquire(tokens=600)
+    started = time.monotonic()
+    with pytest.raises(RateLimitError):
+        limiter.acquire(tokens=300)
+    assert 0.2 <= time.monotonic() - started < 1
+    assert limiter.stats()["waiting"] == 0
+
+
+def test_release_refunds_unused_tokens_and_wakes_waiters():
+    limiter = RateLimiter(requests_per_minute=None, tokens_per_minute=600, key_tokens_per_minute=600)
+    limiter.acquire("k", 600)
+    # 实际用量不少于预扣量时不退还
+    limiter.release("k", 600, 600)
+    assert limiter.stats()["tokens_available"] < 10
+
+    done = threading.Event()
+    thread = _start(lambda: (limiter.acquire("k", 500, timeout=5), done.set()))
+    time.sleep(0.05)
+    assert not done.is_set()
+    limiter.release("k", 600, 100)
+    thread.join(1)
+    assert done.is_set()
+    assert limiter.stats()["tokens_available"] < 10
@@ -0,0 +1,70 @@
+import pytest
+
+from response_cache import ResponseCache, normalize_project_info
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("response_cache.time.time", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock, tmp_path):
+    cache = ResponseCache(ttl=10, path=str(tmp_path / "cache.db"))
+    cache.set("k", {"需求分析": "甲"})
+    clock[0] += 5
+    assert cache.get("k") == {"需求分析": "甲"}
+    clock[0] += 6
+    assert cache.get("k") is None
+    # 过期条目同时从磁盘删除
+    assert ResponseCache(ttl=None, path=str(tmp_path / "cache.db")).get("k") is None
+    assert cache.stats == {"memory_hits": 1, "disk_hits": 0, "misses": 1}
+
+
+def test_memory_tier_is_lru():
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", {"v": "a"})
+    cache.set("b", {"v": "b"})
+    cache.get("a")
+    cache.set("c", {"v": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": "a"} and cache.get("c") == {"v": "c"}
+
+
+def test_disk_tier_evicts_least_recently_accessed(clock, tmp_path):
+    cache = ResponseCache(max_entries=1, path=str(tmp_path / "cache.db"), max_disk_entries=2)
+    for key in ("a", "b"):
+        clock[0] += 1
+        cache.set(key, {"v": key})
+    # a 已被挤出内存，从磁盘读取并刷新访问时间
+    clock[0] += 1
+    assert cache.get("a") == {"v": "a"}
+    clock[0] += 1
+    cache.set("c", {"v": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": "a"}
+    assert cache.stats["disk_hits"] == 2
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = ResponseCache(path=path)
+    first.set("k", {"需求分析": "甲"})
+    first.close()
+    second = ResponseCache(path=path)
+    assert second.get("k") == {"需求分析": "甲"}
+    assert second.stats["disk_hits"] == 1
+
+
+def test_normalize_project_info():
+    assert normalize_project_info({"项目名称": "  甲 ", "目标客户": "", "当前挑战": None, "团队人数": 0}) == \
+        {"项目名称": "甲", "团队人数": 0}
+
+
+def test_equivalent_forms_share_a_key():
+    key = ResponseCache.make_key({"项目名称": "甲", "行业领域": "消费"}, "m", 0.7, "v1")
+    assert ResponseCache.make_key({"行业领域": " 消费\n", "项目名称": "甲", "目标客户": ""}, "m", 0.7, "v1") == key
+    assert ResponseCache.make_key({"项目名称": "甲", "行业领域": "消费"}, "m", 0.7, "v2") != key
+    assert ResponseCache.make_key({"项目名称": "甲", "行业领域": "消费"}, "m", 0.2, "v1") != key
+    assert ResponseCache.make_key({"项目名称": "甲", "行业领域": "消费"}, "m", 0.7, "v1", "parallel") != key
@@ -0,0 +1,86 @@
+from section_parser import SECTION_TITLES, SectionSplitter, parse_sections
+
+NUMBERED = """以下是分析：
+(1) 需求分析
+市场需求真实存在。
+(2) 解决方案
+产品可行。
+(3) 商业模式
+订阅收费。
+(4) 增长策略
+渠道合作。
+(5) 竞争分析
+壁垒在数据。
+"""
+
+CHINESE_NUMBERED = (NUMBERED.replace("(1)", "（一）").replace("(2)", "（二）").replace("(3)", "（三）")
+                    .replace("(4)", "（4）").replace("(5)", "（5）"))
+
+MARKDOWN = """## 1. 需求分析
+需求分析显示市场较大。
+## 2. 解决方案：
+- 核心功能
+## 3. 商业模式
+**按年订阅**
+## 4. 增长策略与渠道
+先做单一城市。
+## 5. 竞争分析
+对手已完成 B 轮融资。"""
+
+
+def _feed(text: str, chunk: int):
+    splitter = SectionSplitter()
+    for i in range(0, len(text), chunk):
+        splitter.feed(text[i:i + chunk])
+    return splitter.close()
+
+
+def _assert_stream_matches(text: str):
+    expected = parse_sections(text)
+    assert list(expected) == SECTION_TITLES
+    for chunk in range(1, len(text) + 1):
+        assert _feed(text, chunk) == expected, f"chunk={chunk}"
+
+
+def test_stream_matches_whole_text_numbered():
+    _assert_stream_matches(NUMBERED)
+
+
+def test_stream_matches_whole_text_chinese_numbered():
+    _assert_stream_matches(CHINESE_NUMBERED)
+
+
+def test_stream_matches_whole_text_markdown():
+    _assert_stream_matches(MARKDOWN)
+
+
+def test_numbered_headings():
+    sections = parse_sections(CHINESE_NUMBERED)
+    assert sections["解决方案"] == "产品可行。"
+    assert sections["商业模式"] == "订阅收费。"
+
+
+LIST_ITEMS = """## 需求分析
+需求真实。
+## 解决方案
+- 商业模式：见下文
+- **增长策略**：暂不展开
+## 商业模式
+订阅收费。
+- 竞争分析
+对手较少。"""
+
+
+def test_list_item_mentioning_title_is_body():
+    sections = parse_sections(LIST_ITEMS)
+    assert sections["解决方案"] == "- 商业模式：见下文\n- **增长策略**：暂不展开"
+    assert sections["商业模式"] == "订阅收费。"
+    assert "增长策略" not in sections
+    # 整行只是维度名的列表项仍作为标题
+    assert sections["竞争分析"] == "对手较少。"
+
+
+def test_stream_matches_whole_text_list_items():
+    expected = parse_sections(LIST_ITEMS)
+    for chunk in range(1, len(LIST_ITEMS) + 1):
+        assert _feed(LIST_ITEMS, chunk) == expected, f"chunk={chunk}"
@@ -0,0 +1,69 @@
+import numpy as np
+
+from benchmarks.corpus import make_projects
+from history_store import HistoryStore
+from similarity_index import SimilarityIndex
+
+SAAS = {"项目名称": "记账宝", "行业领域": "企业服务", "项目阶段": "种子期",
+        "核心产品描述": "面向小微企业的在线记账和报税软件", "目标客户": "小微企业老板"}
+SAAS_RESULT = {"需求分析": "小微企业记账报税需求强烈。", "商业模式": "按年订阅收费。"}
+PET = {"项目名称": "宠爱", "行业领域": "消费", "项目阶段": "天使轮",
+       "核心产品描述": "宠物食品定制和上门喂养服务", "目标客户": "城市养宠家庭"}
+PET_RESULT = {"需求分析": "养宠家庭对上门喂养需求增长。", "商业模式": "按次收费加会员。"}
+
+
+def _index(path=":memory:"):
+    index = SimilarityIndex(path)
+    index.add_many([(1, SAAS, SAAS_RESULT), (2, PET, PET_RESULT)])
+    return index
+
+
+def test_search_ranks_similar_project_first():
+    index = _index()
+    query = {"项目名称": "税小二", "行业领域": "企业服务", "核心产品描述": "帮小微企业在线报税的记账软件"}
+    hits = index.search(query, k=2)
+    assert [hit["id"] for hit in hits] == [1]
+    assert hits[0]["项目名称"] == "记账宝" and hits[0]["摘要"].startswith("需求分析：")
+    # 同名项目被排除
+    assert index.search(SAAS, k=2, exclude_name="记账宝") == []
+
+
+def test_readding_a_record_does_not_inflate_document_frequency():
+    index = _index()
+    df, count = index._df.copy(), index._count
+    index.add(1, SAAS, SAAS_RESULT)
+    index.add_many([(2, PET, PET_RESULT), (2, PET, PET_RESULT)])
+    assert len(index) == 2
+    assert index._count == count
+    assert np.array_equal(index._df, df)
+
+
+def test_index_is_persisted_and_reloaded(tmp_path):
+    path = str(tmp_path / "history.db")
+    index = _index(path)
+    expected = index.search(SAAS, k=2, min_similarity=-1)
+    df, count = index._df.copy(), index._count
+    index.close()
+
+    reloaded = SimilarityIndex(path)
+    assert len(reloaded) == 2 and reloaded.max_id == 2
+    assert reloaded._count == count and np.array_equal(reloaded._df, df)
+    assert reloaded.search(SAAS, k=2, min_similarity=-1) == expected
+    reloaded.close()
+
+    # 维度变化时旧向量作废
+    assert len(SimilarityIndex(path, dim=128)) == 0
+
+
+def test_sync_adds_only_new_history_records(tmp_path):
+    history = HistoryStore(str(tmp_path / "history.db"))
+    projects = list(make_projects(5))
+    for _, project_info, result in projects[:3]:
+        history.save(project_info, result, "整体分析")
+    index = SimilarityIndex()
+    assert index.sync(history) == 3
+    for _, project_info, result in projects[3:]:
+        history.save(project_info, result, "整体分析")
+    assert index.sync(history) == 2
+    assert index.sync(history) == 0
+    assert len(index) == 5 and index._count == 5
@@ -0,0 +1,288 @@
+"""轻量性能埋点：嵌套计时 span、按阶段汇总的耗时直方图与计数器
+
+用法：
+    with tracer.trace("analysis.job", mode=mode):      # 一次完整请求的耗时分解
+        with tracer.span("prompt.build") as span:
+            ...
+            span.attrs["tokens"] = n
+
+不在任何 trace 内的 span 只计入汇总指标。汇总指标可导出为 Prometheus 文本格式，
+完成的 trace 可逐行写入 JSON Lines 文件。
+"""
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 耗时直方图的分桶上界（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+METRIC_PREFIX = "startup_mentor"
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+_current_depth: contextvars.ContextVar = contextvars.ContextVar("current_depth", default=0)
+
+
+@dataclass
+class Span:
+    name: str
+    # 相对所属 trace 开始时间的偏移（秒）
+    offset: float
+    duration: float = 0.0
+    depth: int = 0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "offset_ms": round(self.offset * 1000, 2),
+            "duration_ms": round(self.duration * 1000, 2),
+            "depth": self.depth,
+            "attrs": self.attrs,
+        }
+
+
+@dataclass
+class Trace:
+    name: str
+    started_at: float
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    spans: List[Span] = field(default_factory=list)
+    duration: float = 0.0
+    error: Optional[str] = None
+    _start: float = field(default_factory=time.monotonic, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.offset)
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 2),
+            "error": self.error,
+            "attrs": self.attrs,
+            "spans": [span.to_dict() for span in spans],
+        }
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "count", "total", "max")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """按分桶估算分位数，取所在桶的上界"""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max
+
+
+class Tracer:
+    """进程内埋点收集器，线程安全；并发线程需以 contextvars.copy_context().run 提交任务以继承当前 trace"""
+
+    def __init__(self, max_traces: int = 50, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.log_path: Optional[str] = None
+        self._traces: deque = deque(maxlen=max_traces)
+        self._histograms: Dict[str, _Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @contextmanager
+    def trace(self, name: str, **attrs) -> Iterator[Trace]:
+        """开始一次完整请求的记录，期间同一上下文中的 span 都归入该 trace"""
+        trace = Trace(name, time.time(), attrs)
+        trace_token = _current_trace.set(trace)
+        depth_token = _current_depth.set(0)
+        try:
+            yield trace
+        except BaseException as e:
+            trace.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            trace.duration = time.monotonic() - trace._start
+            _current_depth.reset(depth_token)
+            _current_trace.reset(trace_token)
+            self._observe(name, trace.duration)
+            self._finish(trace)
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Span]:
+        """记录一个阶段的耗时；可在 with 块内通过 span.attrs 补充 token 数、大小等信息"""
+        trace = _current_trace.get()
+        depth = _current_depth.get()
+        start = time.monotonic()
+        span = Span(name, start - trace._start if trace else 0.0, depth=depth + 1, attrs=attrs)
+        depth_token = _current_depth.set(depth + 1)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            _current_depth.reset(depth_token)
+            span.duration = time.monotonic() - start
+            self._observe(name, span.duration)
+            if trace is not None:
+                trace.add(span)
+
+    def record(self, name: str, duration: float, start: Optional[float] = None, **attrs):
+        """记录已经测得的耗时，用于生成器等不便使用 with 的场景；start 为 time.monotonic() 起点"""
+        trace = _current_trace.get()
+        self._observe(name, duration)
+        if trace is not None:
+            offset = (start if start is not None else time.monotonic() - duration) - trace._start
+            trace.add(Span(name, offset, duration, _current_depth.get() + 1, attrs))
+
+    def traced(self, name: Optional[str] = None):
+        """装饰器：把函数调用记录为 span"""
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name: str, value: float = 1, **labels):
+        """累加计数器，如缓存命中次数、token 数、请求字节数"""
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def _observe(self, name: str, duration: float):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram(self.buckets)
+            histogram.observe(duration)
+
+    def _finish(self, trace: Trace):
+        record = trace.to_dict()
+        with self._lock:
+            self._traces.append(record)
+            log_path = self.log_path
+        if log_path:
+            try:
+                with open(log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError:
+                # 埋点写入失败不能影响业务流程
+                pass
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """最近完成的 trace，最新的在前"""
+        with self._lock:
+            traces = list(self._traces)
+        traces.reverse()
+        return traces[:limit] if limit else traces
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """各阶段耗时汇总：次数、平均、p95（按分桶估算）与最大值，单位毫秒"""
+        with self._lock:
+            rows = [
+                {
+                    "name": name,
+                    "count": histogram.count,
+                    "avg_ms": round(histogram.total / histogram.count * 1000, 1),
+                    "p95_ms": round(histogram.quantile(0.95) * 1000, 1),
+                    "max_ms": round(histogram.max * 1000, 1),
+                }
+                for name, histogram in self._histograms.items()
+            ]
+        return sorted(rows, key=lambda row: row["name"])
+
+    def counters(self) -> Dict[str, float]:
+        with self._lock:
+            items = list(self._counters.items())
+        return {
+            name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else ""): value
+            for (name, labels), value in sorted(items)
+        }
+
+    def prometheus(self) -> str:
+        """导出 Prometheus 文本格式的指标"""
+        lines = [
+            f"# HELP {METRIC_PREFIX}_span_seconds Duration of traced pipeline stages.",
+            f"# TYPE {METRIC_PREFIX}_span_seconds histogram",
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        for name, histogram in histograms:
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{METRIC_PREFIX}_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{METRIC_PREFIX}_span_seconds_bucket{{span="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{METRIC_PREFIX}_span_seconds_sum{{span="{name}"}} {histogram.total:.6f}')
+            lines.append(f'{METRIC_PREFIX}_span_seconds_count{{span="{name}"}} {histogram.count}')
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f"{METRIC_PREFIX}_{name}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{metric}{{{label_text}}} {value:g}" if label_text else f"{metric} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """在后台线程启动 /metrics 端点，供 Prometheus 抓取；重复调用返回已启动的服务"""
+        if self._server is not None:
+            return self._server
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        return self._server
+
+
+# 进程内共享的默认收集器
+tracer = Tracer()